@@ -0,0 +1,158 @@
+import os
+import time
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+logger.setLevel(10)
+
+# asset_data keys that point at files the browser actions open
+FILE_KEYS = ["maya_file", "vrproxy_maya", "asset_path"]
+
+
+def _stat_mtime(path):
+    try:
+        return os.stat(path).st_mtime
+    except OSError:
+        return None
+
+
+class AvailabilityIndex(object):
+    def __init__(self, file_keys=None):
+        self.file_keys = file_keys or FILE_KEYS
+
+        # path -> bool, directory -> mtime at the time its files were checked
+        self._files = {}
+        self._dirs = {}
+
+        self._lock = threading.Lock()
+        self._thread = None
+
+        # Paths asked for while a refresh is running, the running thread picks them up before it exits
+        self._pending = set()
+        self._running = False
+
+    def _check_dir(self, directory, paths):
+        mtime = _stat_mtime(directory)
+
+        with self._lock:
+            # Adding or removing a file bumps the directory mtime, unchanged directories keep their results
+            if mtime is not None and self._dirs.get(directory) == mtime and all(p in self._files for p in paths):
+                return 0
+
+        results = {}
+
+        for path in paths:
+            results[path] = mtime is not None and os.path.isfile(path)
+
+        with self._lock:
+            self._files.update(results)
+
+            if mtime is None:
+                self._dirs.pop(directory, None)
+            else:
+                self._dirs[directory] = mtime
+
+        return len(results)
+
+    def get_paths(self, asset_datas):
+        paths = set()
+
+        for asset_data in asset_datas:
+            for key in self.file_keys:
+                if asset_data.get(key):
+                    paths.add(os.path.normpath(asset_data[key]))
+
+        return paths
+
+    def _build(self, paths):
+        start = time.time()
+        by_dir = {}
+
+        for path in paths:
+            by_dir.setdefault(os.path.dirname(path), []).append(path)
+
+        stat_count = 0
+
+        for directory, dir_paths in by_dir.items():
+            stat_count += self._check_dir(directory, dir_paths)
+
+        logger.debug("Availability index: %s paths, %s re-checked in %.2fs", len(paths), stat_count,
+                     time.time() - start)
+
+    def _run(self):
+        while True:
+            with self._lock:
+                paths, self._pending = self._pending, set()
+
+                if not paths:
+                    self._running = False
+                    return
+
+            self._build(paths)
+
+    def refresh(self, asset_datas=None, paths=None, wait=False):
+        # Indexes the files of asset data the browser has already loaded, or re-checks the indexed paths when
+        # neither is given. Runs in a background thread, paths asked for while it runs are queued into it
+        if asset_datas is not None:
+            paths = self.get_paths(asset_datas)
+        elif paths is not None:
+            paths = set(os.path.normpath(p) for p in paths)
+
+        with self._lock:
+            self._pending.update(paths if paths is not None else self._files)
+
+            if not self._running:
+                self._running = True
+                self._thread = threading.Thread(target=self._run, name="AssetAvailabilityIndex")
+                self._thread.daemon = True
+                self._thread.start()
+
+            thread = self._thread
+
+        if wait:
+            thread.join()
+
+        return thread
+
+    def is_available(self, path):
+        # True/False when indexed, None while unknown
+        if not path:
+            return False
+
+        return self._files.get(os.path.normpath(path))
+
+    def check(self, path):
+        # Like is_available, but stats paths the index has not reached yet
+        available = self.is_available(path)
+
+        if available is None:
+            available = os.path.isfile(path)
+
+            with self._lock:
+                self._files[os.path.normpath(path)] = available
+
+        return available
+
+    def invalidate(self, path=None):
+        with self._lock:
+            if path is None:
+                self._files.clear()
+                self._dirs.clear()
+                return
+
+            path = os.path.normpath(path)
+            self._files.pop(path, None)
+            self._dirs.pop(os.path.dirname(path), None)
+
+
+_index = None
+
+
+def get_index():
+    global _index
+
+    if _index is None:
+        _index = AvailabilityIndex()
+
+    return _index
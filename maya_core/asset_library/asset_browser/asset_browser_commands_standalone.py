@@ -3,23 +3,27 @@ import sys
 import json
 import logging
 
-import maya.cmds as cmds
 import maya.mel as mel
 import pymel.core as pm
 
 from maya_core.maya_asset import MayaAsset
-from maya_core.pipeline.lookdev.material_builder import MaterialBuilder as mb
+from maya_core.pipeline.lookdev.material_builder import material_cache
 from tools_core.asset_library import library_manager as lm
 from maya_core.pipeline.modeling.normalize_scale import normalize_scale as ns
 from maya_core.pipeline.lighting.vray_lighting import vray_lighting
 from maya_core.pipeline.lookdev import lookdev_utils
+from maya_core.asset_library.asset_browser import asset_import
 
 logging.basicConfig()
 logger = logging.getLogger(__name__)
 
 
 def import_model_asset(asset_path):
-    cmds.file(asset_path, i=1)
+    import_model_assets([asset_path])
+
+
+def import_model_assets(asset_paths):
+    return asset_import.import_assets(asset_paths)
 
 
 def import_hdr_asset(asset_path):
@@ -34,18 +38,18 @@ def import_cucoloris_asset(asset_path):
     vray_lighting.create_gobo(os.path.basename(asset_path), asset_path)
 
 
-def import_material_asset(asset):
+def import_material_asset(asset, force_new=False):
     asset_data = lm.get_asset_data("Material", asset)
 
-    mb.build_material(asset_data["materials"][0])
+    material_cache.build_material(asset_data["materials"][0], force_new=force_new)
 
 
-def import_assign_material_asset(asset):
+def import_assign_material_asset(asset, force_new=False):
     selection = pm.ls(sl=1)
 
     asset_data = lm.get_asset_data("Material", asset)
 
-    mtls = mb.build_material(asset_data["materials"][0])
+    mtls = material_cache.build_material(asset_data["materials"][0], force_new=force_new)
 
     if not selection:
         return
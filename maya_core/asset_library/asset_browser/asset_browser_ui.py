@@ -1,4 +1,3 @@
-import os
 from functools import partial
 import logging
 
@@ -13,14 +12,36 @@ from tools_core.asset_library.asset_browser import AssetBrowserWidget
 from maya_core.maya_pyqt import MWidgets
 from tools_core.asset_library import library_manager as lm
 from maya_core.pipeline.lighting.vray_lighting import vray_lighting
-from maya_core.pipeline.lookdev.material_builder import MaterialBuilder
+from maya_core.pipeline.lookdev.material_builder import material_cache
 from maya_core.pipeline.lookdev import lookdev_utils
+from maya_core.asset_library.asset_browser import asset_availability
+from maya_core.asset_library.asset_browser import asset_import
+from maya_core.asset_library.asset_browser import thumbnail_loader
+from maya_core.asset_library.asset_browser import library_summary
 
 logger = logging.getLogger(__name__)
 logger.setLevel(10)
 
 
+# How often the availability index re-checks directory mtimes
+AVAILABILITY_REFRESH_INTERVAL = 60 * 1000
+
+# Scrolling and resizing are coalesced into one visible-row pass
+THUMBNAIL_UPDATE_DELAY = 30
+
+# Libraries the browser loads in quick succession are gathered into one summary and availability update
+LIBRARY_UPDATE_DELAY = 200
+
+# Rows above and below the viewport decoded ahead of scrolling
+THUMBNAIL_MARGIN = 50
+
+THUMBNAIL_COLUMN = 0
+
+
 class AssetBrowserWindow(QtWidgets.QMainWindow):
+    # Emitted from whichever thread loaded the library, the queued connection brings it to the UI thread
+    library_loaded = QtCore.Signal(str)
+
     def __init__(self, parent=MWidgets.maya_main_window()):
         super(AssetBrowserWindow, self).__init__(parent)
 
@@ -34,6 +55,18 @@ class AssetBrowserWindow(QtWidgets.QMainWindow):
 
         self.prefs_directory = cmds.internalVar(userPrefDir=True)
 
+        # Filled from the libraries the browser loads, see update_library_state
+        self.availability = asset_availability.get_index()
+
+        self.thumbnails = thumbnail_loader.ThumbnailLoader(parent=self)
+        # path -> items in and around the viewport, and path -> items showing its pixmap
+        self.thumbnail_items = {}
+        self.icon_items = {}
+
+        # library -> library data the browser loaded since the last update_library_state, empty ones included
+        self.loaded_libraries = {}
+        library_summary.add_load_callback(self.record_library_load)
+
         self.dims = (1920, 1080)
         self.setMinimumSize(self.dims[0], self.dims[1])
 
@@ -49,10 +82,8 @@ class AssetBrowserWindow(QtWidgets.QMainWindow):
     def create_custom_actions(self):
         self.custom_actions = {}
 
-        for library in lm.LIBRARIES.keys():
-            if not lm.get_library_data(library):
-                continue
-
+        # Library data is only loaded when a library is visited, startup goes by the cached summary
+        for library in library_summary.get_startup_libraries(library_summary.load_summary(self.prefs_directory)):
             self.custom_actions[library] = []
 
         # Actions
@@ -60,6 +91,7 @@ class AssetBrowserWindow(QtWidgets.QMainWindow):
         # STD Library Actions
         import_action = QtWidgets.QAction("Import")
         reference_action = QtWidgets.QAction("Reference")
+        reference_instance_action = QtWidgets.QAction("Reference as Instance")
         import_vrayproxy_action = QtWidgets.QAction("Import VRay Proxy")
         import_mesh_action = QtWidgets.QAction("Import as Mesh")
 
@@ -73,17 +105,26 @@ class AssetBrowserWindow(QtWidgets.QMainWindow):
                 {
                     "action_object": import_action,
                     "action_callback": partial(self.import_action_callback),
-                    "action_asset_data_conditions": ["maya_file"]
+                    "action_asset_data_conditions": ["maya_file"],
+                    "action_file_key": "maya_file"
                 },
                 {
                     "action_object": reference_action,
                     "action_callback": partial(self.reference_action_callback),
-                    "action_asset_data_conditions": ["maya_file"]
+                    "action_asset_data_conditions": ["maya_file"],
+                    "action_file_key": "maya_file"
+                },
+                {
+                    "action_object": reference_instance_action,
+                    "action_callback": partial(self.reference_instance_action_callback),
+                    "action_asset_data_conditions": ["maya_file"],
+                    "action_file_key": "maya_file"
                 },
                 {
                     "action_object": import_vrayproxy_action,
                     "action_callback": partial(self.import_vrayproxy_action_callback),
-                    "action_asset_data_conditions": ["vrproxy_maya"]
+                    "action_asset_data_conditions": ["vrproxy_maya"],
+                    "action_file_key": "vrproxy_maya"
                 },
                 {
                     "action_object": import_mesh_action,
@@ -102,7 +143,8 @@ class AssetBrowserWindow(QtWidgets.QMainWindow):
         self.custom_actions["StudioLights"] = [
             {
                 "action_object": create_vray_light_action,
-                "action_callback": partial(self.create_vray_light_action_callback)
+                "action_callback": partial(self.create_vray_light_action_callback),
+                "action_file_key": "asset_path"
             },
         ]
 
@@ -112,7 +154,8 @@ class AssetBrowserWindow(QtWidgets.QMainWindow):
         self.custom_actions["Cucoloris"] = [
             {
                 "action_object": create_vray_gobo_action,
-                "action_callback": partial(self.create_vray_gobo_action_callback)
+                "action_callback": partial(self.create_vray_gobo_action_callback),
+                "action_file_key": "asset_path"
             }
         ]
 
@@ -120,6 +163,7 @@ class AssetBrowserWindow(QtWidgets.QMainWindow):
 
         build_vray_material_action = QtWidgets.QAction("Build VRay Material")
         build_and_assign_vray_material_action = QtWidgets.QAction("Build VRay Material and Assign")
+        build_new_vray_material_action = QtWidgets.QAction("Build New VRay Material")
 
         self.custom_actions["Material"] = [
             {
@@ -129,6 +173,10 @@ class AssetBrowserWindow(QtWidgets.QMainWindow):
             {
                 "action_object": build_and_assign_vray_material_action,
                 "action_callback": partial(self.build_and_assign_vray_material_action_callback)
+            },
+            {
+                "action_object": build_new_vray_material_action,
+                "action_callback": partial(self.build_new_vray_material_action_callback)
             }
         ]
 
@@ -137,7 +185,8 @@ class AssetBrowserWindow(QtWidgets.QMainWindow):
         self.custom_actions["HDR"] = [
             {
                 "action_object": create_vray_light_action,
-                "action_callback": partial(self.create_vray_light_action_callback)
+                "action_callback": partial(self.create_vray_light_action_callback),
+                "action_file_key": "asset_path"
             }
         ]
 
@@ -168,7 +217,37 @@ class AssetBrowserWindow(QtWidgets.QMainWindow):
         main_layout.addWidget(self.asset_browser)
 
     def create_connections(self):
-        pass
+        self.asset_browser.assets_tw.itemSelectionChanged.connect(self.update_action_states)
+
+        self.availability_timer = QtCore.QTimer(self)
+        self.availability_timer.timeout.connect(self.availability.refresh)
+        self.availability_timer.start(AVAILABILITY_REFRESH_INTERVAL)
+
+        self.thumbnail_timer = QtCore.QTimer(self)
+        self.thumbnail_timer.setSingleShot(True)
+        self.thumbnail_timer.setInterval(THUMBNAIL_UPDATE_DELAY)
+        self.thumbnail_timer.timeout.connect(self.update_thumbnails)
+
+        self.library_timer = QtCore.QTimer(self)
+        self.library_timer.setSingleShot(True)
+        self.library_timer.setInterval(LIBRARY_UPDATE_DELAY)
+        self.library_timer.timeout.connect(self.update_library_state)
+
+        assets_tw = self.asset_browser.assets_tw
+        assets_tw.verticalScrollBar().valueChanged.connect(self.schedule_thumbnail_update)
+        assets_tw.model().rowsInserted.connect(self.schedule_thumbnail_update)
+        assets_tw.model().modelReset.connect(self.reset_thumbnails)
+        self.library_loaded.connect(lambda *args: self.library_timer.start())
+
+        # Libraries loaded while the widget was being built
+        if self.loaded_libraries:
+            self.library_timer.start()
+
+        self.thumbnails.thumbnail_ready.connect(self.set_thumbnail)
+        self.thumbnails.thumbnail_evicted.connect(self.clear_thumbnail)
+
+        # Rows whose thumbnail is missing or failed to decode go again, with the next size or the preview
+        self.thumbnails.thumbnail_failed.connect(self.schedule_thumbnail_update)
 
     def create_custom_connections(self):
         connections = []
@@ -179,6 +258,164 @@ class AssetBrowserWindow(QtWidgets.QMainWindow):
         self.create_custom_actions()
         # self.create_custom_connections()
 
+    def resizeEvent(self, event):
+        super(AssetBrowserWindow, self).resizeEvent(event)
+        self.schedule_thumbnail_update()
+
+    def schedule_thumbnail_update(self, *args):
+        # Signal arguments are dropped, QTimer.start(int) would take them as the interval
+        self.thumbnail_timer.start()
+
+    def closeEvent(self, event):
+        library_summary.remove_load_callback(self.record_library_load)
+        super(AssetBrowserWindow, self).closeEvent(event)
+
+    def record_library_load(self, library, library_data):
+        self.loaded_libraries[library] = library_data
+        self.library_loaded.emit(library)
+
+    def update_library_state(self):
+        # Summary and availability are built from the data the browser loaded for the visited libraries,
+        # libraries are never loaded just for them. A visited library without assets is recorded as empty
+        loaded_libraries, self.loaded_libraries = self.loaded_libraries, {}
+
+        if not loaded_libraries:
+            return
+
+        library_summary.update_summary(self.prefs_directory,
+                                       dict((library, library_summary.get_asset_count(library_data))
+                                            for library, library_data in loaded_libraries.items()))
+
+        asset_datas = [asset_data for library_data in loaded_libraries.values() if library_data
+                       for asset_data in (library_data.get("assets") or {}).values()]
+
+        if asset_datas:
+            self.availability.refresh(asset_datas=asset_datas)
+
+    def get_visible_items(self):
+        assets_tw = self.asset_browser.assets_tw
+        viewport_height = assets_tw.viewport().height()
+
+        items = []
+        item = assets_tw.itemAt(0, 0)
+
+        while item is not None and assets_tw.visualItemRect(item).top() < viewport_height:
+            items.append(item)
+            item = assets_tw.itemBelow(item)
+
+        return items
+
+    def get_margin_items(self, visible_items, margin=THUMBNAIL_MARGIN):
+        assets_tw = self.asset_browser.assets_tw
+
+        if not visible_items:
+            return []
+
+        above = []
+        item = assets_tw.itemAbove(visible_items[0])
+
+        while item is not None and len(above) < margin:
+            above.append(item)
+            item = assets_tw.itemAbove(item)
+
+        below = []
+        item = assets_tw.itemBelow(visible_items[-1])
+
+        while item is not None and len(below) < margin:
+            below.append(item)
+            item = assets_tw.itemBelow(item)
+
+        return below + above
+
+    def update_thumbnails(self):
+        # Only rows in view and a margin around them, visible ones are queued first and re-checked for changes
+        visible_items = self.get_visible_items()
+        margin_items = self.get_margin_items(visible_items)
+
+        self.thumbnail_items = {}
+
+        for visible, items in ((True, visible_items), (False, margin_items)):
+            for item in items:
+                asset_data = getattr(item, "asset_data", None)
+                path = thumbnail_loader.get_thumbnail_source(asset_data, exclude=self.thumbnails.failed) \
+                    if asset_data else None
+
+                if not path:
+                    continue
+
+                self.thumbnail_items.setdefault(path, []).append(item)
+
+                pixmap = self.thumbnails.get(path)
+
+                if pixmap is None or visible:
+                    self.thumbnails.request(path, visible=visible)
+
+                if pixmap is not None and getattr(item, "thumbnail_path", None) != path:
+                    self.set_item_icon(item, path, pixmap)
+
+    def set_item_icon(self, item, path, pixmap):
+        item.setIcon(THUMBNAIL_COLUMN, QtGui.QIcon(pixmap))
+        item.thumbnail_path = path
+
+        self.icon_items.setdefault(path, set()).add(item)
+
+    def set_thumbnail(self, path, pixmap):
+        # Items outside the margin that show an older pixmap of the path are updated as well
+        items = set(self.thumbnail_items.get(path, [])) | self.icon_items.get(path, set())
+
+        for item in items:
+            try:
+                self.set_item_icon(item, path, pixmap)
+            except RuntimeError:
+                # Removed from the tree since
+                self.icon_items.get(path, set()).discard(item)
+
+    def clear_thumbnail(self, path):
+        for item in self.icon_items.pop(path, ()):
+            try:
+                if getattr(item, "thumbnail_path", None) == path:
+                    item.setIcon(THUMBNAIL_COLUMN, QtGui.QIcon())
+                    item.thumbnail_path = None
+            except RuntimeError:
+                pass
+
+        # Evicted rows still in view are requested again
+        if path in self.thumbnail_items:
+            self.schedule_thumbnail_update()
+
+    def reset_thumbnails(self):
+        self.thumbnail_items = {}
+        self.icon_items = {}
+
+        # Thumbnails missing last time may have been generated since, a reloaded library tries them again
+        self.thumbnails.failed.clear()
+
+        self.schedule_thumbnail_update()
+
+    def update_action_states(self):
+        # Index lookups only, files the background thread has not reached yet count as available
+        items = self.asset_browser.assets_tw.selectedItems()
+
+        if not items:
+            return
+
+        for action_data in self.custom_actions.get(items[0].library, []):
+            file_key = action_data.get("action_file_key")
+
+            if not file_key:
+                continue
+
+            enabled = False
+
+            for item in items:
+                path = item.asset_data.get(file_key)
+
+                if path and self.availability.is_available(path) is not False:
+                    enabled = True
+                    break
+
+            action_data["action_object"].setEnabled(enabled)
+
     def import_action_callback(self):
         items = self.asset_browser.assets_tw.selectedItems()
 
@@ -188,14 +425,16 @@ class AssetBrowserWindow(QtWidgets.QMainWindow):
         current_library = items[0].library
 
         if current_library in lm.STD_LIBRARIES:
-            for item in items:
-                if item.asset_data["maya_file"]:
-                    if not os.path.isfile(item.asset_data["maya_file"]):
-                        continue
-
-                    cmds.file(item.asset_data["maya_file"], i=True)
+            asset_import.import_assets([item.asset_data["maya_file"] for item in items
+                                        if self.availability.check(item.asset_data["maya_file"])])
 
     def reference_action_callback(self):
+        self.reference_selected_assets(reuse=False)
+
+    def reference_instance_action_callback(self):
+        self.reference_selected_assets(reuse=True)
+
+    def reference_selected_assets(self, reuse=False):
         items = self.asset_browser.assets_tw.selectedItems()
 
         if not items:
@@ -204,12 +443,8 @@ class AssetBrowserWindow(QtWidgets.QMainWindow):
         current_library = items[0].library
 
         if current_library in lm.STD_LIBRARIES:
-            for item in items:
-                if item.asset_data["maya_file"]:
-                    if not os.path.isfile(item.asset_data["maya_file"]):
-                        continue
-
-                    cmds.file(item.asset_data["maya_file"], r=True)
+            asset_import.reference_assets([item.asset_data["maya_file"] for item in items
+                                           if self.availability.check(item.asset_data["maya_file"])], reuse=reuse)
 
     def import_vrayproxy_action_callback(self):
         items = self.asset_browser.assets_tw.selectedItems()
@@ -220,12 +455,8 @@ class AssetBrowserWindow(QtWidgets.QMainWindow):
         current_library = items[0].library
 
         if current_library in lm.STD_LIBRARIES:
-            for item in items:
-                if item.asset_data["vrproxy_maya"]:
-                    if not os.path.isfile(item.asset_data["vrproxy_maya"]):
-                        continue
-
-                    cmds.file(item.asset_data["vrproxy_maya"], i=True)
+            asset_import.import_assets([item.asset_data["vrproxy_maya"] for item in items
+                                        if self.availability.check(item.asset_data["vrproxy_maya"])])
 
     def create_vray_light_action_callback(self):
         items = self.asset_browser.assets_tw.selectedItems()
@@ -235,7 +466,7 @@ class AssetBrowserWindow(QtWidgets.QMainWindow):
 
         for item in items:
             if item.asset_data["asset_path"]:
-                if not os.path.isfile(item.asset_data["asset_path"]):
+                if not self.availability.check(item.asset_data["asset_path"]):
                     continue
 
                 if item.asset_data["asset_type"] == "StudioLights":
@@ -253,22 +484,25 @@ class AssetBrowserWindow(QtWidgets.QMainWindow):
 
         for item in items:
             if item.asset_data["asset_path"]:
-                if not os.path.isfile(item.asset_data["asset_path"]):
+                if not self.availability.check(item.asset_data["asset_path"]):
                     continue
 
                 vray_lighting.create_gobo(name=item.asset_data["asset_name"], texture=item.asset_data["asset_path"])
 
     def build_vray_material_action_callback(self):
+        self.build_selected_materials(force_new=False)
+
+    def build_new_vray_material_action_callback(self):
+        self.build_selected_materials(force_new=True)
+
+    def build_selected_materials(self, force_new=False):
         items = self.asset_browser.assets_tw.selectedItems()
 
         if not items:
             return
 
-        for item in items:
-            if not item.asset_data["materials"]:
-                continue
-
-            mtls = MaterialBuilder.build_material(item.asset_data["materials"][0])
+        material_cache.build_materials([item.asset_data["materials"][0] for item in items
+                                        if item.asset_data["materials"]], force_new=force_new)
 
     def build_and_assign_vray_material_action_callback(self):
         items = self.asset_browser.assets_tw.selectedItems()
@@ -282,7 +516,7 @@ class AssetBrowserWindow(QtWidgets.QMainWindow):
             if not item.asset_data["materials"]:
                 continue
 
-            mtls = MaterialBuilder.build_material(item.asset_data["materials"][0])
+            mtls = material_cache.build_material(item.asset_data["materials"][0])
 
             if not selection:
                 return
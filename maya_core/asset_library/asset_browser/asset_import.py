@@ -0,0 +1,147 @@
+import os
+import time
+import logging
+
+import maya.cmds as cmds
+
+from maya_core.common_utils import profiling
+from maya_core.common_utils import common_utils as cu
+from maya_core.asset_library.asset_browser import reference_index
+
+logger = logging.getLogger(__name__)
+logger.setLevel(10)
+
+# How reused references are placed again
+INSTANCE = "instance"
+DUPLICATE = "duplicate"
+
+
+def unique_paths(asset_paths):
+    seen = set()
+    paths = []
+
+    for asset_path in asset_paths:
+        if not asset_path:
+            continue
+
+        key = os.path.normcase(os.path.normpath(asset_path))
+
+        if key in seen:
+            continue
+
+        seen.add(key)
+        paths.append(asset_path)
+
+    return paths
+
+
+@profiling.profiled()
+def import_assets(asset_paths, **file_flags):
+    report = {
+        "loaded": {},
+        "failed": {},
+        "elapsed": 0.0
+    }
+
+    asset_paths = [p for p in asset_paths if p]
+    paths = unique_paths(asset_paths)
+
+    if not paths:
+        return report
+
+    start = time.perf_counter()
+
+    with cu.batch_scene_edit("import_assets"):
+        for asset_path in paths:
+            file_start = time.perf_counter()
+
+            try:
+                with profiling.span("import_asset", path=asset_path):
+                    cmds.file(asset_path, i=True, **file_flags)
+            except RuntimeError as e:
+                report["failed"][asset_path] = str(e)
+                logger.error("Could not import %s: %s", asset_path, e)
+                continue
+
+            report["loaded"][asset_path] = time.perf_counter() - file_start
+
+    report["elapsed"] = time.perf_counter() - start
+
+    for asset_path, seconds in report["loaded"].items():
+        logger.debug("%6.2fs %s", seconds, os.path.basename(asset_path))
+
+    logger.info("Imported %s assets in %.2fs (%s failed, %s duplicates skipped)", len(report["loaded"]),
+                report["elapsed"], len(report["failed"]), len(asset_paths) - len(paths))
+
+    return report
+
+
+def get_world_nodes(ref_node):
+    nodes = cmds.referenceQuery(ref_node, nodes=True, dagPath=True) or []
+
+    return cmds.ls(nodes, assemblies=True, long=True) or []
+
+
+def _place_copies(world_nodes, mode):
+    if mode == INSTANCE:
+        return [cmds.instance(node)[0] for node in world_nodes]
+
+    return [cmds.duplicate(node)[0] for node in world_nodes]
+
+
+@profiling.profiled()
+def reference_assets(asset_paths, reuse=False, mode=INSTANCE, **file_flags):
+    # With reuse, a file that is already referenced is placed again as an instance (or duplicate) of its world
+    # nodes instead of being read and parsed a second time
+    report = {
+        "referenced": {},
+        "reused": {},
+        "failed": {},
+        "elapsed": 0.0
+    }
+
+    asset_paths = [p for p in asset_paths if p]
+
+    if not asset_paths:
+        return report
+
+    index = reference_index.get_index()
+    start = time.perf_counter()
+
+    with cu.batch_scene_edit("reference_assets"), index.tracking():
+        for asset_path in asset_paths:
+            file_start = time.perf_counter()
+            ref_node = index.get_reference_node(asset_path) if reuse else None
+
+            if ref_node:
+                world_nodes = get_world_nodes(ref_node)
+
+                if world_nodes:
+                    with profiling.span("reuse_reference", path=asset_path):
+                        _place_copies(world_nodes, mode)
+
+                    report["reused"].setdefault(asset_path, []).append(time.perf_counter() - file_start)
+                    continue
+
+            try:
+                with profiling.span("reference_asset", path=asset_path):
+                    ref_path = cmds.file(asset_path, r=True, **file_flags)
+            except RuntimeError as e:
+                report["failed"][asset_path] = str(e)
+                logger.error("Could not reference %s: %s", asset_path, e)
+
+                # A failed reference can still leave a reference node behind
+                index.invalidate()
+                continue
+
+            index.add(asset_path, cmds.referenceQuery(ref_path, referenceNode=True))
+
+            report["referenced"].setdefault(asset_path, []).append(time.perf_counter() - file_start)
+
+    report["elapsed"] = time.perf_counter() - start
+
+    logger.info("Placed %s assets in %.2fs, %s new references, %s reused (%s failed)", len(asset_paths),
+                report["elapsed"], sum(len(t) for t in report["referenced"].values()),
+                sum(len(t) for t in report["reused"].values()), len(report["failed"]))
+
+    return report
@@ -0,0 +1,348 @@
+import sys
+import json
+import socket
+import inspect
+import logging
+import threading
+import socketserver
+
+logger = logging.getLogger(__name__)
+logger.setLevel(10)
+
+# JSON-RPC 2.0 over TCP, one JSON document per line
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 20222
+
+BATCH_METHOD = "batch"
+LIST_METHOD = "list_methods"
+
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+INTERNAL_ERROR = -32603
+COMMAND_ERROR = -32000
+
+
+class CommandError(Exception):
+    def __init__(self, code, message, data=None):
+        super(CommandError, self).__init__("{} ({})".format(message, code))
+        self.code = code
+        self.message = message
+        self.data = data
+
+
+def _error(request_id, code, message, data=None):
+    error = {"code": code, "message": message}
+
+    if data is not None:
+        error["data"] = data
+
+    return {"jsonrpc": "2.0", "id": request_id, "error": error}
+
+
+def _result(request_id, result):
+    return {"jsonrpc": "2.0", "id": request_id, "result": result}
+
+
+def _encode(message):
+    # Command results may hold node objects, those go over the wire by name
+    return (json.dumps(message, default=str) + "\n").encode("utf-8")
+
+
+class DirectExecutor(object):
+    # Runs calls inline on the server thread, the stand-in for tests and for mayapy sessions
+    def execute(self, calls, label=None):
+        return [run_call(func, args, kwargs) for func, args, kwargs in calls]
+
+
+def run_call(func, args, kwargs):
+    # (True, result) or (False, exception), executors run each bound call through it
+    try:
+        return True, func(*args, **kwargs)
+    except Exception as e:
+        logger.exception("Command %s failed", getattr(func, "__name__", func))
+        return False, e
+
+
+class CommandDispatcher(object):
+    def __init__(self, commands, executor=None):
+        self.commands = dict(commands)
+        self.executor = executor or DirectExecutor()
+
+    def _bind(self, request):
+        # Returns (request_id, call) or (request_id, error response)
+        if not isinstance(request, dict) or request.get("jsonrpc") != "2.0" or \
+                not isinstance(request.get("method"), str):
+            return None, _error(request.get("id") if isinstance(request, dict) else None, INVALID_REQUEST,
+                                "Invalid request")
+
+        request_id = request.get("id")
+        method = request["method"]
+        params = request.get("params", [])
+
+        if method not in self.commands:
+            return request_id, _error(request_id, METHOD_NOT_FOUND, "Method not found: {}".format(method))
+
+        if isinstance(params, list):
+            args, kwargs = params, {}
+        elif isinstance(params, dict):
+            args, kwargs = [], params
+        else:
+            return request_id, _error(request_id, INVALID_PARAMS, "params must be a list or an object")
+
+        func = self.commands[method]
+
+        # Checked against the signature up front, a TypeError raised while the command runs is a command error
+        try:
+            inspect.signature(func).bind(*args, **kwargs)
+        except TypeError as e:
+            return request_id, _error(request_id, INVALID_PARAMS, str(e))
+        except ValueError:
+            pass
+
+        return request_id, (func, args, kwargs)
+
+    def dispatch(self, requests, label=None):
+        # All bound calls of one message go to the executor together, as one deferred, undo-grouped execution
+        responses = [None] * len(requests)
+        calls = []
+        call_slots = []
+
+        for i, request in enumerate(requests):
+            if isinstance(request, dict) and request.get("method") == LIST_METHOD:
+                responses[i] = _result(request.get("id"), sorted(self.commands))
+                continue
+
+            request_id, bound = self._bind(request)
+
+            if isinstance(bound, dict):
+                responses[i] = bound
+                continue
+
+            calls.append(bound)
+            call_slots.append((i, request_id))
+
+        if calls:
+            try:
+                outcomes = self.executor.execute(calls, label=label)
+            except Exception as e:
+                logger.exception("Command execution failed")
+                outcomes = [(False, e)] * len(calls)
+
+            for (i, request_id), (ok, value) in zip(call_slots, outcomes):
+                if ok:
+                    responses[i] = _result(request_id, value)
+                else:
+                    responses[i] = _error(request_id, COMMAND_ERROR, str(value), type(value).__name__)
+
+        # Notifications (no id) get no response
+        return [response for response, request in zip(responses, requests)
+                if not (isinstance(request, dict) and "id" not in request)]
+
+    def handle_message(self, data):
+        try:
+            message = json.loads(data)
+        except ValueError as e:
+            return _error(None, PARSE_ERROR, "Parse error: {}".format(e))
+
+        # A JSON-RPC batch array, or the batch method wrapping one, runs as a single execution
+        if isinstance(message, list):
+            if not message:
+                return _error(None, INVALID_REQUEST, "Empty batch")
+
+            return self.dispatch(message, label=BATCH_METHOD) or None
+
+        if isinstance(message, dict) and message.get("method") == BATCH_METHOD:
+            params = message.get("params") or {}
+            requests = params.get("commands") if isinstance(params, dict) else params
+
+            if not isinstance(requests, list):
+                return _error(message.get("id"), INVALID_PARAMS, "batch expects a list of commands")
+
+            requests = [dict({"jsonrpc": "2.0", "id": i}, **r) if isinstance(r, dict) else r
+                        for i, r in enumerate(requests)]
+
+            return _result(message.get("id"), self.dispatch(requests, label=BATCH_METHOD))
+
+        responses = self.dispatch([message], label=message.get("method") if isinstance(message, dict) else None)
+
+        return responses[0] if responses else None
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for line in self.rfile:
+            line = line.strip()
+
+            if not line:
+                continue
+
+            try:
+                response = self.server.dispatcher.handle_message(line.decode("utf-8"))
+            except UnicodeDecodeError as e:
+                response = _error(None, PARSE_ERROR, "Parse error: {}".format(e))
+
+            if response is not None:
+                self.wfile.write(_encode(response))
+                self.wfile.flush()
+
+
+class _ThreadingServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    daemon_threads = True
+
+    # SO_REUSEADDR on Windows lets a second Maya bind the same port, commands would land in either session
+    allow_reuse_address = sys.platform != "win32"
+
+
+class CommandServer(object):
+    def __init__(self, commands, executor=None, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        self.dispatcher = CommandDispatcher(commands, executor)
+        self.host = host
+        self.port = port
+
+        self._server = None
+        self._thread = None
+
+    @property
+    def address(self):
+        return self._server.server_address if self._server else (self.host, self.port)
+
+    def start(self):
+        if self._server is not None:
+            return self
+
+        self._server = _ThreadingServer((self.host, self.port), _RequestHandler)
+        self._server.dispatcher = self.dispatcher
+
+        self._thread = threading.Thread(target=self._server.serve_forever, name="CommandServer")
+        self._thread.daemon = True
+        self._thread.start()
+
+        logger.info("Command server listening on %s:%s", *self.address)
+
+        return self
+
+    def stop(self):
+        if self._server is None:
+            return
+
+        self._server.shutdown()
+        self._server.server_close()
+        self._server = None
+        self._thread = None
+
+
+class CommandClient(object):
+    def __init__(self, host=DEFAULT_HOST, port=DEFAULT_PORT, timeout=600):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+
+        self._socket = None
+        self._file = None
+        self._next_id = 0
+
+    def connect(self):
+        if self._socket is None:
+            self._socket = socket.create_connection((self.host, self.port), timeout=self.timeout)
+            self._file = self._socket.makefile("rb")
+
+        return self
+
+    def close(self):
+        if self._socket is not None:
+            self._file.close()
+            self._socket.close()
+            self._socket = None
+            self._file = None
+
+    def __enter__(self):
+        return self.connect()
+
+    def __exit__(self, *args):
+        self.close()
+        return False
+
+    def _new_id(self):
+        self._next_id += 1
+        return self._next_id
+
+    def _send(self, message):
+        self.connect()
+        self._socket.sendall(_encode(message))
+
+        line = self._file.readline()
+
+        if not line:
+            self.close()
+            raise ConnectionError("Command server closed the connection")
+
+        return json.loads(line.decode("utf-8"))
+
+    @staticmethod
+    def _unwrap(response):
+        if "error" in response:
+            error = response["error"]
+            raise CommandError(error["code"], error["message"], error.get("data"))
+
+        return response["result"]
+
+    def call(self, method, *args, **kwargs):
+        if args and kwargs:
+            raise ValueError("Use either positional or keyword arguments")
+
+        request = {"jsonrpc": "2.0", "id": self._new_id(), "method": method, "params": kwargs or list(args)}
+
+        return self._unwrap(self._send(request))
+
+    def batch(self):
+        return CommandBatch(self)
+
+    def list_methods(self):
+        return self.call(LIST_METHOD)
+
+
+class CommandBatch(object):
+    # Collects calls and sends them as one JSON-RPC batch, executed together in a single undo chunk
+    def __init__(self, client):
+        self.client = client
+        self.requests = []
+        self.results = None
+
+    def add(self, method, *args, **kwargs):
+        if args and kwargs:
+            raise ValueError("Use either positional or keyword arguments")
+
+        self.requests.append({"jsonrpc": "2.0", "id": self.client._new_id(), "method": method,
+                              "params": kwargs or list(args)})
+        return self
+
+    def send(self, raise_errors=True):
+        if not self.requests:
+            self.results = []
+            return self.results
+
+        responses = dict((r.get("id"), r) for r in self.client._send(self.requests))
+        self.results = []
+
+        for request in self.requests:
+            response = responses[request["id"]]
+
+            if raise_errors:
+                self.results.append(self.client._unwrap(response))
+            elif "error" in response:
+                error = response["error"]
+                self.results.append(CommandError(error["code"], error["message"], error.get("data")))
+            else:
+                self.results.append(response["result"])
+
+        return self.results
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *args):
+        if exc_type is None:
+            self.send()
+        return False
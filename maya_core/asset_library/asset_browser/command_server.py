@@ -0,0 +1,55 @@
+import logging
+
+import maya.utils
+
+from maya_core.common_utils import common_utils as cu
+from maya_core.asset_library.asset_browser import asset_import
+from maya_core.asset_library.asset_browser import command_rpc
+from maya_core.asset_library.asset_browser import asset_browser_commands_standalone as commands
+
+logger = logging.getLogger(__name__)
+logger.setLevel(10)
+
+COMMANDS = {
+    "import_model_asset": commands.import_model_asset,
+    "import_model_assets": commands.import_model_assets,
+    "import_hdr_asset": commands.import_hdr_asset,
+    "import_studiolights_asset": commands.import_studiolights_asset,
+    "import_cucoloris_asset": commands.import_cucoloris_asset,
+    "import_material_asset": commands.import_material_asset,
+    "import_assign_material_asset": commands.import_assign_material_asset,
+    "reference_assets": asset_import.reference_assets
+}
+
+
+class MayaExecutor(object):
+    # Server threads hand each message's calls to the main thread as one deferred job inside one undo chunk
+    def execute(self, calls, label=None):
+        return maya.utils.executeInMainThreadWithResult(self._execute, calls, label)
+
+    @staticmethod
+    def _execute(calls, label):
+        with cu.batch_scene_edit("command_server_{}".format(label or "call")):
+            return [command_rpc.run_call(func, args, kwargs) for func, args, kwargs in calls]
+
+
+_server = None
+
+
+def start_server(host=command_rpc.DEFAULT_HOST, port=command_rpc.DEFAULT_PORT, executor=None):
+    global _server
+
+    if _server is None:
+        # Only kept once it is listening, a failed start can be retried
+        _server = command_rpc.CommandServer(COMMANDS, executor=executor or MayaExecutor(), host=host,
+                                            port=port).start()
+
+    return _server
+
+
+def stop_server():
+    global _server
+
+    if _server is not None:
+        _server.stop()
+        _server = None
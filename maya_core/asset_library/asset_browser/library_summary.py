@@ -0,0 +1,111 @@
+import os
+import json
+import time
+import logging
+import functools
+
+from tools_core.asset_library import library_manager as lm
+
+logger = logging.getLogger(__name__)
+logger.setLevel(10)
+
+SUMMARY_NAME = "asset_browser_library_summary.json"
+
+# Called with (library, library_data) for every library loaded through lm.get_library_data
+_load_callbacks = []
+
+
+def get_summary_path(prefs_directory):
+    return os.path.join(prefs_directory, SUMMARY_NAME)
+
+
+def load_summary(prefs_directory):
+    summary_path = get_summary_path(prefs_directory)
+
+    if not os.path.isfile(summary_path):
+        return {}
+
+    try:
+        with open(summary_path, "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_summary(prefs_directory, summary):
+    summary_path = get_summary_path(prefs_directory)
+    tmp_path = summary_path + ".tmp"
+
+    with open(tmp_path, "w") as f:
+        json.dump(summary, f, indent=4)
+
+    os.replace(tmp_path, summary_path)
+
+
+def get_startup_libraries(summary):
+    # Libraries never summarised yet are kept, an action on an empty library is harmless, a missing one is not
+    return [library for library in lm.LIBRARIES.keys() if summary.get(library, {}).get("non_empty", True)]
+
+
+def update_summary(prefs_directory, asset_counts):
+    # asset_counts: library -> number of assets the browser loaded for it. Written only when something changed
+    summary = load_summary(prefs_directory)
+    changed = False
+
+    for library, asset_count in asset_counts.items():
+        entry = summary.get(library, {})
+
+        if entry.get("asset_count") == asset_count and entry.get("non_empty") == bool(asset_count):
+            continue
+
+        summary[library] = {
+            "non_empty": bool(asset_count),
+            "asset_count": asset_count,
+            "updated": time.time()
+        }
+        changed = True
+
+    if changed:
+        try:
+            save_summary(prefs_directory, summary)
+        except OSError as e:
+            logger.warning("Could not write library summary: %s", e)
+
+    return summary
+
+
+def get_asset_count(library_data):
+    # A library that loaded no data was still visited, it is recorded as empty
+    return len(library_data.get("assets") or {}) if library_data else 0
+
+
+def _report_loads(get_library_data):
+    @functools.wraps(get_library_data)
+    def wrapper(library, *args, **kwargs):
+        library_data = get_library_data(library, *args, **kwargs)
+
+        for callback in list(_load_callbacks):
+            try:
+                callback(library, library_data)
+            except Exception:
+                logger.exception("Library load callback failed for %s", library)
+
+        return library_data
+
+    wrapper.reports_loads = True
+
+    return wrapper
+
+
+def add_load_callback(callback):
+    # lm.get_library_data is wrapped in place, the browser widget loads libraries through it unchanged
+    if not getattr(lm.get_library_data, "reports_loads", False):
+        lm.get_library_data = _report_loads(lm.get_library_data)
+
+    if callback not in _load_callbacks:
+        _load_callbacks.append(callback)
+
+
+def remove_load_callback(callback):
+    if callback in _load_callbacks:
+        _load_callbacks.remove(callback)
@@ -0,0 +1,107 @@
+import os
+import logging
+from contextlib import contextmanager
+
+import maya.cmds as cmds
+import maya.api.OpenMaya as om
+
+from maya_core.common_utils import scene_index
+
+logger = logging.getLogger(__name__)
+logger.setLevel(10)
+
+# Scene events after which the index is rebuilt on the next lookup
+DIRTY_MESSAGES = [
+    om.MSceneMessage.kAfterNew,
+    om.MSceneMessage.kAfterOpen,
+    om.MSceneMessage.kAfterImport,
+    om.MSceneMessage.kAfterCreateReference,
+    om.MSceneMessage.kAfterRemoveReference,
+    om.MSceneMessage.kAfterLoadReference,
+    om.MSceneMessage.kAfterUnloadReference
+]
+
+# Events caused by references the index is told about through add(), ignored inside tracking()
+TRACKED_MESSAGES = [
+    om.MSceneMessage.kAfterCreateReference,
+    om.MSceneMessage.kAfterLoadReference
+]
+
+
+def get_path_key(path):
+    return os.path.normcase(os.path.normpath(path))
+
+
+class ReferenceIndex(scene_index.SceneIndex):
+    dirty_messages = DIRTY_MESSAGES
+
+    def __init__(self):
+        super(ReferenceIndex, self).__init__()
+
+        # path key -> [reference nodes], oldest first
+        self._references = {}
+        self._tracking = False
+
+    def _mark_dirty(self, message=None):
+        if self._tracking and message in TRACKED_MESSAGES:
+            return
+
+        self._dirty = True
+
+    @contextmanager
+    def tracking(self):
+        # References created inside the block are added by the caller, they don't cost a full rebuild each
+        if self._dirty:
+            self.rebuild()
+
+        self._tracking = True
+
+        try:
+            yield self
+        finally:
+            self._tracking = False
+
+    def rebuild(self):
+        self._references = {}
+
+        for ref_path in cmds.file(query=True, reference=True) or []:
+            try:
+                ref_node = cmds.referenceQuery(ref_path, referenceNode=True)
+            except RuntimeError:
+                continue
+
+            path = cmds.referenceQuery(ref_node, filename=True, withoutCopyNumber=True)
+            self._references.setdefault(get_path_key(path), []).append(ref_node)
+
+        self._dirty = False
+
+        logger.debug("Reference index rebuilt, %s referenced files", len(self._references))
+
+    def add(self, path, ref_node):
+        # Keeps the index current for references created by the caller without a rebuild
+        if self._dirty:
+            self.rebuild()
+            return
+
+        ref_nodes = self._references.setdefault(get_path_key(path), [])
+
+        if ref_node not in ref_nodes:
+            ref_nodes.append(ref_node)
+
+    def get_reference_node(self, path, loaded_only=True):
+        if self._dirty:
+            self.rebuild()
+
+        for ref_node in self._references.get(get_path_key(path), []):
+            if not cmds.objExists(ref_node):
+                continue
+
+            if loaded_only and not cmds.referenceQuery(ref_node, isLoaded=True):
+                continue
+
+            return ref_node
+
+        return None
+
+
+get_index = scene_index.singleton(ReferenceIndex)
@@ -0,0 +1,180 @@
+import os
+import logging
+from collections import OrderedDict
+
+from PySide2 import QtCore
+from PySide2 import QtGui
+
+from maya_core.asset_library import asset_thumbnails
+
+logger = logging.getLogger(__name__)
+logger.setLevel(10)
+
+THUMBNAIL_SIZE = 256
+
+CACHE_SIZE = 2000
+
+MAX_THREADS = max(2, QtCore.QThread.idealThreadCount() - 2)
+
+VISIBLE_PRIORITY = 10
+BACKGROUND_PRIORITY = 0
+
+
+def get_thumbnail_source(asset_data, size=THUMBNAIL_SIZE, exclude=()):
+    # Prefer the pre-scaled thumbnails written on publish, fall back to the full preview. Called on the UI thread,
+    # nothing is stat'ed here: the publish records thumbnail paths before they are generated, a missing one fails in
+    # ThumbnailJob and the next pass skips it through exclude (the loader's failed set)
+    thumbnails = asset_data.get("asset_thumbnails") or {}
+
+    for thumbnail_size in sorted(asset_thumbnails.THUMBNAIL_SIZES):
+        path = thumbnails.get(str(thumbnail_size))
+
+        if thumbnail_size >= size and path and path not in exclude:
+            return path
+
+    return asset_data.get("asset_preview")
+
+
+class ThumbnailSignals(QtCore.QObject):
+    decoded = QtCore.Signal(str, float, QtGui.QImage)
+    unchanged = QtCore.Signal(str)
+    failed = QtCore.Signal(str)
+
+
+class ThumbnailJob(QtCore.QRunnable):
+    def __init__(self, path, size, known_mtime, signals):
+        super(ThumbnailJob, self).__init__()
+        self.path = path
+        self.size = size
+        self.known_mtime = known_mtime
+        self.signals = signals
+
+    def run(self):
+        try:
+            mtime = os.stat(self.path).st_mtime
+        except OSError:
+            self.signals.failed.emit(self.path)
+            return
+
+        if mtime == self.known_mtime:
+            self.signals.unchanged.emit(self.path)
+            return
+
+        reader = QtGui.QImageReader(self.path)
+
+        # Lets JPEG and other plugins decode straight at the reduced size
+        source_size = reader.size()
+        if source_size.isValid():
+            reader.setScaledSize(source_size.scaled(self.size, self.size, QtCore.Qt.KeepAspectRatio))
+
+        image = reader.read()
+
+        if image.isNull():
+            self.signals.failed.emit(self.path)
+            return
+
+        # QImage is safe to hand across threads, the QPixmap is made on the UI thread
+        self.signals.decoded.emit(self.path, mtime, image)
+
+
+class ThumbnailLoader(QtCore.QObject):
+    thumbnail_ready = QtCore.Signal(str, QtGui.QPixmap)
+    thumbnail_failed = QtCore.Signal(str)
+    thumbnail_evicted = QtCore.Signal(str)
+
+    def __init__(self, size=THUMBNAIL_SIZE, cache_size=CACHE_SIZE, max_threads=MAX_THREADS, parent=None):
+        super(ThumbnailLoader, self).__init__(parent)
+
+        self.size = size
+        self.cache_size = cache_size
+
+        self.pool = QtCore.QThreadPool(self)
+        self.pool.setMaxThreadCount(max_threads)
+
+        # (path, mtime) -> QPixmap, most recently used last
+        self._cache = OrderedDict()
+        self._mtimes = {}
+        self._queued = {}
+
+        # Paths that could not be read or decoded, not requested again until clear()
+        self.failed = set()
+
+        self.signals = ThumbnailSignals()
+        self.signals.decoded.connect(self._on_decoded)
+        self.signals.unchanged.connect(self._on_finished)
+        self.signals.failed.connect(self._on_failed)
+
+    def get(self, path):
+        key = (path, self._mtimes.get(path))
+
+        if key not in self._cache:
+            return None
+
+        self._cache.move_to_end(key)
+
+        return self._cache[key]
+
+    def request(self, path, visible=False):
+        # Cached pixmaps are still re-validated against the file mtime in the background
+        if not path or path in self.failed:
+            return
+
+        priority = VISIBLE_PRIORITY if visible else BACKGROUND_PRIORITY
+
+        if path in self._queued:
+            job, job_priority = self._queued[path]
+
+            # Jobs not started yet are moved up when their row scrolls into view
+            if priority <= job_priority or not self.pool.tryTake(job):
+                return
+
+        job = ThumbnailJob(path, self.size, self._mtimes.get(path), self.signals)
+        job.setAutoDelete(False)
+
+        self._queued[path] = (job, priority)
+        self.pool.start(job, priority)
+
+    def clear(self):
+        self.pool.clear()
+        self._queued.clear()
+        self._cache.clear()
+        self._mtimes.clear()
+        self.failed.clear()
+
+    def _on_decoded(self, path, mtime, image):
+        self._queued.pop(path, None)
+
+        old_mtime = self._mtimes.get(path)
+        self._cache.pop((path, old_mtime), None)
+
+        pixmap = QtGui.QPixmap.fromImage(image)
+
+        self._mtimes[path] = mtime
+        self._cache[(path, mtime)] = pixmap
+
+        evicted = []
+
+        while len(self._cache) > self.cache_size:
+            (evicted_path, evicted_mtime), _ = self._cache.popitem(last=False)
+
+            if self._mtimes.get(evicted_path) == evicted_mtime:
+                del self._mtimes[evicted_path]
+
+            evicted.append(evicted_path)
+
+        self.thumbnail_ready.emit(path, pixmap)
+
+        # Views drop their icons too, otherwise the pixmaps outlive the cache
+        for evicted_path in evicted:
+            self.thumbnail_evicted.emit(evicted_path)
+
+    def _on_finished(self, path):
+        self._queued.pop(path, None)
+
+    def _on_failed(self, path):
+        self._queued.pop(path, None)
+        self.failed.add(path)
+
+        logger.debug("Could not load thumbnail %s", path)
+
+        self.thumbnail_failed.emit(path)
@@ -51,6 +51,9 @@ class AssetPublisherUI(QtWidgets.QMainWindow):
 
         self.preview_fb = cw.FileBrowseWidget("Preview")
 
+        self.incremental_cb = QtWidgets.QCheckBox("Incremental")
+
+        self.plan_btn = QtWidgets.QPushButton("Dry Run")
         self.build_btn = QtWidgets.QPushButton("Build")
 
     def create_layout(self):
@@ -80,15 +83,22 @@ class AssetPublisherUI(QtWidgets.QMainWindow):
         btn_layout = QtWidgets.QHBoxLayout()
 
         btn_layout.addStretch()
+        btn_layout.addWidget(self.incremental_cb)
+        btn_layout.addWidget(self.plan_btn)
         btn_layout.addWidget(self.build_btn)
 
         main_layout.addLayout(btn_layout)
 
     def create_connections(self):
         self.asset_name_lble.le_widget.textChanged.connect(self.asset_name_check)
+        self.incremental_cb.toggled.connect(self.asset_name_check)
+        self.plan_btn.clicked.connect(self.plan_btn_callback)
         self.build_btn.clicked.connect(self.build_btn_callback)
 
-    def build_btn_callback(self):
+    def plan_btn_callback(self):
+        self.build_btn_callback(dry_run=True)
+
+    def build_btn_callback(self, dry_run=False):
         selection = pm.ls(sl=1)
 
         if not selection or not self.asset_name_lble.text():
@@ -110,11 +120,17 @@ class AssetPublisherUI(QtWidgets.QMainWindow):
 
         asset_publish.publish_from_selection(asset_name=self.asset_name_lble.text(), source_node=source_node,
                                              library=self.library_cmbx.currentText(), tags=tags,
-                                             preview_source=preview_source)
+                                             preview_source=preview_source,
+                                             incremental=self.incremental_cb.isChecked(), dry_run=dry_run)
 
         self.asset_name_check()
 
     def asset_name_check(self):
+        # Incremental publishes are republishes, an existing name is expected
+        if self.incremental_cb.isChecked():
+            self.asset_name_lble.le_widget.setStyleSheet("")
+            self.build_btn.setEnabled(True)
+            return
 
         if self.asset_name_lble.le_widget.text().lower() in [a.lower() for a in
                                                       lm.get_library_data(self.library_cmbx.currentText())[
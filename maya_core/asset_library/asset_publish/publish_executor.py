@@ -0,0 +1,255 @@
+import os
+import logging
+
+import maya.cmds as cmds
+import pymel.core as pm
+
+from maya_core.asset_library import asset_thumbnails
+from maya_core.asset_library import asset_search
+from maya_core.pipeline.lookdev import lookdev_utils
+from maya_core.common_utils import common_utils as cu
+from maya_core.common_utils import profiling
+from maya_core.asset_library.asset_publish import publish_plan
+from maya_core.asset_library.asset_publish import publish_fingerprint as fp
+from maya_core.asset_library.asset_publish import texture_collector
+from maya_core.asset_library.asset_publish import texture_store
+from maya_core.asset_library.asset_publish import texture_converter
+from maya_core.asset_library.asset_publish import texture_proxies
+
+logger = logging.getLogger(__name__)
+logger.setLevel(10)
+
+
+@profiling.profiled()
+def describe_scene(asset_name, part_nodes, fingerprints=False):
+    scene = publish_plan.new_scene_description(asset_name)
+
+    scene["world_node_exists"] = bool(cmds.objExists(asset_name) and
+                                      cmds.attributeQuery("mayaAsset", node=asset_name, exists=True))
+
+    seen_materials = set()
+
+    for node in part_nodes:
+        scene["parts"].append({
+            "node": str(node),
+            "parent": (cmds.listRelatives(str(node), parent=True, fullPath=True) or [None])[0],
+            "mesh_hash": fp.hash_mesh(node) if fingerprints else None,
+            "proxy_exists": cmds.objExists(str(node) + "_vrproxy")
+        })
+
+        for mtl in lookdev_utils.get_materials_from_node(node):
+            if str(mtl) in seen_materials:
+                continue
+
+            seen_materials.add(str(mtl))
+
+            file_nodes = []
+
+            for file_node in cu.filter_connected_nodes(mtl, "file"):
+                tex_path = file_node.fileTextureName.get()
+
+                file_nodes.append({
+                    "node": str(file_node),
+                    "path": tex_path,
+                    "has_cc": bool(file_node.listConnections(et=1, t="colorCorrect")),
+                    "stat": fp.stat_textures([tex_path])[tex_path] if fingerprints else None
+                })
+
+            scene["materials"].append({
+                "name": str(mtl),
+                "shader": str(mtl.nodeType()),
+                "graph_hash": fp.hash_material_graph(mtl) if fingerprints else None,
+                "file_nodes": file_nodes
+            })
+
+    return scene
+
+
+def _disconnect_roughness(action, context):
+    try:
+        pm.disconnectAttr(pm.PyNode(action["file_node"]).outColor.outColorR,
+                          pm.PyNode(action["material"]).roughnessAmount)
+    except Exception:
+        pass
+
+
+def _create_asset(action, context):
+    context["asset"].create_asset()
+
+
+def _import_world_node(action, context):
+    context["asset"].import_world_node()
+
+
+def _create_proxy(action, context):
+    if action["replace"] and cmds.objExists(action["proxy_node"]):
+        cmds.delete(action["proxy_node"])
+
+    pm.select(cl=1)
+
+    # Duplicate mesh
+    d = pm.PyNode(action["node"]).duplicate()
+
+    pm.select(d)
+
+    v = cmds.vrayCreateProxy(dir=action["dir"], fname=action["fname"], node=action["proxy_node"],
+                             **publish_plan.PROXY_SETTINGS)[0]
+
+    pm.parent(v, action["parent"])
+
+    pm.select(cl=1)
+
+
+def _parent(action, context):
+    pm.parent(action["node"], action["parent"])
+
+
+def _collect_textures(action, context):
+    store = texture_store.get_default_store()
+
+    manifest = texture_collector.collect_textures(action["jobs"], store=store, owner=action["owner"])
+
+    # References from the previous publish go only once the new ones are in, and stay when a texture failed
+    if store and action["release"] and not manifest["failed"]:
+        store.release_stale(action["owner"], [f["hash"] for f in manifest["files"]])
+
+    context["collected"].update(texture_collector.get_collected_destinations(manifest))
+    context["plan"].report["textures"] = manifest
+
+
+def _convert_textures(action, context):
+    context["conversion"] = texture_converter.get_converter().submit(context["plan"].report["textures"]["files"])
+
+
+def _generate_texture_proxies(action, context):
+    # Proxies go next to the path each file node is repathed to, texture_resolution finds them from it. Converted
+    # textures don't exist yet, their proxies are made from the collected file
+    targets = {}
+
+    for requested, collected in context["collected"].items():
+        converted = context["conversion"].get_destination(requested) if context["conversion"] else None
+
+        if converted:
+            targets[collected] = converted
+
+    texture_proxies.get_service().submit(context["collected"].values(), targets=targets)
+
+
+def _set_reflection(action, context):
+    try:
+        pm.PyNode(action["material"]).reflectionColor.set(*action["color"])
+    except Exception:
+        pass
+
+
+def _repath(action, context):
+    if action["destination"] not in context["collected"]:
+        return
+
+    converted = context["conversion"].get(action["destination"]) if context["conversion"] else None
+
+    if converted:
+        # File rules run again for the new extension, the converted texture keeps its source colour space
+        color_space = cmds.getAttr(action["file_node"] + ".colorSpace")
+        cmds.setAttr(action["file_node"] + ".fileTextureName", converted, type="string")
+
+        if cmds.getAttr(action["file_node"] + ".colorSpace") != color_space:
+            cmds.setAttr(action["file_node"] + ".colorSpace", color_space, type="string")
+    else:
+        cmds.setAttr(action["file_node"] + ".fileTextureName", context["collected"][action["destination"]],
+                     type="string")
+
+    logger.debug("Re-pathed %s", os.path.basename(converted or action["destination"]))
+
+
+def _create_cc_node(action, context):
+    # Another material in this publish may have added one already
+    if cmds.listConnections(action["file_node"], et=1, t="colorCorrect"):
+        return
+
+    try:
+        lookdev_utils.create_cc_node(source_node=action["file_node"])
+    except Exception:
+        pass
+
+
+def _export(action, context):
+    pm.select(cl=1)
+
+    pm.select(action["world_node"])
+
+    cmds.file(action["path"], typ="mayaAscii", pr=1, es=1)
+
+    pm.select(cl=1)
+
+
+def _generate_thumbnails(action, context):
+    asset_thumbnails.get_service().submit(action["source"], action["asset_root_path"], action["asset_name"])
+
+
+def _write_asset_data(action, context):
+    asset_search.write_asset_data(action["library"], action["asset_name"], context["plan"].asset_data)
+
+
+ACTION_HANDLERS = {
+    "disconnect_roughness": _disconnect_roughness,
+    "create_asset": _create_asset,
+    "import_world_node": _import_world_node,
+    "create_proxy": _create_proxy,
+    "parent": _parent,
+    "collect_textures": _collect_textures,
+    "convert_textures": _convert_textures,
+    "generate_texture_proxies": _generate_texture_proxies,
+    "set_reflection": _set_reflection,
+    "repath": _repath,
+    "create_cc_node": _create_cc_node,
+    "export": _export,
+    "generate_thumbnails": _generate_thumbnails,
+    "write_asset_data": _write_asset_data
+}
+
+
+@profiling.profiled()
+def execute_plan(plan, asset):
+    context = {
+        "plan": plan,
+        "asset": asset,
+        "collected": {},
+        "conversion": None
+    }
+
+    for action in plan.actions:
+        with profiling.span(action["action"]):
+            ACTION_HANDLERS[action["action"]](action, context)
+
+    if context["conversion"]:
+        with profiling.span("wait_conversions"):
+            plan.report["conversions"] = context["conversion"].wait()
+
+    if asset.world_node is None:
+        asset.world_node = pm.PyNode(plan.asset_name)
+
+    return plan.report
+
+
+def build_fingerprint(scene, plan, previous=None):
+    fingerprint = fp.new_manifest()
+
+    for part in scene["parts"]:
+        fingerprint["meshes"][part["node"]] = part["mesh_hash"] or fp.hash_mesh(part["node"])
+
+    for material in scene["materials"]:
+        name = material["name"]
+
+        if plan.report["materials"].get(name) == publish_plan.SKIPPED:
+            fingerprint["materials"][name] = previous["materials"][name]
+            continue
+
+        tex_paths = [cmds.getAttr(f["node"] + ".fileTextureName") for f in material["file_nodes"]]
+
+        fingerprint["materials"][name] = {
+            "graph": fp.hash_material_graph(name),
+            "textures": fp.stat_textures(tex_paths)
+        }
+
+    return fingerprint
@@ -0,0 +1,131 @@
+import os
+import json
+import hashlib
+import logging
+
+import maya.cmds as cmds
+import maya.api.OpenMaya as om
+
+from maya_core.asset_library.asset_publish import publish_plan
+
+logger = logging.getLogger(__name__)
+logger.setLevel(10)
+
+MANIFEST_NAME = "publish_fingerprint.json"
+
+MANIFEST_VERSION = 2
+
+
+def hash_mesh(node):
+    # Shapes are named relative to the part node, publishing moves the part under asset|Geometry|...|GEO and the
+    # hash has to match on the next publish. Parenting keeps world positions, so world space points are stable
+    hasher = hashlib.sha1()
+
+    root = cmds.ls(str(node), long=True)[0]
+    meshes = cmds.listRelatives(root, allDescendents=True, type="mesh", fullPath=True) or []
+
+    for mesh in sorted(meshes):
+        if cmds.getAttr(mesh + ".intermediateObject"):
+            continue
+
+        sel = om.MSelectionList()
+        sel.add(mesh)
+        fn_mesh = om.MFnMesh(sel.getDagPath(0))
+
+        hasher.update(mesh[len(root):].encode("utf-8"))
+
+        points = fn_mesh.getPoints(om.MSpace.kWorld)
+        hasher.update(repr([(p.x, p.y, p.z) for p in points]).encode("utf-8"))
+
+        counts, vertices = fn_mesh.getVertices()
+        hasher.update(repr((list(counts), list(vertices))).encode("utf-8"))
+
+        u, v = fn_mesh.getUVs()
+        hasher.update(repr((list(u), list(v))).encode("utf-8"))
+
+    return hasher.hexdigest()
+
+
+def hash_material_graph(mtl):
+    hasher = hashlib.sha1()
+
+    for node in sorted(cmds.listHistory(str(mtl)) or []):
+        hasher.update("{}:{}".format(node, cmds.nodeType(node)).encode("utf-8"))
+
+        connections = cmds.listConnections(node, source=True, destination=False, connections=True, plugs=True) or []
+        hasher.update(repr(sorted(zip(connections[::2], connections[1::2]))).encode("utf-8"))
+
+        for attr in sorted(cmds.listAttr(node, keyable=True, scalar=True) or []):
+            try:
+                hasher.update("{}={}".format(attr, cmds.getAttr(node + "." + attr)).encode("utf-8"))
+            except (RuntimeError, ValueError):
+                continue
+
+        if cmds.nodeType(node) == "file":
+            hasher.update(cmds.getAttr(node + ".fileTextureName").encode("utf-8"))
+
+    return hasher.hexdigest()
+
+
+def stat_textures(tex_paths):
+    stats = {}
+
+    for tex_path in tex_paths:
+        try:
+            stat = os.stat(tex_path)
+        except OSError:
+            stats[tex_path] = None
+            continue
+
+        stats[tex_path] = {"size": stat.st_size, "mtime": stat.st_mtime}
+
+    return stats
+
+
+def load_manifest(asset_root_path):
+    manifest_path = os.path.join(asset_root_path, MANIFEST_NAME)
+
+    if not os.path.isfile(manifest_path):
+        return None
+
+    try:
+        with open(manifest_path, "r") as manifest_file:
+            manifest = json.load(manifest_file)
+    except (OSError, ValueError):
+        logger.warning("Could not read publish fingerprint %s", manifest_path)
+        return None
+
+    if manifest.get("version") != MANIFEST_VERSION:
+        return None
+
+    return manifest
+
+
+def save_manifest(asset_root_path, manifest):
+    manifest["version"] = MANIFEST_VERSION
+
+    with open(os.path.join(asset_root_path, MANIFEST_NAME), "w") as manifest_file:
+        json.dump(manifest, manifest_file, indent=4)
+
+
+def remove_manifest(asset_root_path):
+    manifest_path = os.path.join(asset_root_path, MANIFEST_NAME)
+
+    if os.path.isfile(manifest_path):
+        os.remove(manifest_path)
+
+
+def new_manifest():
+    return {
+        "version": MANIFEST_VERSION,
+        "meshes": {},
+        "materials": {}
+    }
+
+
+def log_report(report):
+    for stage, state in report["stages"].items():
+        logger.info("%-12s %s", stage, state)
+
+    skipped = len([s for s in report["materials"].values() if s == publish_plan.SKIPPED])
+    logger.info("%s/%s materials skipped", skipped, len(report["materials"]))
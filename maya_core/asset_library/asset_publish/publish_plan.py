@@ -0,0 +1,272 @@
+import os
+import json
+import logging
+
+from maya_core.pipeline.lookdev import texture_classifier
+from maya_core.asset_library import asset_thumbnails
+from maya_core.asset_library.asset_publish import texture_collector
+from maya_core.asset_library.asset_publish import texture_converter
+from maya_core.asset_library.asset_publish import texture_proxies
+
+logger = logging.getLogger(__name__)
+logger.setLevel(10)
+
+SKIPPED = "skipped"
+RUN = "run"
+
+PROXY_SETTINGS = {
+    "createProxyNode": 1,
+    "newProxyNode": 1,
+    "exportHierarchy": 1,
+    "exportType": 1,
+    "includeTransformation": 1,
+    "makeBackup": 1,
+    "previewFaces": 17500,
+    "previewType": "clustering",
+    "lastSelectedAsPreview": 1,
+    "pointSize": 0.500,
+    "vertexColorsOn": 1,
+    "geomToLoad": 3
+}
+
+REFLECTION_COLOR = (.7, .7, .7)
+
+
+def new_asset_data(asset_name, asset_type, tags=None, preview_source=None):
+    return {
+        "asset_name": asset_name,
+        "asset_preview": preview_source,
+        "asset_type": asset_type,
+        "asset_path": None,
+        "usd": None,
+        "vrmesh": None,
+        "vrproxy_maya": None,
+        "vrscene": None,
+        "vrscene_maya": None,
+        "maya_file": None,
+        "mesh": None,
+        "scale": None,
+        "materials": None,
+        "megascan_id": None,
+        "tags": list(tags or [])
+    }
+
+
+def new_scene_description(asset_name):
+    # Plain data snapshot of the scene, built by publish_executor.describe_scene or by hand in tests
+    return {
+        "asset_name": asset_name,
+        "world_node_exists": False,
+        "parts": [],
+        "materials": []
+    }
+
+
+class PublishPlan(object):
+    def __init__(self, asset_data, library, asset_root_path, maya_file):
+        self.asset_data = asset_data
+        self.library = library
+        self.asset_root_path = asset_root_path
+        self.maya_file = maya_file
+
+        self.actions = []
+        self.report = {
+            "stages": {},
+            "materials": {},
+            "textures": None,
+            "conversions": None
+        }
+
+    def add(self, action, **params):
+        params["action"] = action
+        self.actions.append(params)
+        return params
+
+    def get_actions(self, action):
+        return [a for a in self.actions if a["action"] == action]
+
+    @property
+    def asset_name(self):
+        return self.asset_data["asset_name"]
+
+    def summary(self):
+        counts = {}
+
+        for action in self.actions:
+            counts[action["action"]] = counts.get(action["action"], 0) + 1
+
+        return counts
+
+    def to_dict(self):
+        return {
+            "asset_data": self.asset_data,
+            "library": self.library,
+            "asset_root_path": self.asset_root_path,
+            "maya_file": self.maya_file,
+            "actions": self.actions,
+            "report": self.report
+        }
+
+    def to_json(self, indent=4):
+        return json.dumps(self.to_dict(), indent=indent)
+
+    def log(self):
+        logger.info("Publish plan for %s (%s), %s actions", self.asset_name, self.library, len(self.actions))
+
+        for action in self.actions:
+            params = ", ".join("{}={}".format(k, v) for k, v in sorted(action.items()) if k != "action")
+            logger.info("  %-20s %s", action["action"], params)
+
+
+def _material_unchanged(previous, material):
+    if not previous or material["name"] not in previous["materials"]:
+        return False
+
+    record = previous["materials"][material["name"]]
+
+    if material.get("graph_hash") is None or record["graph"] != material["graph_hash"]:
+        return False
+
+    return record["textures"] == {f["path"]: f.get("stat") for f in material["file_nodes"]}
+
+
+def plan_publish(scene, asset_data, library, asset_root_path, maya_file, keep_unknown=True, previous=None,
+                 file_exists=os.path.isfile, convert_textures=None, proxies=None):
+    # Fills asset_data in place, the MayaAsset built from it by the caller shares the same dict. convert_textures and
+    # proxies default to the environment settings
+    asset_name = scene["asset_name"]
+
+    convert_textures = texture_converter.CONVERT_TEXTURES if convert_textures is None else convert_textures
+    proxies = texture_proxies.TEXTURE_PROXIES if proxies is None else proxies
+
+    plan = PublishPlan(asset_data, library, asset_root_path, maya_file)
+    report = plan.report
+
+    # Materials
+    classifier = texture_classifier.get_classifier()
+    materials = []
+
+    for material in scene["materials"]:
+        tex_paths = [f["path"] for f in material["file_nodes"]]
+
+        materials.append({
+            "material_name": material["name"],
+            "material_shader": material["shader"],
+            "textures": classifier.classify_textures(tex_paths, keep_unknown=keep_unknown)
+        })
+
+        for file_node in material["file_nodes"]:
+            if classifier.classify_texture(file_node["path"]) == "roughness":
+                plan.add("disconnect_roughness", file_node=file_node["node"], material=material["name"])
+
+    asset_data["materials"] = materials
+
+    plan.add("create_asset")
+
+    # World node
+    if previous and scene["world_node_exists"]:
+        report["stages"]["world_node"] = SKIPPED
+    else:
+        plan.add("import_world_node", world_node=asset_name)
+        report["stages"]["world_node"] = RUN
+
+    # Proxies
+    proxy_dir = os.path.join(asset_root_path, "02_model", "publish")
+    proxy_parent = "|".join([asset_name, "Geometry", "Constrain", "Proxy"])
+    geo_parent = "|".join([asset_name, "Geometry", "Constrain", "HiRes", "GEO"])
+
+    previous_meshes = previous["meshes"] if previous else {}
+    report["stages"]["proxy"] = SKIPPED
+
+    for part in scene["parts"]:
+        fname = part["node"] + ".vrmesh"
+        proxy_node = part["node"] + "_vrproxy"
+
+        if previous and previous_meshes.get(part["node"]) == part.get("mesh_hash") and part.get("proxy_exists") and \
+                file_exists(os.path.join(proxy_dir, fname)):
+            continue
+
+        plan.add("create_proxy", node=part["node"], dir=proxy_dir, fname=fname, proxy_node=proxy_node,
+                 parent=proxy_parent, replace=bool(part.get("proxy_exists")))
+        report["stages"]["proxy"] = RUN
+
+    for part in scene["parts"]:
+        if (part.get("parent") or "").lstrip("|") != geo_parent:
+            plan.add("parent", node=part["node"], parent=geo_parent)
+
+    # Textures
+    materials_root = os.path.join(asset_root_path, "03_lookdev", "publish", "materials")
+    texture_jobs = []
+    texture_nodes = []
+
+    for material in scene["materials"]:
+        if _material_unchanged(previous, material):
+            report["materials"][material["name"]] = SKIPPED
+            continue
+
+        report["materials"][material["name"]] = RUN
+
+        for file_node in material["file_nodes"]:
+            destination = os.path.normpath(os.path.join(materials_root, material["name"],
+                                                        os.path.basename(file_node["path"])))
+            texture_jobs.append((file_node["path"], destination))
+            texture_nodes.append((material["name"], file_node["node"]))
+
+    # Same names as the collector gives textures whose file names collide, repaths point at what it writes
+    texture_jobs = texture_collector.get_unique_destinations(texture_jobs)
+    destinations = dict(zip(texture_nodes, (dst for _, dst in texture_jobs)))
+
+    if texture_jobs:
+        # Skipped materials keep their store references from the last publish
+        plan.add("collect_textures", jobs=texture_jobs, owner="/".join([library, asset_name]),
+                 release=SKIPPED not in report["materials"].values())
+        report["stages"]["textures"] = RUN
+
+        # Runs in worker processes, each repath waits for its own texture only
+        if convert_textures:
+            plan.add("convert_textures")
+
+        # Half and quarter resolution copies for the viewport, generated in the background like thumbnails
+        if proxies:
+            plan.add("generate_texture_proxies")
+    else:
+        report["stages"]["textures"] = SKIPPED
+
+    # Lookdev
+    cc_file_nodes = set()
+
+    for material in scene["materials"]:
+        if report["materials"][material["name"]] == SKIPPED:
+            continue
+
+        plan.add("set_reflection", material=material["name"], color=REFLECTION_COLOR)
+
+        for file_node in material["file_nodes"]:
+            plan.add("repath", file_node=file_node["node"],
+                     destination=destinations[(material["name"], file_node["node"])])
+
+            if not file_node.get("has_cc") and file_node["node"] not in cc_file_nodes:
+                plan.add("create_cc_node", file_node=file_node["node"])
+                cc_file_nodes.add(file_node["node"])
+
+    report["stages"]["lookdev"] = RUN if RUN in report["materials"].values() else SKIPPED
+
+    # Export
+    if all(report["stages"][stage] == SKIPPED for stage in ("world_node", "proxy", "lookdev")) and \
+            set(previous["materials"]) == set(m["name"] for m in scene["materials"]) and file_exists(maya_file):
+        report["stages"]["export"] = SKIPPED
+    else:
+        plan.add("export", world_node=asset_name, path=maya_file)
+        report["stages"]["export"] = RUN
+
+    asset_data["maya_file"] = maya_file
+
+    # Thumbnails are generated in the background, their paths are known up front
+    if asset_data.get("asset_preview"):
+        asset_data["asset_thumbnails"] = asset_thumbnails.get_thumbnail_paths(asset_root_path, asset_name)
+        plan.add("generate_thumbnails", source=asset_data["asset_preview"], asset_root_path=asset_root_path,
+                 asset_name=asset_name)
+
+    plan.add("write_asset_data", library=library, asset_name=asset_name)
+
+    return plan
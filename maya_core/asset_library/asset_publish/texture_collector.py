@@ -0,0 +1,221 @@
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+logger.setLevel(10)
+
+HASH_ALGORITHM = "sha1"
+
+CHUNK_SIZE = 4 * 1024 * 1024
+
+MAX_WORKERS = 8
+
+# Per-directory record of destination hashes, saves re-reading published textures on the share
+HASH_INDEX_NAME = ".texture_hashes.json"
+
+_index_lock = threading.Lock()
+
+
+def hash_file(path):
+    hasher = hashlib.new(HASH_ALGORITHM)
+
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            hasher.update(chunk)
+
+    return hasher.hexdigest()
+
+
+def copy_and_hash(src, dst):
+    hasher = hashlib.new(HASH_ALGORITHM)
+    tmp_dst = "{}.{}.{}.tmp".format(dst, os.getpid(), threading.get_ident())
+
+    with open(src, "rb") as src_file, open(tmp_dst, "wb") as dst_file:
+        for chunk in iter(lambda: src_file.read(CHUNK_SIZE), b""):
+            hasher.update(chunk)
+            dst_file.write(chunk)
+
+    os.replace(tmp_dst, dst)
+
+    return hasher.hexdigest()
+
+
+def _load_hash_index(directory):
+    index_path = os.path.join(directory, HASH_INDEX_NAME)
+
+    if not os.path.isfile(index_path):
+        return {}
+
+    try:
+        with open(index_path, "r") as index_file:
+            return json.load(index_file)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_hash_index(directory, index):
+    index_path = os.path.join(directory, HASH_INDEX_NAME)
+    tmp_path = "{}.{}.{}.tmp".format(index_path, os.getpid(), threading.get_ident())
+
+    with open(tmp_path, "w") as index_file:
+        json.dump(index, index_file, indent=4)
+
+    os.replace(tmp_path, index_path)
+
+
+def _recorded_hash(index, dst, stat):
+    record = index.get(os.path.basename(dst))
+
+    if record and record["size"] == stat.st_size and record["mtime"] == stat.st_mtime:
+        return record["hash"]
+
+    return None
+
+
+def _new_entry(src, dst):
+    return {
+        "source": src,
+        "requested": dst,
+        "destination": dst,
+        "hash": None,
+        "bytes": 0,
+        "copied": False,
+        "error": None
+    }
+
+
+def _collect_texture(src, dst, index):
+    entry = _new_entry(src, dst)
+
+    src_size = os.path.getsize(src)
+    entry["bytes"] = src_size
+
+    if os.path.isfile(dst):
+        dst_stat = os.stat(dst)
+
+        if dst_stat.st_size == src_size:
+            src_hash = hash_file(src)
+            dst_hash = _recorded_hash(index, dst, dst_stat) or hash_file(dst)
+
+            if src_hash == dst_hash:
+                entry["hash"] = src_hash
+                return entry, dst_stat
+
+    entry["hash"] = copy_and_hash(src, dst)
+    entry["copied"] = True
+
+    return entry, os.stat(dst)
+
+
+def _store_texture(src, dst, store, owner):
+    entry = _new_entry(src, dst)
+
+    entry["destination"], entry["hash"], entry["copied"] = store.store(src, dst, owner)
+    entry["bytes"] = os.path.getsize(src)
+
+    return entry
+
+
+def get_unique_destinations(jobs):
+    # Different sources asked to land on one destination, two albedo.png from different folders. The first source in
+    # sorted order keeps the name, the others get a suffix from their source path so a republish picks the same one
+    sources = {}
+
+    for src, dst in jobs:
+        sources.setdefault(os.path.normpath(dst), set()).add(os.path.normcase(os.path.normpath(src)))
+
+    unique_jobs = []
+
+    for src, dst in jobs:
+        dst = os.path.normpath(dst)
+        src_key = os.path.normcase(os.path.normpath(src))
+
+        if len(sources[dst]) > 1 and src_key != min(sources[dst]):
+            stem, ext = os.path.splitext(dst)
+            dst = "{}_{}{}".format(stem, hashlib.sha1(src_key.encode("utf-8")).hexdigest()[:8], ext)
+
+        unique_jobs.append((src, dst))
+
+    return unique_jobs
+
+
+def collect_textures(jobs, max_workers=MAX_WORKERS, store=None, owner=None):
+    # With a TextureStore the files land in its blob directory and dst is linked to them
+    start = time.time()
+
+    jobs = list(jobs)
+    renamed_jobs = get_unique_destinations(jobs)
+
+    for (src, requested), (_, dst) in zip(jobs, renamed_jobs):
+        if dst != os.path.normpath(requested):
+            logger.warning("%s collides with another texture of the same name, collected as %s", src,
+                           os.path.basename(dst))
+
+    # De-duplicate by destination, several file nodes often share one texture
+    unique_jobs = {}
+    for src, dst in renamed_jobs:
+        unique_jobs.setdefault(dst, src)
+
+    directories = set(os.path.dirname(dst) for dst in unique_jobs)
+    indices = {}
+
+    for directory in directories:
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+
+        if store is None:
+            indices[directory] = _load_hash_index(directory)
+
+    def collect(item):
+        dst, src = item
+        directory = os.path.dirname(dst)
+
+        try:
+            if store is not None:
+                return _store_texture(src, dst, store, owner)
+
+            entry, dst_stat = _collect_texture(src, dst, indices[directory])
+        except (OSError, IOError) as e:
+            logger.error("Could not collect %s: %s", src, e)
+            entry = _new_entry(src, dst)
+            entry["error"] = str(e)
+            return entry
+
+        with _index_lock:
+            indices[directory][os.path.basename(dst)] = {"hash": entry["hash"], "size": dst_stat.st_size,
+                                                         "mtime": dst_stat.st_mtime}
+
+        return entry
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        files = list(executor.map(collect, unique_jobs.items()))
+
+    for directory, index in indices.items():
+        _save_hash_index(directory, index)
+
+    manifest = {
+        "files": files,
+        "copied": len([f for f in files if f["copied"]]),
+        "skipped": len([f for f in files if not f["copied"] and not f["error"]]),
+        "failed": len([f for f in files if f["error"]]),
+        "bytes_copied": sum(f["bytes"] for f in files if f["copied"]),
+        "bytes_skipped": sum(f["bytes"] for f in files if not f["copied"] and not f["error"]),
+        "elapsed": time.time() - start
+    }
+
+    logger.info("Collected %s textures (%s copied, %s skipped, %s failed), %.1f MB moved in %.2fs", len(files),
+                manifest["copied"], manifest["skipped"], manifest["failed"], manifest["bytes_copied"] / 1048576.0,
+                manifest["elapsed"])
+
+    return manifest
+
+
+def get_collected_destinations(manifest):
+    # A failed copy can still leave a previously published texture in place
+    return {f["requested"]: f["destination"] for f in manifest["files"]
+            if not f["error"] or os.path.isfile(f["destination"])}
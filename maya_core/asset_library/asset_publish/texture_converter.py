@@ -0,0 +1,510 @@
+import os
+import json
+import time
+import zlib
+import shutil
+import struct
+import logging
+import subprocess
+import importlib.util
+from concurrent.futures import ProcessPoolExecutor
+
+from maya_core.pipeline.lookdev import texture_metadata
+
+logger = logging.getLogger(__name__)
+logger.setLevel(10)
+
+# Conversion is opt-in, publishes keep pointing at the collected files when it is off
+CONVERT_TEXTURES = bool(os.environ.get("MAYA_CORE_CONVERT_TEXTURES"))
+
+# Backend name, the first available one in BACKENDS when unset
+CONVERTER_BACKEND = os.environ.get("MAYA_CORE_TEXTURE_CONVERTER")
+
+# Per-directory record of what each converted file was made from
+CONVERSION_INDEX_NAME = ".texture_conversions.json"
+
+# Bump when the NumPy writer changes so its outputs are converted again
+CONVERTER_VERSION = 1
+
+TILE_SIZE = 64
+
+MAX_WORKERS = max(1, (os.cpu_count() or 2) - 1)
+
+# Pillow modes of single channel images deeper than 8 bits, read as uint16
+PILLOW_16_BIT_MODES = ("I;16", "I;16L", "I;16B", "I;16N", "I")
+
+
+def _run(command):
+    process = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+
+    if process.returncode != 0:
+        raise IOError("{} failed: {}".format(os.path.basename(command[0]),
+                                             process.stdout.decode("utf-8", "replace").strip()))
+
+
+class ConverterBackend(object):
+    # Instances are pickled into the worker processes, subclasses have to live in an importable module
+    name = None
+    extension = None
+    source_extensions = ()
+
+    def available(self):
+        return True
+
+    def supports(self, src):
+        return os.path.splitext(src)[-1].lower() in self.source_extensions
+
+    def convert(self, src, dst):
+        raise NotImplementedError
+
+
+class MaketxBackend(ConverterBackend):
+    name = "maketx"
+    extension = ".tx"
+    source_extensions = (".jpg", ".jpeg", ".png", ".tga", ".tif", ".tiff", ".exr", ".hdr")
+
+    def __init__(self, executable=None):
+        self.executable = executable or os.environ.get("MAYA_CORE_MAKETX") or shutil.which("maketx")
+
+    def available(self):
+        return bool(self.executable) and os.path.isfile(self.executable)
+
+    def convert(self, src, dst):
+        _run([self.executable, "--oiio", "--tile", str(TILE_SIZE), str(TILE_SIZE), src, "-o", dst])
+
+
+class Img2TiledExrBackend(ConverterBackend):
+    # Ships with V-Ray
+    name = "img2tiledexr"
+    extension = ".exr"
+    source_extensions = (".jpg", ".jpeg", ".png", ".tga", ".tif", ".tiff", ".exr", ".hdr")
+
+    def __init__(self, executable=None):
+        self.executable = executable or os.environ.get("MAYA_CORE_IMG2TILEDEXR") or shutil.which("img2tiledexr")
+
+    def available(self):
+        return bool(self.executable) and os.path.isfile(self.executable)
+
+    def convert(self, src, dst):
+        _run([self.executable, src, dst])
+
+
+def get_bit_depth(src):
+    # Bits per channel from the file header, 8 for formats without a header reader
+    try:
+        metadata = texture_metadata.read_header(src)
+    except (OSError, ValueError):
+        return 8, None
+
+    return metadata["bit_depth"], metadata["channels"]
+
+
+def _keeps_precision(bit_depth, channels):
+    # 8 bit sources and 16 bit single channel ones, deeper images would be clipped or truncated to 8 bits
+    return bit_depth <= 8 or (bit_depth == 16 and channels == 1)
+
+
+def can_read_pixels(src):
+    return _keeps_precision(*get_bit_depth(src))
+
+
+def read_pixels(src):
+    # (height, width, channels) array, uint16 for 16 bit single channel sources and uint8 for everything else
+    import numpy
+
+    bit_depth, channels = get_bit_depth(src)
+
+    if not _keeps_precision(bit_depth, channels):
+        raise ValueError("Can't read {} bit, {} channel {} without losing precision".format(bit_depth, channels, src))
+
+    try:
+        from PIL import Image
+    except ImportError:
+        if bit_depth > 8:
+            raise ValueError("Can't read {} bit {} without Pillow".format(bit_depth, src))
+
+        return _read_pixels_qt(src)
+
+    image = Image.open(src)
+
+    if image.mode in PILLOW_16_BIT_MODES:
+        return numpy.clip(numpy.asarray(image), 0, 65535).astype(numpy.uint16)[..., None]
+
+    if image.mode not in ("L", "LA", "RGB", "RGBA"):
+        has_alpha = "A" in image.getbands() or "transparency" in image.info
+        image = image.convert("RGBA" if has_alpha else "RGB")
+
+    pixels = numpy.asarray(image)
+
+    return pixels[..., None] if pixels.ndim == 2 else pixels
+
+
+def _read_pixels_qt(src):
+    import numpy
+    from PySide2 import QtGui
+
+    image = QtGui.QImage(src)
+
+    if image.isNull():
+        raise IOError("Could not read {}".format(src))
+
+    has_alpha = image.hasAlphaChannel()
+    image = image.convertToFormat(QtGui.QImage.Format_RGBA8888)
+
+    width, height = image.width(), image.height()
+    pixels = numpy.frombuffer(image.constBits(), numpy.uint8).reshape(height, image.bytesPerLine())
+    pixels = pixels[:, :width * 4].reshape(height, width, 4).copy()
+
+    return pixels if has_alpha else pixels[..., :3]
+
+
+def build_mipmaps(pixels, max_levels=None):
+    # Box filtered down to 1x1, or max_levels below the source. Odd sizes repeat their last row or column
+    import numpy
+
+    levels = [pixels]
+    level = pixels.astype(numpy.float32)
+    maximum = numpy.iinfo(pixels.dtype).max
+
+    while (level.shape[0] > 1 or level.shape[1] > 1) and (max_levels is None or len(levels) <= max_levels):
+        if level.shape[0] > 1:
+            if level.shape[0] % 2:
+                level = numpy.concatenate([level, level[-1:]], axis=0)
+            level = (level[0::2] + level[1::2]) * 0.5
+
+        if level.shape[1] > 1:
+            if level.shape[1] % 2:
+                level = numpy.concatenate([level, level[:, -1:]], axis=1)
+            level = (level[:, 0::2] + level[:, 1::2]) * 0.5
+
+        levels.append(numpy.clip(numpy.rint(level), 0, maximum).astype(pixels.dtype))
+
+    return levels
+
+
+# field type -> (struct code, size)
+_TIFF_SHORT = 3
+_TIFF_LONG = 4
+_TIFF_TYPES = {_TIFF_SHORT: ("H", 2), _TIFF_LONG: ("I", 4)}
+
+
+def _write_ifd(f, tags):
+    # tags: (tag, type, values), values that don't fit in an entry are written ahead of the IFD
+    entries = []
+
+    for tag, field_type, values in sorted(tags):
+        code, size = _TIFF_TYPES[field_type]
+        data = struct.pack("<" + code * len(values), *values)
+
+        if len(data) > 4:
+            if f.tell() % 2:
+                f.write(b"\x00")
+
+            offset = f.tell()
+            f.write(data)
+            data = struct.pack("<I", offset)
+
+        entries.append(struct.pack("<HHI", tag, field_type, len(values)) + data.ljust(4, b"\x00"))
+
+    if f.tell() % 2:
+        f.write(b"\x00")
+
+    ifd_offset = f.tell()
+    f.write(struct.pack("<H", len(entries)) + b"".join(entries))
+
+    next_offset_position = f.tell()
+    f.write(struct.pack("<I", 0))
+
+    return ifd_offset, next_offset_position
+
+
+def write_tiled_tiff(path, levels, tile_size=TILE_SIZE, compression_level=6):
+    # One deflate compressed, tiled IFD per mip level, the layout maketx gives .tx files
+    import numpy
+
+    with open(path, "wb") as f:
+        f.write(b"II*\x00")
+        next_offset_position = f.tell()
+        f.write(struct.pack("<I", 0))
+
+        for index, level in enumerate(levels):
+            height, width, channels = level.shape
+            bits = level.dtype.itemsize * 8
+            level = level.astype(level.dtype.newbyteorder("<"), copy=False)
+
+            # Edge tiles are padded out to the full tile size
+            padded = numpy.zeros((-(-height // tile_size) * tile_size, -(-width // tile_size) * tile_size, channels),
+                                 level.dtype)
+            padded[:height, :width] = level
+
+            tile_offsets = []
+            tile_byte_counts = []
+
+            for y in range(0, height, tile_size):
+                for x in range(0, width, tile_size):
+                    data = zlib.compress(padded[y:y + tile_size, x:x + tile_size].tobytes(), compression_level)
+
+                    tile_offsets.append(f.tell())
+                    tile_byte_counts.append(len(data))
+                    f.write(data)
+
+            tags = [
+                (254, _TIFF_LONG, [1 if index else 0]),
+                (256, _TIFF_LONG, [width]),
+                (257, _TIFF_LONG, [height]),
+                (258, _TIFF_SHORT, [bits] * channels),
+                (259, _TIFF_SHORT, [8]),
+                (262, _TIFF_SHORT, [2 if channels >= 3 else 1]),
+                (277, _TIFF_SHORT, [channels]),
+                (284, _TIFF_SHORT, [1]),
+                (322, _TIFF_LONG, [tile_size]),
+                (323, _TIFF_LONG, [tile_size]),
+                (324, _TIFF_LONG, tile_offsets),
+                (325, _TIFF_LONG, tile_byte_counts),
+                (339, _TIFF_SHORT, [1] * channels)
+            ]
+
+            # Unassociated alpha
+            if channels in (2, 4):
+                tags.append((338, _TIFF_SHORT, [2]))
+
+            ifd_offset, ifd_next_position = _write_ifd(f, tags)
+
+            f.seek(next_offset_position)
+            f.write(struct.pack("<I", ifd_offset))
+            f.seek(0, os.SEEK_END)
+
+            next_offset_position = ifd_next_position
+
+
+class NumpyBackend(ConverterBackend):
+    # Fallback with no external tools, 8 bit images and 16 bit single channel ones read through Pillow or Qt
+    name = "numpy"
+    extension = ".tx"
+    source_extensions = (".jpg", ".jpeg", ".png", ".tga", ".tif", ".tiff", ".bmp")
+
+    def available(self):
+        return importlib.util.find_spec("numpy") is not None
+
+    def supports(self, src):
+        # Deeper sources are left as collected
+        return super(NumpyBackend, self).supports(src) and can_read_pixels(src)
+
+    def convert(self, src, dst):
+        write_tiled_tiff(dst, build_mipmaps(read_pixels(src)))
+
+
+BACKENDS = [MaketxBackend(), Img2TiledExrBackend(), NumpyBackend()]
+
+
+def register_backend(backend, first=True):
+    BACKENDS.insert(0 if first else len(BACKENDS), backend)
+
+
+def get_backend(name=None):
+    name = name or CONVERTER_BACKEND
+
+    for backend in BACKENDS:
+        if (name is None or backend.name == name) and backend.available():
+            return backend
+
+    return None
+
+
+def get_converted_path(dst, backend):
+    return os.path.splitext(dst)[0] + backend.extension
+
+
+def convert_texture(src, dst, backend):
+    # Runs in a worker process, written next to dst and moved into place once complete
+    start = time.time()
+    tmp_dst = "{}.{}.tmp{}".format(os.path.splitext(dst)[0], os.getpid(), backend.extension)
+
+    try:
+        backend.convert(src, tmp_dst)
+        os.replace(tmp_dst, dst)
+    finally:
+        if os.path.isfile(tmp_dst):
+            os.remove(tmp_dst)
+
+    return {"source": src, "destination": dst, "elapsed": time.time() - start}
+
+
+def _load_index(directory):
+    index_path = os.path.join(directory, CONVERSION_INDEX_NAME)
+
+    if not os.path.isfile(index_path):
+        return {}
+
+    try:
+        with open(index_path, "r") as index_file:
+            return json.load(index_file)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_index(directory, records):
+    # Merged into the index on disk as it is now and moved into place, concurrent publishes into the same
+    # directory keep each other's records and readers never see half a file
+    index_path = os.path.join(directory, CONVERSION_INDEX_NAME)
+    tmp_path = "{}.{}.tmp".format(index_path, os.getpid())
+
+    index = _load_index(directory)
+    index.update(records)
+
+    try:
+        with open(tmp_path, "w") as index_file:
+            json.dump(index, index_file, indent=4)
+
+        os.replace(tmp_path, index_path)
+    finally:
+        if os.path.isfile(tmp_path):
+            os.remove(tmp_path)
+
+
+def _get_record(backend, source_hash):
+    return {"hash": source_hash, "backend": backend.name, "version": CONVERTER_VERSION}
+
+
+class TextureConverter(object):
+    def __init__(self, backend=None, max_workers=MAX_WORKERS):
+        self.backend = backend or get_backend()
+        self.max_workers = max_workers
+        self._executor = None
+
+    @property
+    def executor(self):
+        if self._executor is None:
+            # Imported here, asset_thumbnails pulls in the library manager the converter itself has no use for
+            from maya_core.asset_library import asset_thumbnails
+
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers,
+                                                 mp_context=asset_thumbnails.get_mp_context())
+
+        return self._executor
+
+    def shutdown(self, wait=True):
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
+
+    def submit(self, files):
+        # files: collector manifest entries. Returns a TextureConversion, its futures run while the caller carries on
+        conversion = TextureConversion(self.backend)
+
+        if self.backend is None:
+            logger.warning("No texture converter backend available, textures are left as collected")
+            return conversion
+
+        outputs = set()
+
+        for entry in files:
+            src = entry["destination"]
+
+            if entry["error"] or not entry["hash"] or not self.backend.supports(src):
+                continue
+
+            # Next to the requested path, with a store in direct mode the source is a shared blob
+            dst = get_converted_path(entry["requested"], self.backend)
+
+            # rock.png and rock.jpg side by side would both become rock.tx
+            if dst in outputs:
+                dst = entry["requested"] + self.backend.extension
+
+            outputs.add(dst)
+
+            record = _get_record(self.backend, entry["hash"])
+            directory = os.path.dirname(dst)
+
+            if directory not in conversion.indices:
+                conversion.indices[directory] = _load_index(directory)
+
+            if conversion.indices[directory].get(os.path.basename(dst)) == record and os.path.isfile(dst):
+                conversion.add_skipped(entry["requested"], dst)
+                continue
+
+            future = self.executor.submit(convert_texture, src, dst, self.backend)
+            conversion.add_future(entry["requested"], dst, record, future)
+
+        return conversion
+
+
+class TextureConversion(object):
+    def __init__(self, backend):
+        self.backend = backend
+        self.start = time.time()
+
+        # requested collector destination -> converted path
+        self.converted = {}
+        self.skipped = set()
+        self.failed = {}
+
+        # directory -> index as loaded, and the records this conversion adds to it
+        self.indices = {}
+        self.records = {}
+        self._futures = {}
+
+    def add_skipped(self, requested, dst):
+        self.converted[requested] = dst
+        self.skipped.add(requested)
+
+    def add_future(self, requested, dst, record, future):
+        self._futures[requested] = (dst, record, future)
+
+    def get_destination(self, requested):
+        # Path the file node will point at once converted, known without waiting. None when it isn't converted
+        if requested in self._futures:
+            return self._futures[requested][0]
+
+        return self.converted.get(requested)
+
+    def get(self, requested):
+        # Converted path for a collected texture, waits for its conversion. None when it isn't converted
+        if requested in self._futures:
+            dst, record, future = self._futures.pop(requested)
+
+            try:
+                future.result()
+            except Exception as e:
+                logger.error("Could not convert %s: %s", requested, e)
+                self.failed[requested] = str(e)
+            else:
+                self.converted[requested] = dst
+
+                self.indices[os.path.dirname(dst)][os.path.basename(dst)] = record
+                self.records.setdefault(os.path.dirname(dst), {})[os.path.basename(dst)] = record
+
+        return self.converted.get(requested)
+
+    def wait(self):
+        for requested in list(self._futures):
+            self.get(requested)
+
+        for directory, records in self.records.items():
+            _save_index(directory, records)
+
+        self.records = {}
+
+        return self.manifest()
+
+    def manifest(self):
+        return {
+            "backend": self.backend.name if self.backend else None,
+            "converted": len(self.converted) - len(self.skipped),
+            "skipped": len(self.skipped),
+            "failed": len(self.failed),
+            "errors": self.failed,
+            "elapsed": time.time() - self.start
+        }
+
+
+_converter = None
+
+
+def get_converter():
+    global _converter
+
+    if _converter is None:
+        _converter = TextureConverter()
+
+    return _converter
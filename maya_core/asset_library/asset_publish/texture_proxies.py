@@ -0,0 +1,236 @@
+import os
+import re
+import logging
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+from maya_core.asset_library.asset_publish import texture_converter
+
+logger = logging.getLogger(__name__)
+logger.setLevel(10)
+
+# On by default, publishes skip the proxy stage with MAYA_CORE_TEXTURE_PROXIES=0
+TEXTURE_PROXIES = os.environ.get("MAYA_CORE_TEXTURE_PROXIES", "1") != "0"
+
+# Proxies live in a folder next to the texture they were made from
+PROXY_DIR = "proxy"
+
+# level name -> mip level below the source
+PROXY_LEVELS = OrderedDict([("half", 1), ("quarter", 2)])
+
+SOURCE_EXTENSIONS = texture_converter.NumpyBackend.source_extensions
+
+# Proxies keep their source format when it can be written back, everything else becomes PNG
+WRITE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".tga", ".tif", ".tiff")
+
+# Formats 16 bit proxies can be written in without dropping to 8 bits
+HIGH_BIT_DEPTH_EXTENSIONS = (".png", ".tif", ".tiff")
+
+UDIM_TOKEN = "<UDIM>"
+
+MAX_WORKERS = max(1, (os.cpu_count() or 2) - 1)
+
+
+def get_proxy_path(path, level, high_bit_depth=False):
+    directory, file_name = os.path.split(path)
+    stem, ext = os.path.splitext(file_name)
+
+    if ext.lower() not in (HIGH_BIT_DEPTH_EXTENSIONS if high_bit_depth else WRITE_EXTENSIONS):
+        ext = ".png"
+
+    return os.path.join(directory, PROXY_DIR, "{}_{}{}".format(stem, level, ext))
+
+
+def is_proxy_path(path):
+    return os.path.basename(os.path.dirname(path)) == PROXY_DIR
+
+
+def find_proxy_path(path, level, listings=None):
+    # The full resolution path may have been converted since, proxies are matched by stem in any written format.
+    # listings caches proxy folder contents across calls
+    directory, file_name = os.path.split(path)
+    proxy_dir = os.path.join(directory, PROXY_DIR)
+    listings = {} if listings is None else listings
+
+    if proxy_dir not in listings:
+        try:
+            listings[proxy_dir] = set(os.listdir(proxy_dir))
+        except OSError:
+            listings[proxy_dir] = set()
+
+    listing = listings[proxy_dir]
+    stem, ext = os.path.splitext(file_name)
+
+    for proxy_ext in (ext,) + WRITE_EXTENSIONS:
+        proxy_name = "{}_{}{}".format(stem, level, proxy_ext)
+
+        if UDIM_TOKEN in proxy_name:
+            parts = [re.escape(part) for part in proxy_name.split(UDIM_TOKEN)]
+            tile_re = re.compile(r"1\d{3}".join(parts) + "$")
+
+            if any(tile_re.match(name) for name in listing):
+                return os.path.join(proxy_dir, proxy_name)
+        elif proxy_name in listing:
+            return os.path.join(proxy_dir, proxy_name)
+
+    return None
+
+
+def _write_pixels(pixels, path):
+    # Written next to path and moved into place, a reader never sees half a proxy
+    tmp_path = "{}.{}.tmp{}".format(os.path.splitext(path)[0], os.getpid(), os.path.splitext(path)[-1])
+
+    try:
+        try:
+            _write_pixels_pillow(pixels, tmp_path)
+        except ImportError:
+            _write_pixels_qt(pixels, tmp_path)
+
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.isfile(tmp_path):
+            os.remove(tmp_path)
+
+
+def _write_pixels_pillow(pixels, path):
+    from PIL import Image
+
+    image = Image.fromarray(pixels[..., 0] if pixels.shape[2] == 1 else pixels)
+
+    # No alpha in JPEG
+    if os.path.splitext(path)[-1].lower() in (".jpg", ".jpeg") and image.mode in ("LA", "RGBA"):
+        image = image.convert(image.mode[:-1])
+
+    image.save(path)
+
+
+def _write_pixels_qt(pixels, path):
+    import numpy
+    from PySide2 import QtGui
+
+    height, width, channels = pixels.shape
+
+    if pixels.dtype.itemsize > 1:
+        pixels = numpy.ascontiguousarray(pixels[..., 0], numpy.uint16)
+        image = QtGui.QImage(pixels.data, width, height, width * 2, QtGui.QImage.Format_Grayscale16)
+
+        if not image.save(path):
+            raise IOError("Could not write {}".format(path))
+
+        return
+
+    if channels < 3:
+        pixels = numpy.concatenate([pixels[..., :1]] * 3 + [pixels[..., 1:]], axis=2)
+
+    if pixels.shape[2] == 3:
+        pixels = numpy.concatenate([pixels, numpy.full((height, width, 1), 255, numpy.uint8)], axis=2)
+
+    pixels = numpy.ascontiguousarray(pixels, numpy.uint8)
+    image = QtGui.QImage(pixels.data, width, height, width * 4, QtGui.QImage.Format_RGBA8888)
+
+    if not image.save(path):
+        raise IOError("Could not write {}".format(path))
+
+
+def remove_proxies(path, levels=PROXY_LEVELS):
+    # Every proxy get_proxy_path can have written for path, whatever its bit depth
+    directory, file_name = os.path.split(path)
+    stem = os.path.splitext(file_name)[0]
+    removed = []
+
+    for level in levels:
+        for ext in WRITE_EXTENSIONS:
+            proxy_path = os.path.join(directory, PROXY_DIR, "{}_{}{}".format(stem, level, ext))
+
+            if os.path.isfile(proxy_path):
+                os.remove(proxy_path)
+                removed.append(proxy_path)
+
+    return removed
+
+
+def generate_proxies(src, levels=PROXY_LEVELS, force=False, target=None):
+    # Runs in a worker process, proxies newer than their source are kept. 16 bit sources get 16 bit proxies.
+    # They are written next to target, the path the file node ends up on, read from src which may not exist yet
+    high_bit_depth = texture_converter.get_bit_depth(src)[0] > 8
+    paths = OrderedDict((level, get_proxy_path(target or src, level, high_bit_depth)) for level in levels)
+    src_mtime = os.path.getmtime(src)
+
+    if not force and all(os.path.isfile(p) and os.path.getmtime(p) >= src_mtime for p in paths.values()):
+        return {"source": src, "proxies": paths, "generated": False}
+
+    proxy_dir = os.path.dirname(next(iter(paths.values())))
+
+    if not os.path.isdir(proxy_dir):
+        os.makedirs(proxy_dir, exist_ok=True)
+
+    mipmaps = texture_converter.build_mipmaps(texture_converter.read_pixels(src), max(levels.values()))
+
+    for level, path in paths.items():
+        _write_pixels(mipmaps[min(levels[level], len(mipmaps) - 1)], path)
+
+    return {"source": src, "proxies": paths, "generated": True}
+
+
+class TextureProxyService(object):
+    def __init__(self, max_workers=MAX_WORKERS):
+        self.max_workers = max_workers
+        self._executor = None
+
+    @property
+    def executor(self):
+        if self._executor is None:
+            # Imported here, asset_thumbnails pulls in the library manager proxy generation has no use for
+            from maya_core.asset_library import asset_thumbnails
+
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers,
+                                                 mp_context=asset_thumbnails.get_mp_context())
+
+        return self._executor
+
+    def submit(self, tex_paths, force=False, targets=None):
+        # targets: source path -> path the file node points at, when the proxies belong to a different path
+        targets = targets or {}
+        futures = []
+
+        for tex_path in sorted(set(tex_paths)):
+            if os.path.splitext(tex_path)[-1].lower() not in SOURCE_EXTENSIONS or is_proxy_path(tex_path):
+                continue
+
+            # Sources deeper than read_pixels can keep are viewed at full resolution
+            if not texture_converter.can_read_pixels(tex_path):
+                continue
+
+            future = self.executor.submit(generate_proxies, tex_path, PROXY_LEVELS, force, targets.get(tex_path))
+            future.add_done_callback(_log_result)
+            futures.append(future)
+
+        return futures
+
+    def shutdown(self, wait=True):
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
+
+
+def _log_result(future):
+    if future.exception():
+        logger.error("Texture proxy generation failed: %s", future.exception())
+        return
+
+    result = future.result()
+
+    if result["generated"]:
+        logger.debug("Generated texture proxies for %s", os.path.basename(result["source"]))
+
+
+_service = None
+
+
+def get_service():
+    global _service
+
+    if _service is None:
+        _service = TextureProxyService()
+
+    return _service
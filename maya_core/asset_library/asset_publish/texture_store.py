@@ -0,0 +1,246 @@
+import os
+import shutil
+import sqlite3
+import logging
+import threading
+
+from maya_core.asset_library.asset_publish import texture_collector
+from maya_core.asset_library.asset_publish import texture_proxies
+
+logger = logging.getLogger(__name__)
+logger.setLevel(10)
+
+# Store is opt-in, publishes fall back to plain per-material copies when no root is configured
+TEXTURE_STORE_ROOT = os.environ.get("MAYA_CORE_TEXTURE_STORE")
+
+# hardlink: published paths stay under 03_lookdev/publish/materials, linked to the blob
+# direct: file nodes point straight into the store
+LINK_MODES = ["hardlink", "direct"]
+LINK_MODE = os.environ.get("MAYA_CORE_TEXTURE_STORE_MODE", "hardlink")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS blobs (
+    hash TEXT NOT NULL,
+    ext TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    PRIMARY KEY (hash, ext)
+);
+CREATE TABLE IF NOT EXISTS refs (
+    hash TEXT NOT NULL,
+    owner TEXT NOT NULL,
+    PRIMARY KEY (hash, owner)
+);
+CREATE INDEX IF NOT EXISTS refs_owner ON refs (owner);
+"""
+
+
+class TextureStore(object):
+    def __init__(self, root, link_mode=LINK_MODE):
+        if link_mode not in LINK_MODES:
+            raise ValueError("Invalid link mode {}, expected one of {}".format(link_mode, LINK_MODES))
+
+        self.root = root
+        self.link_mode = link_mode
+        self.blobs_root = os.path.join(root, "blobs")
+
+        if not os.path.isdir(self.blobs_root):
+            os.makedirs(self.blobs_root)
+
+        self._lock = threading.RLock()
+
+        self.connection = sqlite3.connect(os.path.join(root, "index.db"), check_same_thread=False,
+                                          isolation_level=None, timeout=60)
+        self.connection.executescript(SCHEMA)
+        self._migrate()
+
+    def close(self):
+        self.connection.close()
+
+    def _migrate(self):
+        # Stores written when blobs were keyed by hash alone, one content stored as .tif and .tiff lost a row
+        key = [row[1] for row in self.connection.execute("PRAGMA table_info(blobs)") if row[5]]
+
+        if key != ["hash"]:
+            return
+
+        self.connection.executescript("""
+            BEGIN IMMEDIATE;
+            ALTER TABLE blobs RENAME TO blobs_by_hash;
+            CREATE TABLE blobs (hash TEXT NOT NULL, ext TEXT NOT NULL, size INTEGER NOT NULL,
+                                PRIMARY KEY (hash, ext));
+            INSERT INTO blobs SELECT hash, ext, size FROM blobs_by_hash;
+            DROP TABLE blobs_by_hash;
+            COMMIT;
+        """)
+
+    def blob_path(self, file_hash, ext):
+        return os.path.join(self.blobs_root, file_hash[:2], file_hash + ext.lower())
+
+    def has_blob(self, file_hash, ext):
+        with self._lock:
+            row = self.connection.execute("SELECT 1 FROM blobs WHERE hash = ? AND ext = ?",
+                                          (file_hash, ext.lower())).fetchone()
+
+        return row is not None and os.path.isfile(self.blob_path(file_hash, ext))
+
+    def add(self, src, owner, file_hash=None):
+        # The source is read once: hashed while it is copied into the store, the copy is dropped when the blob exists
+        ext = os.path.splitext(src)[-1].lower()
+        copied = False
+
+        if file_hash is None:
+            tmp_path = os.path.join(self.blobs_root, "{}.{}.tmp".format(os.getpid(), threading.get_ident()))
+
+            try:
+                file_hash = texture_collector.copy_and_hash(src, tmp_path)
+                blob_path = self.blob_path(file_hash, ext)
+
+                # Reference before the blob is in place, a concurrent collect_garbage() then leaves it alone
+                with self._lock:
+                    self.connection.execute("INSERT OR IGNORE INTO refs (hash, owner) VALUES (?, ?)",
+                                            (file_hash, owner))
+
+                if not os.path.isfile(blob_path):
+                    os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+                    os.replace(tmp_path, blob_path)
+                    copied = True
+            finally:
+                if os.path.isfile(tmp_path):
+                    os.remove(tmp_path)
+        else:
+            blob_path = self.blob_path(file_hash, ext)
+
+            with self._lock:
+                self.connection.execute("INSERT OR IGNORE INTO refs (hash, owner) VALUES (?, ?)", (file_hash, owner))
+
+            if not os.path.isfile(blob_path):
+                os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+
+                if texture_collector.copy_and_hash(src, blob_path) != file_hash:
+                    os.remove(blob_path)
+                    raise IOError("{} changed since it was hashed".format(src))
+
+                copied = True
+
+        with self._lock:
+            self.connection.execute("INSERT OR IGNORE INTO blobs (hash, ext, size) VALUES (?, ?, ?)",
+                                    (file_hash, ext, os.path.getsize(blob_path)))
+
+        return blob_path, file_hash, copied
+
+    def link(self, blob_path, dst):
+        if os.path.isfile(dst):
+            if os.path.samefile(blob_path, dst):
+                return dst
+
+            os.remove(dst)
+
+        try:
+            os.link(blob_path, dst)
+        except OSError:
+            # Different volume or no hardlink support on the share
+            shutil.copyfile(blob_path, dst)
+
+        return dst
+
+    def store(self, src, dst, owner, file_hash=None):
+        blob_path, file_hash, copied = self.add(src, owner, file_hash=file_hash)
+
+        if self.link_mode == "direct":
+            return blob_path, file_hash, copied
+
+        dst_dir = os.path.dirname(dst)
+        if not os.path.isdir(dst_dir):
+            os.makedirs(dst_dir, exist_ok=True)
+
+        return self.link(blob_path, dst), file_hash, copied
+
+    def release(self, owner):
+        with self._lock:
+            cursor = self.connection.execute("DELETE FROM refs WHERE owner = ?", (owner,))
+
+        logger.debug("Released %s texture references for %s", cursor.rowcount, owner)
+
+        return cursor.rowcount
+
+    def release_stale(self, owner, keep_hashes):
+        # Drops the owner's references to anything outside keep_hashes in one transaction. Called once the new
+        # references are added, the owner is never left without the blobs its published files point at
+        keep_hashes = set(keep_hashes)
+
+        with self._lock:
+            self.connection.execute("BEGIN IMMEDIATE")
+
+            try:
+                rows = self.connection.execute("SELECT hash FROM refs WHERE owner = ?", (owner,)).fetchall()
+                stale = [(file_hash, owner) for file_hash, in rows if file_hash not in keep_hashes]
+
+                self.connection.executemany("DELETE FROM refs WHERE hash = ? AND owner = ?", stale)
+            except Exception:
+                self.connection.execute("ROLLBACK")
+                raise
+
+            self.connection.execute("COMMIT")
+
+        logger.debug("Released %s stale texture references for %s", len(stale), owner)
+
+        return len(stale)
+
+    def ref_count(self, file_hash):
+        with self._lock:
+            return self.connection.execute("SELECT COUNT(*) FROM refs WHERE hash = ?", (file_hash,)).fetchone()[0]
+
+    def collect_garbage(self, dry_run=False):
+        freed = 0
+        removed = []
+
+        with self._lock:
+            self.connection.execute("BEGIN IMMEDIATE")
+
+            rows = self.connection.execute("SELECT hash, ext, size FROM blobs WHERE hash NOT IN "
+                                           "(SELECT DISTINCT hash FROM refs)").fetchall()
+
+            for file_hash, ext, size in rows:
+                blob_path = self.blob_path(file_hash, ext)
+                removed.append(blob_path)
+                freed += size
+
+                if dry_run:
+                    continue
+
+                if os.path.isfile(blob_path):
+                    os.remove(blob_path)
+
+                # In direct mode file nodes point at blobs, their viewport proxies sit in the blob directory
+                texture_proxies.remove_proxies(blob_path)
+
+                self.connection.execute("DELETE FROM blobs WHERE hash = ? AND ext = ?", (file_hash, ext))
+
+            self.connection.execute("ROLLBACK" if dry_run else "COMMIT")
+
+        logger.info("Texture store garbage collection %s %s blobs, %.1f MB", "found" if dry_run else "removed",
+                    len(removed), freed / 1048576.0)
+
+        return removed, freed
+
+    def stats(self):
+        with self._lock:
+            blobs, size = self.connection.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM blobs").fetchone()
+            refs = self.connection.execute("SELECT COUNT(*) FROM refs").fetchone()[0]
+
+        return {"blobs": blobs, "bytes": size, "refs": refs}
+
+
+_default_store = None
+
+
+def get_default_store():
+    global _default_store
+
+    if not TEXTURE_STORE_ROOT:
+        return None
+
+    if _default_store is None:
+        _default_store = TextureStore(TEXTURE_STORE_ROOT)
+
+    return _default_store
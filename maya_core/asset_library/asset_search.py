@@ -0,0 +1,519 @@
+import re
+import time
+import random
+import logging
+from bisect import bisect_left
+
+from tools_core.asset_library import library_manager as lm
+
+logger = logging.getLogger(__name__)
+logger.setLevel(10)
+
+# Query field -> how its terms are pulled out of asset_data
+FIELDS = ["name", "tag", "type", "shader", "role", "library"]
+
+# Unfielded query terms match any of these
+DEFAULT_FIELDS = ["name", "tag", "type", "shader", "role"]
+
+_SPLIT_RE = re.compile(r"[^0-9a-z]+")
+_CAMEL_RE = re.compile(r"([a-z])([A-Z])")
+_QUERY_RE = re.compile(r"\(|\)|[^\s()]+")
+
+
+def tokenize(text):
+    # "rockCliff_01" -> rockcliff_01, rock, cliff, 01
+    if not text:
+        return []
+
+    text = str(text)
+    tokens = [text.lower()]
+
+    for token in _SPLIT_RE.split(_CAMEL_RE.sub(r"\1 \2", text).lower()):
+        if token and token not in tokens:
+            tokens.append(token)
+
+    return tokens
+
+
+def get_asset_terms(library, asset_data):
+    terms = set()
+
+    for token in tokenize(asset_data.get("asset_name")):
+        terms.add(("name", token))
+
+    for tag in asset_data.get("tags") or []:
+        for token in tokenize(tag):
+            terms.add(("tag", token))
+
+    for token in tokenize(asset_data.get("asset_type")):
+        terms.add(("type", token))
+
+    terms.add(("library", library.lower()))
+
+    for material in asset_data.get("materials") or []:
+        if material.get("material_shader"):
+            terms.add(("shader", material["material_shader"].lower()))
+
+        for role, textures in (material.get("textures") or {}).items():
+            if textures:
+                terms.add(("role", role.lower()))
+
+    return terms
+
+
+def _deletes(term):
+    return set(term[:i] + term[i + 1:] for i in range(len(term)))
+
+
+def _within_one_edit(a, b):
+    if a == b:
+        return True
+
+    if abs(len(a) - len(b)) > 1:
+        return False
+
+    if len(a) == len(b):
+        diff = [i for i in range(len(a)) if a[i] != b[i]]
+
+        # Substitution, or a swap of two neighbouring characters
+        return len(diff) == 1 or (len(diff) == 2 and diff[1] == diff[0] + 1 and
+                                  a[diff[0]] == b[diff[1]] and a[diff[1]] == b[diff[0]])
+
+    if len(a) > len(b):
+        a, b = b, a
+
+    return any(b[:i] + b[i + 1:] == a for i in range(len(b)))
+
+
+def _is_fuzzy_term(term):
+    # Numbered names and ids are unique per asset, fuzzy matching them only bloats the deletion table
+    return len(term) >= 3 and term.isalpha()
+
+
+def _to_bitmap(doc_ids):
+    if not doc_ids:
+        return 0
+
+    bits = bytearray((max(doc_ids) >> 3) + 1)
+
+    for doc_id in doc_ids:
+        bits[doc_id >> 3] |= 1 << (doc_id & 7)
+
+    return int.from_bytes(bytes(bits), "little")
+
+
+def _iter_bits(bitmap, limit=None):
+    # Reversed binary string, so character i is doc id i and str.find does the scanning
+    bits = bin(bitmap)[:1:-1]
+    found = 0
+    position = bits.find("1")
+
+    while position != -1 and (limit is None or found < limit):
+        yield position
+        found += 1
+        position = bits.find("1", position + 1)
+
+
+def _bit_count(bitmap):
+    return bin(bitmap).count("1")
+
+
+class QueryError(ValueError):
+    pass
+
+
+class AssetSearchIndex(object):
+    def __init__(self):
+        # asset key (library, asset_name) <-> int doc id
+        self._doc_ids = {}
+        self._docs = []
+        self._free_ids = []
+
+        # (field, term) -> set of doc ids, doc id -> its terms for incremental removal
+        self._postings = {}
+        self._doc_terms = {}
+
+        # Queries run on int bitmaps, built from the postings on first use and dropped when they change
+        self._bitmaps = {}
+        self._all_bitmap = None
+
+        # Prefix and fuzzy expansions are cached until their field changes
+        self._generations = dict((field, 0) for field in FIELDS)
+        self._expansions = {}
+
+        # field -> sorted terms for prefix lookups, field -> single-deletion variant -> terms for fuzzy lookups
+        self._sorted_terms = {}
+        self._deletes = {}
+
+    def __len__(self):
+        return len(self._doc_terms)
+
+    def _get_doc_id(self, key):
+        doc_id = self._doc_ids.get(key)
+
+        if doc_id is None:
+            if self._free_ids:
+                doc_id = self._free_ids.pop()
+                self._docs[doc_id] = key
+            else:
+                doc_id = len(self._docs)
+                self._docs.append(key)
+
+            self._doc_ids[key] = doc_id
+            self._all_bitmap = None
+
+        return doc_id
+
+    def _add_deletes(self, field, term):
+        field_deletes = self._deletes.get(field)
+
+        if field_deletes is None or not _is_fuzzy_term(term):
+            return
+
+        for variant in _deletes(term) | {term}:
+            field_deletes.setdefault(variant, set()).add(term)
+
+    def _remove_deletes(self, field, term):
+        field_deletes = self._deletes.get(field)
+
+        if field_deletes is None or not _is_fuzzy_term(term):
+            return
+
+        for variant in _deletes(term) | {term}:
+            terms = field_deletes.get(variant)
+
+            if terms is not None:
+                terms.discard(term)
+
+                if not terms:
+                    del field_deletes[variant]
+
+    def _add_term(self, field_term, doc_id):
+        field, term = field_term
+        postings = self._postings.get(field_term)
+
+        if postings is None:
+            postings = self._postings[field_term] = set()
+
+            self._sorted_terms.pop(field, None)
+            self._add_deletes(field, term)
+
+        postings.add(doc_id)
+
+        self._bitmaps.pop(field_term, None)
+        self._generations[field] += 1
+
+    def _remove_term(self, field_term, doc_id):
+        field, term = field_term
+        postings = self._postings.get(field_term)
+
+        if postings is None:
+            return
+
+        postings.discard(doc_id)
+
+        self._bitmaps.pop(field_term, None)
+        self._generations[field] += 1
+
+        if postings:
+            return
+
+        del self._postings[field_term]
+
+        self._sorted_terms.pop(field, None)
+        self._remove_deletes(field, term)
+
+    def update_asset(self, library, asset_data):
+        key = (library, asset_data["asset_name"])
+        doc_id = self._get_doc_id(key)
+
+        old_terms = self._doc_terms.get(doc_id, set())
+        new_terms = get_asset_terms(library, asset_data)
+
+        for field_term in old_terms - new_terms:
+            self._remove_term(field_term, doc_id)
+
+        for field_term in new_terms - old_terms:
+            self._add_term(field_term, doc_id)
+
+        self._doc_terms[doc_id] = new_terms
+
+    def remove_asset(self, library, asset_name):
+        doc_id = self._doc_ids.pop((library, asset_name), None)
+
+        if doc_id is None:
+            return
+
+        for field_term in self._doc_terms.pop(doc_id):
+            self._remove_term(field_term, doc_id)
+
+        self._docs[doc_id] = None
+        self._free_ids.append(doc_id)
+        self._all_bitmap = None
+
+    def add_library(self, library, library_data):
+        for asset_data in library_data["assets"].values():
+            self.update_asset(library, asset_data)
+
+    def _get_bitmap(self, field_term):
+        bitmap = self._bitmaps.get(field_term)
+
+        if bitmap is None:
+            bitmap = self._bitmaps[field_term] = _to_bitmap(self._postings.get(field_term))
+
+        return bitmap
+
+    def _get_all_bitmap(self):
+        if self._all_bitmap is None:
+            self._all_bitmap = _to_bitmap(self._doc_terms.keys())
+
+        return self._all_bitmap
+
+    def _get_sorted_terms(self, field):
+        sorted_terms = self._sorted_terms.get(field)
+
+        if sorted_terms is None:
+            sorted_terms = self._sorted_terms[field] = sorted(t for f, t in self._postings if f == field)
+
+        return sorted_terms
+
+    def _get_deletes(self, field):
+        if field not in self._deletes:
+            self._deletes[field] = {}
+
+            for f, term in self._postings:
+                if f == field:
+                    self._add_deletes(field, term)
+
+        return self._deletes[field]
+
+    def _expand_prefix(self, field, prefix):
+        sorted_terms = self._get_sorted_terms(field)
+        terms = []
+
+        for i in range(bisect_left(sorted_terms, prefix), len(sorted_terms)):
+            if not sorted_terms[i].startswith(prefix):
+                break
+
+            terms.append(sorted_terms[i])
+
+        return terms
+
+    def _expand_fuzzy(self, field, term):
+        field_deletes = self._get_deletes(field)
+        candidates = set()
+
+        for variant in _deletes(term) | {term}:
+            candidates |= field_deletes.get(variant, set())
+
+        return [c for c in candidates if _within_one_edit(term, c)]
+
+    def _match_expanded(self, kind, field, value):
+        key = (kind, field, value)
+        cached = self._expansions.get(key)
+
+        if cached is not None and cached[0] == self._generations[field]:
+            return cached[1]
+
+        expand = self._expand_prefix if kind == "prefix" else self._expand_fuzzy
+        terms = expand(field, value)
+
+        if len(terms) == 1:
+            bitmap = self._get_bitmap((field, terms[0]))
+        else:
+            doc_ids = set()
+
+            for term in terms:
+                doc_ids |= self._postings[(field, term)]
+
+            bitmap = _to_bitmap(doc_ids)
+
+        self._expansions[key] = (self._generations[field], bitmap)
+
+        return bitmap
+
+    def _match(self, text):
+        # field:value, value* for prefix, value~ for one edit of fuzziness
+        if ":" in text:
+            field, value = text.split(":", 1)
+            field = field.lower()
+
+            if field not in FIELDS:
+                raise QueryError("Unknown search field {}".format(field))
+
+            fields = [field]
+        else:
+            fields = DEFAULT_FIELDS
+            value = text
+
+        value = value.lower()
+
+        if value.endswith("*"):
+            kind, value = "prefix", value[:-1]
+        elif value.endswith("~"):
+            kind, value = "fuzzy", value[:-1]
+        else:
+            kind = "term"
+
+        if not value:
+            raise QueryError("Empty search term {}".format(text))
+
+        bitmap = 0
+
+        for field in fields:
+            if kind == "term":
+                bitmap |= self._get_bitmap((field, value))
+            else:
+                bitmap |= self._match_expanded(kind, field, value)
+
+        return bitmap
+
+    def _parse_or(self, tokens):
+        bitmap = self._parse_and(tokens)
+
+        while tokens and tokens[0] == "OR":
+            tokens.pop(0)
+            bitmap |= self._parse_and(tokens)
+
+        return bitmap
+
+    def _parse_and(self, tokens):
+        bitmap = None
+
+        while tokens and tokens[0] not in ("OR", ")"):
+            if tokens[0] == "AND":
+                tokens.pop(0)
+                continue
+
+            operand = self._parse_not(tokens)
+            bitmap = operand if bitmap is None else bitmap & operand
+
+        if bitmap is None:
+            raise QueryError("Expected a search term")
+
+        return bitmap
+
+    def _parse_not(self, tokens):
+        token = tokens.pop(0)
+
+        if token == "NOT":
+            if not tokens:
+                raise QueryError("Expected a search term after NOT")
+            return self._get_all_bitmap() & ~self._parse_not(tokens)
+
+        if token.startswith("-") and len(token) > 1:
+            return self._get_all_bitmap() & ~self._match(token[1:])
+
+        if token == "(":
+            bitmap = self._parse_or(tokens)
+
+            if not tokens or tokens.pop(0) != ")":
+                raise QueryError("Unbalanced parentheses")
+
+            return bitmap
+
+        return self._match(token)
+
+    def query(self, query):
+        # "tag:kitbash role:roughness", "rock* OR cliff~", "type:prop NOT (tag:kitbash OR shader:vraymtl)"
+        tokens = _QUERY_RE.findall(query)
+
+        if not tokens:
+            return 0
+
+        bitmap = self._parse_or(tokens)
+
+        if tokens:
+            raise QueryError("Unexpected {}".format(tokens[0]))
+
+        return bitmap
+
+    def count(self, query):
+        return _bit_count(self.query(query))
+
+    def search(self, query, limit=None):
+        # (library, asset_name) keys in index order
+        return [self._docs[doc_id] for doc_id in _iter_bits(self.query(query), limit)]
+
+
+_index = None
+
+
+def build_index(libraries=None):
+    index = AssetSearchIndex()
+    start = time.time()
+
+    for library in libraries or lm.LIBRARIES.keys():
+        library_data = lm.get_library_data(library)
+
+        if library_data:
+            index.add_library(library, library_data)
+
+    logger.info("Indexed %s assets in %.2fs", len(index), time.time() - start)
+
+    return index
+
+
+def get_index():
+    global _index
+
+    if _index is None:
+        _index = build_index()
+
+    return _index
+
+
+def search(query, limit=None):
+    return get_index().search(query, limit)
+
+
+def write_asset_data(library, asset_name, asset_data):
+    # Publishers write through here so an index that is already built stays current
+    lm.write_asset_data(library, asset_name, asset_data)
+
+    if _index is not None:
+        _index.update_asset(library, asset_data)
+
+
+def benchmark(asset_count=100000, repeat=200):
+    words = ["rock", "cliff", "stone", "wall", "crate", "barrel", "pipe", "panel", "tree", "bush", "debris", "beam"]
+    tags = ["kitbash", "megascan", "scifi", "nature", "urban", "hero", "background"]
+    roles = ["diffuse", "specular", "gloss", "roughness", "normal", "metal"]
+
+    rng = random.Random(0)
+    index = AssetSearchIndex()
+
+    start = time.perf_counter()
+
+    for i in range(asset_count):
+        index.update_asset("Prop", {
+            "asset_name": "{}{}_{:05d}".format(rng.choice(words), rng.choice(words).capitalize(), i),
+            "asset_type": "Prop",
+            "tags": rng.sample(tags, 2),
+            "materials": [{"material_shader": rng.choice(["VRayMtl", "aiStandardSurface"]),
+                           "textures": {role: "x" for role in rng.sample(roles, 3)}}]
+        })
+
+    results = {"build": time.perf_counter() - start}
+
+    queries = ["tag:kitbash role:roughness", "crat*", "barel~", "rock OR cliff NOT tag:hero",
+               "shader:vraymtl (tag:urban OR tag:scifi) -role:metal", "name:pipe_00042"]
+
+    # First use builds the bitmaps and expansions, the timings below are for repeated queries
+    for query in queries:
+        index.query(query)
+
+    for query in queries:
+        start = time.perf_counter()
+
+        for _ in range(repeat):
+            found = index.search(query, limit=100)
+
+        results[query] = ((time.perf_counter() - start) / repeat * 1000, index.count(query), len(found))
+
+    return results
+
+
+if __name__ == "__main__":
+    for name, result in benchmark().items():
+        print(name, result)
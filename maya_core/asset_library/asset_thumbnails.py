@@ -0,0 +1,237 @@
+import os
+import sys
+import json
+import hashlib
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from tools_core.asset_library import library_manager as lm
+from maya_core.asset_library import asset_search
+
+logger = logging.getLogger(__name__)
+logger.setLevel(10)
+
+THUMBNAIL_SIZES = (128, 256, 512)
+
+THUMBNAIL_DIR = "thumbnails"
+
+THUMBNAIL_FORMAT = "png"
+
+CACHE_NAME = "thumbnails.json"
+
+# Bump when the resize settings change so existing caches are regenerated
+CACHE_VERSION = 1
+
+MAX_WORKERS = max(1, (os.cpu_count() or 2) - 1)
+
+
+def get_thumbnail_dir(asset_root_path):
+    return os.path.join(asset_root_path, THUMBNAIL_DIR)
+
+
+def get_thumbnail_paths(asset_root_path, asset_name, sizes=THUMBNAIL_SIZES):
+    thumbnail_dir = get_thumbnail_dir(asset_root_path)
+
+    return {str(size): os.path.join(thumbnail_dir, "{}_{}.{}".format(asset_name, size, THUMBNAIL_FORMAT))
+            for size in sizes}
+
+
+def get_cache_key(source, sizes=THUMBNAIL_SIZES):
+    hasher = hashlib.sha1()
+    hasher.update(json.dumps([CACHE_VERSION, sorted(sizes)]).encode("utf-8"))
+
+    with open(source, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            hasher.update(chunk)
+
+    return hasher.hexdigest()
+
+
+def _load_cache(thumbnail_dir):
+    cache_path = os.path.join(thumbnail_dir, CACHE_NAME)
+
+    if not os.path.isfile(cache_path):
+        return {}
+
+    try:
+        with open(cache_path, "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_cache(thumbnail_dir, cache):
+    with open(os.path.join(thumbnail_dir, CACHE_NAME), "w") as f:
+        json.dump(cache, f, indent=4)
+
+
+def _resize_pillow(source, targets):
+    from PIL import Image
+
+    image = Image.open(source)
+
+    # Let the JPEG decoder skip straight to a reduced scale
+    largest = max(targets)
+    image.draft("RGB", (largest, largest))
+    image = image.convert("RGBA" if "A" in image.getbands() else "RGB")
+
+    # Largest first, each size is downscaled from the previous one
+    for size in sorted(targets, reverse=True):
+        image.thumbnail((size, size), Image.LANCZOS)
+        image.save(targets[size])
+
+
+def _resize_qt(source, targets):
+    from PySide2 import QtCore
+    from PySide2 import QtGui
+
+    image = QtGui.QImage(source)
+
+    if image.isNull():
+        raise IOError("Could not read {}".format(source))
+
+    for size in sorted(targets, reverse=True):
+        image = image.scaled(size, size, QtCore.Qt.KeepAspectRatio, QtCore.Qt.SmoothTransformation)
+        image.save(targets[size])
+
+
+def generate_thumbnails(source, asset_root_path, asset_name, sizes=THUMBNAIL_SIZES, force=False):
+    thumbnail_dir = get_thumbnail_dir(asset_root_path)
+    paths = get_thumbnail_paths(asset_root_path, asset_name, sizes)
+
+    if not os.path.isdir(thumbnail_dir):
+        os.makedirs(thumbnail_dir, exist_ok=True)
+
+    key = get_cache_key(source, sizes)
+    cache = _load_cache(thumbnail_dir)
+
+    if not force and cache.get(asset_name) == key and all(os.path.isfile(p) for p in paths.values()):
+        return {"asset_name": asset_name, "thumbnails": paths, "generated": False}
+
+    targets = {int(size): path for size, path in paths.items()}
+
+    try:
+        _resize_pillow(source, targets)
+    except ImportError:
+        _resize_qt(source, targets)
+
+    # Re-read right before writing, assets published without their own root share a directory
+    cache = _load_cache(thumbnail_dir)
+    cache[asset_name] = key
+    _save_cache(thumbnail_dir, cache)
+
+    return {"asset_name": asset_name, "thumbnails": paths, "generated": True}
+
+
+def get_mp_context():
+    context = multiprocessing.get_context("spawn")
+
+    # Inside a Maya GUI session sys.executable is maya(.exe), workers have to run under mayapy
+    executable = os.path.basename(sys.executable).lower()
+    if executable.startswith("maya") and not executable.startswith("mayapy"):
+        mayapy = os.path.join(os.path.dirname(sys.executable), "mayapy" + (".exe" if os.name == "nt" else ""))
+        context.set_executable(mayapy)
+
+    return context
+
+
+class ThumbnailService(object):
+    def __init__(self, max_workers=MAX_WORKERS):
+        self.max_workers = max_workers
+        self._executor = None
+
+    @property
+    def executor(self):
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=get_mp_context())
+
+        return self._executor
+
+    def submit(self, source, asset_root_path, asset_name, sizes=THUMBNAIL_SIZES, force=False):
+        future = self.executor.submit(generate_thumbnails, source, asset_root_path, asset_name, sizes, force)
+        future.add_done_callback(_log_result)
+        return future
+
+    def shutdown(self, wait=True):
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
+
+
+def _log_result(future):
+    if future.exception():
+        logger.error("Thumbnail generation failed: %s", future.exception())
+        return
+
+    result = future.result()
+
+    if result["generated"]:
+        logger.debug("Generated thumbnails for %s", result["asset_name"])
+
+
+_service = None
+
+
+def get_service():
+    global _service
+
+    if _service is None:
+        _service = ThumbnailService()
+
+    return _service
+
+
+def get_asset_root_path(asset_data):
+    if asset_data.get("asset_path") and os.path.isdir(asset_data["asset_path"]):
+        return asset_data["asset_path"]
+
+    if asset_data.get("maya_file"):
+        return os.path.dirname(asset_data["maya_file"])
+
+    return None
+
+
+def backfill_library(library, force=False, max_workers=MAX_WORKERS):
+    library_data = lm.get_library_data(library)
+
+    if not library_data:
+        return {}
+
+    service = ThumbnailService(max_workers=max_workers)
+    futures = {}
+
+    for asset_name, asset_data in library_data["assets"].items():
+        preview = asset_data.get("asset_preview")
+        asset_root_path = get_asset_root_path(asset_data)
+
+        if not preview or not asset_root_path or not os.path.isfile(preview):
+            continue
+
+        futures[service.executor.submit(generate_thumbnails, preview, asset_root_path, asset_name,
+                                        THUMBNAIL_SIZES, force)] = asset_data
+
+    results = {}
+
+    for future in as_completed(futures):
+        asset_data = futures[future]
+
+        try:
+            result = future.result()
+        except Exception as e:
+            logger.error("Could not build thumbnails for %s: %s", asset_data["asset_name"], e)
+            continue
+
+        results[result["asset_name"]] = result
+
+        if asset_data.get("asset_thumbnails") != result["thumbnails"]:
+            asset_data["asset_thumbnails"] = result["thumbnails"]
+            asset_search.write_asset_data(library, asset_data["asset_name"], asset_data)
+
+    service.shutdown()
+
+    generated = len([r for r in results.values() if r["generated"]])
+    logger.info("Backfilled %s thumbnails in %s (%s already up to date)", generated, library,
+                len(results) - generated)
+
+    return results
@@ -0,0 +1,265 @@
+import json
+import time
+import sqlite3
+import logging
+import threading
+import traceback
+from functools import partial
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+logger.setLevel(10)
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_key TEXT PRIMARY KEY,
+    payload TEXT NOT NULL,
+    state TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    queued_at REAL,
+    started_at REAL,
+    finished_at REAL,
+    next_attempt_at REAL NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS job_stages (
+    job_key TEXT NOT NULL,
+    attempt INTEGER NOT NULL,
+    stage TEXT NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    error TEXT,
+    PRIMARY KEY (job_key, attempt, stage)
+);
+CREATE INDEX IF NOT EXISTS jobs_state ON jobs (state, next_attempt_at);
+"""
+
+
+class JobQueue(object):
+    def __init__(self, db_path, max_attempts=3, backoff=30.0, clock=time.time, sleep=time.sleep, retry_failed=True):
+        self.db_path = db_path
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.clock = clock
+        self.sleep = sleep
+
+        self._lock = threading.RLock()
+
+        self.connection = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.executescript(SCHEMA)
+        self._migrate()
+
+        self.recover()
+
+        # A restarted batch gives jobs that used up their attempts another round
+        if retry_failed:
+            self.retry_failed()
+
+    def close(self):
+        self.connection.close()
+
+    def _migrate(self):
+        # Queues written before stage errors were recorded
+        columns = [row["name"] for row in self.connection.execute("PRAGMA table_info(job_stages)")]
+
+        if "error" not in columns:
+            self.connection.execute("ALTER TABLE job_stages ADD COLUMN error TEXT")
+
+    def recover(self):
+        # Jobs left running belong to a batch that died, put them back in the queue
+        with self._lock:
+            cursor = self.connection.execute("UPDATE jobs SET state = ? WHERE state = ?", (PENDING, RUNNING))
+
+        if cursor.rowcount:
+            logger.info("Recovered %s interrupted jobs", cursor.rowcount)
+
+    def retry_failed(self):
+        with self._lock:
+            cursor = self.connection.execute("UPDATE jobs SET state = ?, attempts = 0, next_attempt_at = 0 "
+                                             "WHERE state = ?", (PENDING, FAILED))
+
+        if cursor.rowcount:
+            logger.info("Queued %s failed jobs again", cursor.rowcount)
+
+        return cursor.rowcount
+
+    def add_job(self, job_key, payload):
+        # Jobs not done yet take the new payload, done ones are left as they were built. True when the job is new
+        with self._lock:
+            cursor = self.connection.execute(
+                "INSERT OR IGNORE INTO jobs (job_key, payload, state, queued_at) VALUES (?, ?, ?, ?)",
+                (job_key, json.dumps(payload), PENDING, self.clock()))
+
+            if cursor.rowcount:
+                return True
+
+            self.connection.execute("UPDATE jobs SET payload = ? WHERE job_key = ? AND state != ?",
+                                    (json.dumps(payload), job_key, DONE))
+
+        return False
+
+    def add_jobs(self, jobs):
+        added = 0
+
+        with self._lock:
+            self.connection.execute("BEGIN")
+            for job_key, payload in jobs:
+                added += self.add_job(job_key, payload)
+            self.connection.execute("COMMIT")
+
+        return added
+
+    def claim(self):
+        now = self.clock()
+
+        with self._lock:
+            row = self.connection.execute(
+                "SELECT * FROM jobs WHERE (state = ? OR (state = ? AND attempts < ?)) AND next_attempt_at <= ? "
+                "ORDER BY attempts, queued_at LIMIT 1", (PENDING, FAILED, self.max_attempts, now)).fetchone()
+
+            if row is None:
+                return None
+
+            self.connection.execute("UPDATE jobs SET state = ?, attempts = attempts + 1, started_at = ?, "
+                                    "finished_at = NULL WHERE job_key = ?", (RUNNING, now, row["job_key"]))
+
+        return row["job_key"], json.loads(row["payload"])
+
+    def mark_done(self, job_key):
+        with self._lock:
+            self.connection.execute("UPDATE jobs SET state = ?, error = NULL, finished_at = ? WHERE job_key = ?",
+                                    (DONE, self.clock(), job_key))
+
+    def mark_failed(self, job_key, error=None):
+        now = self.clock()
+
+        with self._lock:
+            attempts = self.connection.execute("SELECT attempts FROM jobs WHERE job_key = ?",
+                                               (job_key,)).fetchone()["attempts"]
+
+            next_attempt_at = now + self.backoff * (2 ** max(attempts - 1, 0))
+
+            self.connection.execute("UPDATE jobs SET state = ?, error = ?, finished_at = ?, next_attempt_at = ? "
+                                    "WHERE job_key = ?", (FAILED, error, now, next_attempt_at, job_key))
+
+    def _get_attempt(self, job_key):
+        return self.connection.execute("SELECT attempts FROM jobs WHERE job_key = ?",
+                                       (job_key,)).fetchone()["attempts"]
+
+    @contextmanager
+    def stage(self, job_key, stage):
+        # Finished either way, a stage that raised keeps its traceback
+        with self._lock:
+            attempt = self._get_attempt(job_key)
+            self.connection.execute("INSERT OR REPLACE INTO job_stages (job_key, attempt, stage, started_at) "
+                                    "VALUES (?, ?, ?, ?)", (job_key, attempt, stage, self.clock()))
+
+        error = None
+
+        try:
+            yield
+        except BaseException:
+            error = traceback.format_exc()
+            raise
+        finally:
+            with self._lock:
+                self.connection.execute("UPDATE job_stages SET finished_at = ?, error = ? WHERE job_key = ? AND "
+                                        "attempt = ? AND stage = ?", (self.clock(), error, job_key, attempt, stage))
+
+    def record_stages(self, job_key, stages):
+        # Stages timed elsewhere, e.g. by a worker process, as dicts with stage, started_at, finished_at and error
+        with self._lock:
+            attempt = self._get_attempt(job_key)
+
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO job_stages (job_key, attempt, stage, started_at, finished_at, error) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [(job_key, attempt, s["stage"], s.get("started_at"), s.get("finished_at"), s.get("error"))
+                 for s in stages])
+
+    def next_retry_time(self):
+        with self._lock:
+            row = self.connection.execute("SELECT MIN(next_attempt_at) FROM jobs WHERE state = ? AND attempts < ?",
+                                          (FAILED, self.max_attempts)).fetchone()
+
+        return row[0]
+
+    def has_work(self):
+        with self._lock:
+            row = self.connection.execute("SELECT COUNT(*) FROM jobs WHERE state IN (?, ?) OR "
+                                          "(state = ? AND attempts < ?)",
+                                          (PENDING, RUNNING, FAILED, self.max_attempts)).fetchone()
+
+        return bool(row[0])
+
+    def wait_for_retry(self):
+        retry_time = self.next_retry_time()
+
+        if retry_time is None:
+            return False
+
+        delay = retry_time - self.clock()
+
+        if delay > 0:
+            logger.info("Waiting %.1fs before retrying failed jobs", delay)
+            self.sleep(delay)
+
+        return True
+
+    def get_job(self, job_key):
+        with self._lock:
+            row = self.connection.execute("SELECT * FROM jobs WHERE job_key = ?", (job_key,)).fetchone()
+
+        if row is None:
+            return None
+
+        return dict(row)
+
+    def get_stages(self, job_key):
+        with self._lock:
+            rows = self.connection.execute("SELECT * FROM job_stages WHERE job_key = ? ORDER BY attempt, started_at",
+                                           (job_key,)).fetchall()
+
+        return [dict(row) for row in rows]
+
+    def stats(self):
+        with self._lock:
+            rows = self.connection.execute("SELECT state, COUNT(*) FROM jobs GROUP BY state").fetchall()
+
+        stats = {PENDING: 0, RUNNING: 0, DONE: 0, FAILED: 0}
+        stats.update({row[0]: row[1] for row in rows})
+
+        return stats
+
+    def run(self, builder, wait=True):
+        while True:
+            claimed = self.claim()
+
+            if claimed is None:
+                if wait and self.wait_for_retry():
+                    continue
+                break
+
+            job_key, payload = claimed
+
+            # The builder opens its own stages, stage("import") etc., on the claimed job
+            try:
+                builder(payload, partial(self.stage, job_key))
+            except Exception:
+                logger.error("Job %s failed", job_key)
+                self.mark_failed(job_key, traceback.format_exc())
+                continue
+
+            self.mark_done(job_key)
+            logger.info("Job %s done", job_key)
+
+        stats = self.stats()
+        logger.info("Job queue finished, %s done, %s failed", stats[DONE], stats[FAILED])
+
+        return stats
@@ -1,7 +1,9 @@
 import os
 import sys
 import json
+import time
 import logging
+import traceback
 
 import maya.standalone as standalone
 
@@ -12,9 +14,11 @@ import maya.mel as mel
 import pymel.core as pm
 
 from maya_core.maya_asset import MayaAsset
-from maya_core.pipeline.lookdev.material_builder import MaterialBuilder as mb
-from tools_core.asset_library import library_manager as lm
+from maya_core.pipeline.lookdev.material_builder import shading_graph_executor
 from maya_core.pipeline.modeling.normalize_scale import normalize_scale as ns
+from maya_core.common_utils import profiling
+from maya_core.asset_library import asset_search
+from maya_core.asset_library.megascan_builder.megascan_worker_pool import RESULT_PREFIX
 
 logging.basicConfig()
 logger = logging.getLogger(__name__)
@@ -41,118 +45,170 @@ def create_world_node_file(asset):
         logger.info("Successfully built %s maya file", asset_name)
 
 
-def build_megascan_model(asset_data):
-    asset = MayaAsset.MayaAsset(asset_data)
+@profiling.profiled(flush=True)
+def build_megascan_model(asset_data, stages=None):
+    # stages: list the stage records are appended to, the worker reports them back to the job queue
+    with profiling.stages("build_megascan_model", records=stages) as timer:
+        asset = MayaAsset.MayaAsset(asset_data)
 
-    asset_name = asset_data["asset_name"]
-    asset_path = asset_data["asset_path"]
+        asset_name = asset_data["asset_name"]
+        asset_path = asset_data["asset_path"]
 
-    # Build maya asset world node
-    create_world_node_file(asset)
+        timer.stage("world_node")
+        # Build maya asset world node
+        create_world_node_file(asset)
 
-    # Reinitialize file to get mesh name
-    cmds.file(f=1, new=1)
-    model_path = os.path.join(asset_data["asset_path"], "02_model")
-    cmds.file(rename=os.path.join(asset_data["asset_path"], "02_model", "wip",
-                                  "{}_model_v001.ma".format(asset_data["asset_name"])))
+        # Reinitialize file to get mesh name
+        cmds.file(f=1, new=1)
+        model_path = os.path.join(asset_data["asset_path"], "02_model")
+        cmds.file(rename=os.path.join(asset_data["asset_path"], "02_model", "wip",
+                                      "{}_model_v001.ma".format(asset_data["asset_name"])))
 
-    # Import mesh
-    cmds.file(asset_data["mesh"], i=1)
+        timer.stage("import_mesh")
+        # Import mesh
+        cmds.file(asset_data["mesh"], i=1)
 
-    mesh = pm.ls(type="mesh")[0].getTransform()
+        mesh = pm.ls(type="mesh")[0].getTransform()
 
-    mesh.rename(asset_data["asset_name"] + "_PART")
+        mesh.rename(asset_data["asset_name"] + "_PART")
 
-    pm.select(mesh)
+        pm.select(mesh)
 
-    cmds.CenterPivot()
+        cmds.CenterPivot()
 
-    for obj in cmds.ls(sl=True, type="transform"):
-        bbox = cmds.exactWorldBoundingBox(obj)
-        cmds.xform(obj, ws=True, p=True, cp=True)
-        center_pos = cmds.xform(obj, q=True, ws=True, sp=True)
-        cmds.xform(obj, ws=True, piv=(center_pos[0], bbox[1], center_pos[2]))
+        for obj in cmds.ls(sl=True, type="transform"):
+            bbox = cmds.exactWorldBoundingBox(obj)
+            cmds.xform(obj, ws=True, p=True, cp=True)
+            center_pos = cmds.xform(obj, q=True, ws=True, sp=True)
+            cmds.xform(obj, ws=True, piv=(center_pos[0], bbox[1], center_pos[2]))
 
-    cmds.move(rpr=True)
+        cmds.move(rpr=True)
 
-    mel.eval("FreezeTransformations")
+        mel.eval("FreezeTransformations")
 
-    pm.select(cl=1)
+        pm.select(cl=1)
 
-    if asset_data["scale"]:
-        ns.normalize_scale(asset_data["scale"], mesh, axis="y")
+        if asset_data["scale"]:
+            ns.normalize_scale(asset_data["scale"], mesh, axis="y")
 
-    # Import world node
-    cmds.file(asset.world_node_path, i=True)
+        timer.stage("parent_geo")
+        # Import world node
+        cmds.file(asset.world_node_path, i=True)
 
-    # Parent mesh
-    pm.parent(mesh, "GEO")
+        # Parent mesh
+        pm.parent(mesh, "GEO")
 
-    # TODO Publish model stage
-    cmds.file(save=True, type="mayaAscii")
+        timer.stage("save_model")
+        # TODO Publish model stage
+        cmds.file(save=True, type="mayaAscii")
 
-    # TODO Create vray proxy
-    cmds.vrayCreateProxy(exportType=1, previewFaces=17500, dir=os.path.join(model_path, "publish"),
-                         fname=asset_name + ".vrmesh",
-                         overwrite=True,
-                         previewType="clustering", makeBackup=False, ignoreHiddenObjects=False, vertexColorsOn=True,
-                         exportHierarchy=True, includeTransformation=True)
+        timer.stage("proxy")
+        # TODO Create vray proxy
+        cmds.vrayCreateProxy(exportType=1, previewFaces=17500, dir=os.path.join(model_path, "publish"),
+                             fname=asset_name + ".vrmesh",
+                             overwrite=True,
+                             previewType="clustering", makeBackup=False, ignoreHiddenObjects=False, vertexColorsOn=True,
+                             exportHierarchy=True, includeTransformation=True)
 
-    vrmesh = asset_name + "_vrmesh"
-    vrproxy_path = os.path.join(model_path, "publish", asset_name + ".vrmesh")
+        vrmesh = asset_name + "_vrmesh"
+        vrproxy_path = os.path.join(model_path, "publish", asset_name + ".vrmesh")
 
-    cmds.vrayCreateProxy(createProxyNode=True, node=vrmesh, existing=True,
-                         dir=vrproxy_path, geomToLoad=3, newProxyNode=True)
+        cmds.vrayCreateProxy(createProxyNode=True, node=vrmesh, existing=True,
+                             dir=vrproxy_path, geomToLoad=3, newProxyNode=True)
 
-    vrmesh = pm.PyNode(vrmesh)
+        vrmesh = pm.PyNode(vrmesh)
 
-    pm.parent(vrmesh, "Proxy")
+        pm.parent(vrmesh, "Proxy")
 
-    # Build material
-    if asset_data["materials"]:
-        # Reinitialize to lookdev
-        cmds.file(rename=os.path.join(asset_data["asset_path"], "03_lookdev", "wip",
-                                      asset_data["asset_name"] + "_lookdev_v001.ma"))
+        timer.stage("material")
+        # Build material
+        if asset_data["materials"]:
+            # Reinitialize to lookdev
+            cmds.file(rename=os.path.join(asset_data["asset_path"], "03_lookdev", "wip",
+                                          asset_data["asset_name"] + "_lookdev_v001.ma"))
 
-        mtl_nodes = mb.build_material(asset_data["materials"][0])
-        mtl = mtl_nodes[1]
+            mtl_nodes = shading_graph_executor.build_material(asset_data["materials"][0])
+            mtl = mtl_nodes[1]
 
-        if len(mtl_nodes) == 3:
-            disp_node = mtl_nodes[-1]
+            if len(mtl_nodes) == 3 and mtl_nodes[-1]:
+                disp_node = mtl_nodes[-1]
 
-            cmds.sets(str(mesh), edit=True, forceElement=str(disp_node))
-            cmds.sets(str(vrmesh), edit=True, forceElement=str(disp_node))
+                cmds.sets(str(mesh), edit=True, forceElement=str(disp_node))
+                cmds.sets(str(vrmesh), edit=True, forceElement=str(disp_node))
 
-            disp_node.vrayDisplacementAmount.set(0.01)
-            disp_node.vrayDisplacementShift.set(-0.005)
+                cmds.setAttr(disp_node + ".vrayDisplacementAmount", 0.01)
+                cmds.setAttr(disp_node + ".vrayDisplacementShift", -0.005)
 
-        # Assign material
-        cmds.sets(str(mesh), edit=True, forceElement=str(mtl))
-        cmds.sets(str(vrmesh), edit=True, forceElement=str(mtl))
+            # Assign material
+            cmds.sets(str(mesh), edit=True, forceElement=str(mtl))
+            cmds.sets(str(vrmesh), edit=True, forceElement=str(mtl))
 
-        # TODO Publish lookdev stage
-        cmds.file(save=True, type="mayaAscii")
+            # TODO Publish lookdev stage
+            cmds.file(save=True, type="mayaAscii")
 
-    # Constrain to common rig
+        # Constrain to common rig
 
-    # Publish rig stage
+        # Publish rig stage
 
-    # Save to master
-    asset_data["maya_file"] = os.path.join(asset_data["asset_path"], asset_data["asset_name"] + ".ma")
+        timer.stage("save_master")
+        # Save to master
+        asset_data["maya_file"] = os.path.join(asset_data["asset_path"], asset_data["asset_name"] + ".ma")
 
-    cmds.file(rename=asset_data["maya_file"])
-    cmds.file(save=True, type="mayaAscii")
+        cmds.file(rename=asset_data["maya_file"])
+        cmds.file(save=True, type="mayaAscii")
 
-    lm.write_asset_data("Prop", asset_data["asset_name"], asset_data)
+        timer.stage("write_asset_data")
+        asset_search.write_asset_data("Prop", asset_data["asset_name"], asset_data)
 
 
-def main():
+def setup_session():
     mel.eval("loadPlugin vrayformaya")
     mel.eval("loadPlugin lookdevKit")
 
     cmds.currentUnit(linear='m')
     cmds.grid(default=True, spacing='1m', size='12m', divisions=12)
 
+
+def run_worker():
+    # Long lived worker, reads one JSON job per line from stdin until it is closed
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+
+        job = json.loads(line)
+        asset_data = job["asset_data"]
+
+        result = {
+            "job_id": job["job_id"],
+            "asset_name": asset_data.get("asset_name"),
+            "success": True,
+            "error": None,
+            "duration": None,
+            "stages": []
+        }
+
+        start = time.time()
+
+        try:
+            cmds.file(new=True, f=True)
+            build_megascan_model(asset_data, stages=result["stages"])
+        except Exception:
+            result["success"] = False
+            result["error"] = traceback.format_exc()
+
+        result["duration"] = time.time() - start
+
+        sys.stdout.write(RESULT_PREFIX + json.dumps(result) + "\n")
+        sys.stdout.flush()
+
+
+def main():
+    setup_session()
+
+    if sys.argv[1] == "--worker":
+        run_worker()
+        return
+
     json_file = open(sys.argv[1], "r")
     asset_data = json.load(json_file)
     json_file.close()
@@ -0,0 +1,237 @@
+import os
+import sys
+import json
+import time
+import queue
+import logging
+import argparse
+import threading
+import subprocess
+
+from maya_core.asset_library.job_queue import JobQueue, FAILED
+
+logging.basicConfig()
+logger = logging.getLogger(__name__)
+logger.setLevel(10)
+
+MAYAPY = os.environ.get("MAYAPY", "mayapy")
+
+BUILDER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "megascan_builder.py")
+
+# Workers prefix their result lines so they can be told apart from whatever Maya prints to stdout
+RESULT_PREFIX = "@@megascan_result "
+
+
+class MegascanWorker(object):
+    def __init__(self, worker_id, mayapy=MAYAPY, job_timeout=None):
+        self.worker_id = worker_id
+        self.mayapy = mayapy
+        self.job_timeout = job_timeout
+        self.process = None
+
+    def start(self):
+        self.process = subprocess.Popen([self.mayapy, BUILDER_SCRIPT, "--worker"], stdin=subprocess.PIPE,
+                                        stdout=subprocess.PIPE, universal_newlines=True, bufsize=1)
+
+        logger.info("Started megascan worker %s (pid %s)", self.worker_id, self.process.pid)
+
+    def is_alive(self):
+        return self.process is not None and self.process.poll() is None
+
+    def stop(self):
+        if not self.is_alive():
+            return
+
+        try:
+            self.process.stdin.close()
+            self.process.wait(timeout=30)
+        except Exception:
+            self.process.kill()
+
+    def run_job(self, job):
+        if not self.is_alive():
+            self.start()
+
+        start = time.time()
+
+        timer = None
+        if self.job_timeout:
+            timer = threading.Timer(self.job_timeout, self.process.kill)
+            timer.start()
+
+        try:
+            self.process.stdin.write(json.dumps(job) + "\n")
+            self.process.stdin.flush()
+
+            for line in self.process.stdout:
+                if line.startswith(RESULT_PREFIX):
+                    result = json.loads(line[len(RESULT_PREFIX):])
+                    result["worker"] = self.worker_id
+                    return result
+
+                logger.debug("[worker %s] %s", self.worker_id, line.rstrip())
+        except (OSError, ValueError) as e:
+            logger.error("Worker %s pipe error: %s", self.worker_id, e)
+        finally:
+            if timer:
+                timer.cancel()
+
+        # Worker died mid-job, report it and let the next job respawn the process
+        try:
+            return_code = self.process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+            return_code = self.process.wait()
+
+        self.process = None
+
+        return {
+            "job_id": job["job_id"],
+            "asset_name": job["asset_data"].get("asset_name"),
+            "success": False,
+            "error": "Worker exited with code {}".format(return_code),
+            "duration": time.time() - start,
+            "worker": self.worker_id
+        }
+
+
+class MegascanWorkerPool(object):
+    def __init__(self, workers=None, mayapy=MAYAPY, job_timeout=None):
+        self.worker_count = workers or max(1, (os.cpu_count() or 2) - 1)
+        self.mayapy = mayapy
+        self.job_timeout = job_timeout
+
+    def _worker_loop(self, worker, jobs, results, callback):
+        while True:
+            try:
+                job = jobs.get_nowait()
+            except queue.Empty:
+                break
+
+            result = worker.run_job(job)
+            results.append(result)
+
+            if result["success"]:
+                logger.info("Built %s in %.1fs", result["asset_name"], result["duration"])
+            else:
+                logger.error("Failed %s: %s", result["asset_name"], result["error"])
+
+            if callback:
+                callback(result)
+
+        worker.stop()
+
+    def build(self, asset_datas, callback=None):
+        jobs = queue.Queue()
+
+        for i, asset_data in enumerate(asset_datas):
+            jobs.put({"job_id": i, "asset_data": asset_data})
+
+        results = []
+        start = time.time()
+
+        threads = []
+        for i in range(min(self.worker_count, jobs.qsize())):
+            worker = MegascanWorker(i, mayapy=self.mayapy, job_timeout=self.job_timeout)
+            thread = threading.Thread(target=self._worker_loop, args=(worker, jobs, results, callback))
+            thread.daemon = True
+            thread.start()
+            threads.append(thread)
+
+        for thread in threads:
+            thread.join()
+
+        results.sort(key=lambda r: r["job_id"])
+
+        failed = [r for r in results if not r["success"]]
+
+        logger.info("Built %s/%s megascan assets in %.1fs with %s workers", len(results) - len(failed), len(results),
+                    time.time() - start, len(threads))
+
+        return results
+
+    def _queue_worker_loop(self, worker, job_queue):
+        while True:
+            claimed = job_queue.claim()
+
+            if claimed is None:
+                if job_queue.wait_for_retry():
+                    continue
+                break
+
+            job_key, asset_data = claimed
+
+            result = worker.run_job({"job_id": job_key, "asset_data": asset_data})
+
+            # Stages as the worker timed them, a worker that died mid-job reports none
+            job_queue.record_stages(job_key, result.get("stages") or [])
+
+            if result["success"]:
+                job_queue.mark_done(job_key)
+                logger.info("Built %s in %.1fs", job_key, result["duration"])
+            else:
+                job_queue.mark_failed(job_key, result["error"])
+                logger.error("Failed %s: %s", job_key, result["error"])
+
+        worker.stop()
+
+    def build_queue(self, job_queue):
+        # Resumable variant of build(), jobs already done in a previous run are skipped by the queue
+        threads = []
+        for i in range(self.worker_count):
+            worker = MegascanWorker(i, mayapy=self.mayapy, job_timeout=self.job_timeout)
+            thread = threading.Thread(target=self._queue_worker_loop, args=(worker, job_queue))
+            thread.daemon = True
+            thread.start()
+            threads.append(thread)
+
+        for thread in threads:
+            thread.join()
+
+        return job_queue.stats()
+
+
+def load_asset_datas(json_paths):
+    asset_datas = []
+
+    for json_path in json_paths:
+        json_file = open(json_path, "r")
+        asset_datas.append(json.load(json_file))
+        json_file.close()
+
+    return asset_datas
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build megascan assets with a pool of mayapy workers")
+    parser.add_argument("json_files", nargs="+")
+    parser.add_argument("-w", "--workers", type=int, default=None)
+    parser.add_argument("-t", "--timeout", type=float, default=None)
+    parser.add_argument("-r", "--report", default=None)
+    parser.add_argument("-q", "--queue", default=None, help="SQLite job queue, makes the batch resumable")
+    parser.add_argument("--no-retry-failed", action="store_true",
+                        help="Resume the queue without retrying jobs that failed in earlier runs")
+    args = parser.parse_args()
+
+    pool = MegascanWorkerPool(workers=args.workers, job_timeout=args.timeout)
+
+    if args.queue:
+        job_queue = JobQueue(args.queue, retry_failed=not args.no_retry_failed)
+        job_queue.add_jobs((a["asset_name"], a) for a in load_asset_datas(args.json_files))
+
+        stats = pool.build_queue(job_queue)
+        job_queue.close()
+
+        return 0 if not stats[FAILED] else 1
+
+    results = pool.build(load_asset_datas(args.json_files))
+
+    if args.report:
+        with open(args.report, "w") as report_file:
+            json.dump(results, report_file, indent=4)
+
+    return 0 if all(r["success"] for r in results) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,7 +1,12 @@
+from contextlib import contextmanager
+
 import pymel.core as pm
 import maya.cmds as cmds
 
+from maya_core.common_utils import profiling
+
 
+@profiling.profiled()
 def filter_connected_nodes(node, node_type=None):
     connected_nodes = []
 
@@ -15,3 +20,24 @@ def filter_connected_nodes(node, node_type=None):
             connected_nodes.extend([pm.PyNode(n) for n in connections])
 
     return connected_nodes
+
+
+@contextmanager
+def batch_scene_edit(chunk_name="batch_scene_edit"):
+    # One undo entry, no viewport refresh (and the DG pulls it drives) until the batch is done
+    cmds.undoInfo(openChunk=True, chunkName=chunk_name)
+    suspended = cmds.refresh(query=True, suspend=True)
+
+    if not suspended:
+        cmds.refresh(suspend=True)
+
+    try:
+        yield
+    finally:
+        if not suspended:
+            cmds.refresh(suspend=False)
+
+        cmds.undoInfo(closeChunk=True)
+
+        if not suspended:
+            cmds.refresh(force=True)
@@ -0,0 +1,331 @@
+import os
+import json
+import time
+import logging
+import importlib
+import tempfile
+import threading
+import functools
+import traceback
+from collections import Counter
+
+logger = logging.getLogger(__name__)
+logger.setLevel(10)
+
+ENABLED = bool(os.environ.get("MAYA_CORE_PROFILE"))
+
+OUTPUT_DIR = os.environ.get("MAYA_CORE_PROFILE_DIR") or tempfile.gettempdir()
+
+# Maya commands counted while profiling is enabled, patched in place so callers need no changes
+DEFAULT_COMMANDS = {
+    "maya.cmds": ["file", "vrayCreateProxy", "listHistory", "listConnections", "listRelatives", "ls", "shadingNode",
+                  "connectAttr", "disconnectAttr", "setAttr", "getAttr", "sets", "parent", "duplicate", "select",
+                  "rename", "createNode", "objExists"],
+    "pymel.core": ["shadingNode", "connectAttr", "disconnectAttr", "listConnections", "parent", "select",
+                   "rename"]
+}
+
+
+class _NullSpan(object):
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+
+class _NullStages(object):
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+    def stage(self, name, **args):
+        pass
+
+    def finish(self):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+_NULL_STAGES = _NullStages()
+
+
+class Span(object):
+    def __init__(self, profiler, name, args):
+        self.profiler = profiler
+        self.name = name
+        self.args = args
+        self.start = None
+
+    def __enter__(self):
+        self.profiler._push(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *args):
+        end = time.perf_counter()
+
+        # Spans opened inside this one and never closed, a stage cut short by an exception, end along with it
+        for depth, span in self.profiler._pop(self):
+            self.profiler._record(span.name, span.start, end, depth, span.args)
+
+        return False
+
+
+class StageTimer(object):
+    # Used as a context manager, the last stage ends when the block exits, raised or not. With records, each stage is
+    # also appended as a plain dict with wall clock times, profiler or not, and the error that ended it if any
+    def __init__(self, profiler, prefix, records=None):
+        self.profiler = profiler
+        self.prefix = prefix
+        self.records = records
+        self.current = None
+        self.record = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.finish(error="".join(traceback.format_exception_only(exc_type, exc)).strip() if exc_type else None)
+        return False
+
+    def stage(self, name, **args):
+        self.finish()
+
+        if self.records is not None:
+            self.record = {"stage": name, "started_at": time.time(), "finished_at": None, "error": None}
+            self.records.append(self.record)
+
+        if self.profiler is not None:
+            self.current = Span(self.profiler, "/".join([self.prefix, name]), args)
+            self.current.__enter__()
+
+    def finish(self, error=None):
+        if self.record is not None:
+            self.record["finished_at"] = time.time()
+            self.record["error"] = error
+            self.record = None
+
+        if self.current is not None:
+            self.current.__exit__(None, None, None)
+            self.current = None
+
+
+class Profiler(object):
+    def __init__(self):
+        self.events = []
+        self.counters = Counter()
+        self.origin = time.perf_counter()
+        self.pid = os.getpid()
+
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _stack(self):
+        stack = getattr(self._local, "stack", None)
+
+        if stack is None:
+            stack = self._local.stack = []
+
+        return stack
+
+    def _push(self, span):
+        self._stack().append(span)
+
+    def _pop(self, span):
+        # (depth, span) for span and every span still open above it, nothing when span was already popped
+        stack = self._stack()
+
+        for index in range(len(stack) - 1, -1, -1):
+            if stack[index] is span:
+                popped = list(enumerate(stack))[index:]
+                del stack[index:]
+                return popped[::-1]
+
+        return []
+
+    def depth(self):
+        return len(self._stack())
+
+    def _record(self, name, start, end, depth, args):
+        event = {
+            "name": name,
+            "start": start - self.origin,
+            "duration": end - start,
+            "depth": depth,
+            "thread": threading.current_thread().name,
+            "tid": threading.get_ident(),
+            "args": args
+        }
+
+        with self._lock:
+            self.events.append(event)
+
+    def span(self, name, **args):
+        return Span(self, name, args)
+
+    def count(self, name, n=1):
+        with self._lock:
+            self.counters[name] += n
+
+    def reset(self):
+        with self._lock:
+            self.events = []
+            self.counters = Counter()
+            self.origin = time.perf_counter()
+
+    def write_json_lines(self, path):
+        with open(path, "w") as f:
+            for event in self.events:
+                f.write(json.dumps(event) + "\n")
+
+            f.write(json.dumps({"counters": dict(self.counters)}) + "\n")
+
+    def write_chrome_trace(self, path):
+        trace_events = []
+
+        for event in self.events:
+            trace_events.append({
+                "name": event["name"],
+                "ph": "X",
+                "ts": event["start"] * 1e6,
+                "dur": event["duration"] * 1e6,
+                "pid": self.pid,
+                "tid": event["tid"],
+                "args": event["args"]
+            })
+
+        end = max([e["start"] + e["duration"] for e in self.events] or [0])
+
+        for name, value in sorted(self.counters.items()):
+            trace_events.append({"name": name, "ph": "C", "ts": end * 1e6, "pid": self.pid,
+                                 "args": {"calls": value}})
+
+        with open(path, "w") as f:
+            json.dump({"traceEvents": trace_events, "displayTimeUnit": "ms"}, f)
+
+    def flush(self, name, output_dir=None):
+        output_dir = output_dir or OUTPUT_DIR
+        basename = os.path.join(output_dir, "{}_{}".format(name, time.strftime("%Y%m%d_%H%M%S")))
+
+        self.write_json_lines(basename + ".jsonl")
+        self.write_chrome_trace(basename + ".trace.json")
+
+        logger.info("Wrote profile %s.jsonl and %s.trace.json", basename, basename)
+
+        self.reset()
+
+        return basename
+
+
+_profiler = Profiler()
+_patched = {}
+
+
+def get_profiler():
+    return _profiler
+
+
+def span(name, **args):
+    if not ENABLED:
+        return _NULL_SPAN
+
+    return _profiler.span(name, **args)
+
+
+def stages(prefix, records=None):
+    if not ENABLED:
+        return _NULL_STAGES if records is None else StageTimer(None, prefix, records)
+
+    return StageTimer(_profiler, prefix, records)
+
+
+def count(name, n=1):
+    if ENABLED:
+        _profiler.count(name, n)
+
+
+def profiled(name=None, flush=False):
+    # flush writes the profile files when the outermost profiled call returns
+    def decorator(func):
+        span_name = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not ENABLED:
+                return func(*args, **kwargs)
+
+            try:
+                with _profiler.span(span_name):
+                    return func(*args, **kwargs)
+            finally:
+                if flush and not _profiler.depth():
+                    _profiler.flush(span_name)
+
+        return wrapper
+
+    return decorator
+
+
+def _counted(module_name, command_name, func):
+    counter_name = ".".join([module_name, command_name])
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        _profiler.count(counter_name)
+        return func(*args, **kwargs)
+
+    return wrapper
+
+
+def instrument_commands(commands=None):
+    commands = commands or DEFAULT_COMMANDS
+
+    for module_name, command_names in commands.items():
+        try:
+            module = importlib.import_module(module_name)
+        except ImportError:
+            continue
+
+        for command_name in command_names:
+            func = getattr(module, command_name, None)
+
+            if func is None or (module_name, command_name) in _patched:
+                continue
+
+            _patched[(module_name, command_name)] = (module, func)
+            setattr(module, command_name, _counted(module_name, command_name, func))
+
+
+def restore_commands():
+    for (module_name, command_name), (module, func) in _patched.items():
+        setattr(module, command_name, func)
+
+    _patched.clear()
+
+
+def enable(output_dir=None, commands=None):
+    global ENABLED, OUTPUT_DIR
+
+    ENABLED = True
+
+    if output_dir:
+        OUTPUT_DIR = output_dir
+
+    instrument_commands(commands)
+
+    logger.info("Profiling enabled, writing to %s", OUTPUT_DIR)
+
+
+def disable():
+    global ENABLED
+
+    ENABLED = False
+
+    restore_commands()
+
+
+if ENABLED:
+    instrument_commands()
@@ -0,0 +1,62 @@
+import logging
+
+import maya.api.OpenMaya as om
+
+logger = logging.getLogger(__name__)
+logger.setLevel(10)
+
+# Scene events after which cached node names may be stale or new tagged nodes may have arrived
+DIRTY_MESSAGES = [
+    om.MSceneMessage.kAfterNew,
+    om.MSceneMessage.kAfterOpen,
+    om.MSceneMessage.kAfterImport,
+    om.MSceneMessage.kAfterCreateReference,
+    om.MSceneMessage.kAfterLoadReference
+]
+
+
+class SceneIndex(object):
+    # Lookup table over scene nodes, marked dirty by scene events and rebuilt by the subclass on its next lookup
+    dirty_messages = DIRTY_MESSAGES
+
+    def __init__(self):
+        self._dirty = True
+        self._callback_ids = []
+
+    def install_callbacks(self):
+        if self._callback_ids:
+            return
+
+        # The message comes back as client data, subclasses can tell events apart in _mark_dirty
+        for message in self.dirty_messages:
+            self._callback_ids.append(om.MSceneMessage.addCallback(message, self._mark_dirty, message))
+
+    def remove_callbacks(self):
+        for callback_id in self._callback_ids:
+            om.MMessage.removeCallback(callback_id)
+
+        self._callback_ids = []
+
+    def _mark_dirty(self, message=None):
+        self._dirty = True
+
+    def invalidate(self):
+        self._dirty = True
+
+    def rebuild(self):
+        raise NotImplementedError
+
+
+def singleton(index_class):
+    # get_*() accessor for a session wide index, created with its callbacks installed on first use
+    instances = []
+
+    def get_instance():
+        if not instances:
+            index = index_class()
+            index.install_callbacks()
+            instances.append(index)
+
+        return instances[0]
+
+    return get_instance
@@ -9,6 +9,8 @@ import maya.cmds as cmds
 from tools_core.pipeline.Asset import Asset
 reload(Asset)
 
+from maya_core.maya_asset import texture_resolution
+
 logger = logging.getLogger(__name__)
 logger.setLevel(10)
 
@@ -67,6 +69,9 @@ class MayaAsset(Asset.Asset):
         reverse.output.outputX >> pm.PyNode("HiRes").visibility
         self.world_node.geoVis >> pm.PyNode("Proxy").visibility
 
+        # Switching geoVis to Proxy also moves the asset's file nodes to proxy textures
+        texture_resolution.get_switch().install_asset_callbacks()
+
     def import_world_node(self):
         cmds.file(self.world_node_path, i=1)
         self.world_node = pm.PyNode(self.asset_name)
@@ -0,0 +1,253 @@
+import os
+import logging
+
+import maya.cmds as cmds
+import maya.utils as mu
+import maya.api.OpenMaya as om
+
+from maya_core.common_utils import common_utils as cu
+from maya_core.common_utils import profiling
+from maya_core.asset_library.asset_publish import texture_proxies
+
+logger = logging.getLogger(__name__)
+logger.setLevel(10)
+
+FULL = "full"
+
+LEVELS = [FULL] + list(texture_proxies.PROXY_LEVELS)
+
+# Level assets switch to while their geoVis is on Proxy
+PROXY_LEVEL = os.environ.get("MAYA_CORE_TEXTURE_PROXY_LEVEL", "half")
+
+# String attribute on file nodes pointed at a proxy, holds the path to go back to
+FULL_PATH_ATTR = "fullResTexture"
+
+# Scene events after which the geoVis callbacks are installed again
+ASSET_MESSAGES = [
+    om.MSceneMessage.kAfterNew,
+    om.MSceneMessage.kAfterOpen,
+    om.MSceneMessage.kAfterImport,
+    om.MSceneMessage.kAfterCreateReference,
+    om.MSceneMessage.kAfterLoadReference
+]
+
+# Scene events that can bring in assets already on Proxy, their textures are switched to match
+SYNC_MESSAGES = [
+    om.MSceneMessage.kAfterOpen,
+    om.MSceneMessage.kAfterImport,
+    om.MSceneMessage.kAfterCreateReference,
+    om.MSceneMessage.kAfterLoadReference
+]
+
+
+def get_asset_nodes():
+    return cmds.ls("*.mayaAsset", objectsOnly=True, recursive=True) or []
+
+
+def get_asset_file_nodes(world_node):
+    shapes = cmds.listRelatives(world_node, allDescendents=True, shapes=True, fullPath=True) or []
+    shading_groups = list(set(cmds.listConnections(shapes, type="shadingEngine") or [])) if shapes else []
+
+    return cmds.ls(cmds.listHistory(shading_groups) or [], type="file") if shading_groups else []
+
+
+def get_full_path(file_node):
+    path = cmds.getAttr(file_node + ".fileTextureName")
+
+    if not cmds.attributeQuery(FULL_PATH_ATTR, node=file_node, exists=True):
+        return path
+
+    # Repathed by hand since it was last switched, the new path is the full resolution one
+    if not texture_proxies.is_proxy_path(path):
+        return path
+
+    return cmds.getAttr(file_node + "." + FULL_PATH_ATTR) or path
+
+
+def _set_texture_path(file_node, path):
+    # Same file rules for the proxy as for the full texture, the node keeps the colour space it had
+    color_space = cmds.getAttr(file_node + ".colorSpace")
+    cmds.setAttr(file_node + ".fileTextureName", path, type="string")
+
+    if cmds.getAttr(file_node + ".colorSpace") != color_space:
+        cmds.setAttr(file_node + ".colorSpace", color_space, type="string")
+
+
+def set_texture_level(file_nodes, level):
+    # Nodes without a proxy at that level stay at full resolution. Returns the number of nodes repathed
+    if level not in LEVELS:
+        raise ValueError("Invalid texture level {}, expected one of {}".format(level, LEVELS))
+
+    listings = {}
+    changed = 0
+
+    with cu.batch_scene_edit("set_texture_level"):
+        for file_node in file_nodes:
+            current = cmds.getAttr(file_node + ".fileTextureName")
+            full_path = get_full_path(file_node)
+
+            path = full_path if level == FULL else texture_proxies.find_proxy_path(full_path, level, listings)
+            path = path or full_path
+
+            if path == current:
+                continue
+
+            if path != full_path:
+                if not cmds.attributeQuery(FULL_PATH_ATTR, node=file_node, exists=True):
+                    cmds.addAttr(file_node, longName=FULL_PATH_ATTR, dataType="string")
+
+                cmds.setAttr(file_node + "." + FULL_PATH_ATTR, full_path, type="string")
+
+            _set_texture_path(file_node, path)
+            changed += 1
+
+    return changed
+
+
+class TextureResolutionSwitch(object):
+    def __init__(self):
+        # None follows each asset's geoVis, a level applies to every file node in the scene
+        self.scene_level = None
+
+        self._callback_ids = []
+        self._asset_callback_ids = []
+
+        # file node -> proxy path, swapped back to full resolution while the scene is written
+        self._saved = {}
+
+    def install_callbacks(self):
+        if self._callback_ids:
+            return
+
+        for message in ASSET_MESSAGES:
+            callback = self._assets_added if message in SYNC_MESSAGES else self.install_asset_callbacks
+            self._callback_ids.append(om.MSceneMessage.addCallback(message, callback))
+
+        # Saved and exported files always point at full resolution textures, render farms never see a proxy
+        for message in (om.MSceneMessage.kBeforeSave, om.MSceneMessage.kBeforeExport):
+            self._callback_ids.append(om.MSceneMessage.addCallback(message, self._before_save))
+
+        for message in (om.MSceneMessage.kAfterSave, om.MSceneMessage.kAfterExport):
+            self._callback_ids.append(om.MSceneMessage.addCallback(message, self._after_save))
+
+        self.install_asset_callbacks()
+
+    def remove_callbacks(self):
+        for callback_id in self._callback_ids + self._asset_callback_ids:
+            om.MMessage.removeCallback(callback_id)
+
+        self._callback_ids = []
+        self._asset_callback_ids = []
+
+    def install_asset_callbacks(self, *args):
+        for callback_id in self._asset_callback_ids:
+            om.MMessage.removeCallback(callback_id)
+
+        self._asset_callback_ids = []
+
+        for world_node in get_asset_nodes():
+            selection = om.MSelectionList()
+            selection.add(world_node)
+
+            self._asset_callback_ids.append(om.MNodeMessage.addAttributeChangedCallback(
+                selection.getDependNode(0), self._attribute_changed))
+
+    def _assets_added(self, *args):
+        self.install_asset_callbacks()
+
+        # No scene edits from inside the callback
+        mu.executeDeferred(self.sync_assets)
+
+    def _attribute_changed(self, message, plug, other_plug, client_data):
+        if not message & om.MNodeMessage.kAttributeSet or plug.partialName(useLongNames=True) != "geoVis":
+            return
+
+        if self.scene_level is None:
+            # No scene edits from inside the callback
+            mu.executeDeferred(self.sync_asset, om.MFnDependencyNode(plug.node()).name())
+
+    def get_asset_level(self, world_node):
+        if self.scene_level is not None:
+            return self.scene_level
+
+        return PROXY_LEVEL if cmds.getAttr(world_node + ".geoVis") == 1 else FULL
+
+    def sync_asset(self, world_node):
+        if not cmds.objExists(world_node):
+            return 0
+
+        return set_texture_level(get_asset_file_nodes(world_node), self.get_asset_level(world_node))
+
+    def sync_assets(self):
+        return sum(self.sync_asset(world_node) for world_node in get_asset_nodes())
+
+    def set_scene_level(self, level=None):
+        # level None hands control back to the geoVis of each asset, other file nodes return to full resolution
+        if level is not None and level not in LEVELS:
+            raise ValueError("Invalid texture level {}, expected one of {}".format(level, LEVELS))
+
+        self.scene_level = level
+
+        if level is not None:
+            changed = set_texture_level(cmds.ls(type="file"), level)
+        else:
+            changed = set_texture_level(cmds.ls(type="file"), FULL)
+            changed += self.sync_assets()
+
+        logger.info("Texture level %s, %s file nodes repathed", level or "by geoVis", changed)
+
+        return changed
+
+    def _before_save(self, *args):
+        # Cost: every file node on a proxy is repathed here and back in _after_save, each with its file rule
+        # evaluation, on every save and export. The ma/mb writers can't be hooked from Python to write the full path
+        # on the way out. Scenes with many proxied nodes show it in the texture_proxy_save span
+        self._saved = {}
+
+        # Undo stays out of it, the swap is reverted right after the save
+        undo_state = cmds.undoInfo(query=True, state=True)
+        cmds.undoInfo(stateWithoutFlush=False)
+
+        try:
+            with profiling.span("texture_proxy_save"):
+                for file_node in cmds.ls("*." + FULL_PATH_ATTR, objectsOnly=True, recursive=True) or []:
+                    path = cmds.getAttr(file_node + ".fileTextureName")
+
+                    if texture_proxies.is_proxy_path(path):
+                        self._saved[file_node] = path
+                        _set_texture_path(file_node, get_full_path(file_node))
+
+                profiling.count("texture_proxy_save_nodes", len(self._saved))
+        finally:
+            cmds.undoInfo(stateWithoutFlush=undo_state)
+
+    def _after_save(self, *args):
+        undo_state = cmds.undoInfo(query=True, state=True)
+        cmds.undoInfo(stateWithoutFlush=False)
+
+        try:
+            with profiling.span("texture_proxy_restore"):
+                for file_node, path in self._saved.items():
+                    if cmds.objExists(file_node):
+                        _set_texture_path(file_node, path)
+        finally:
+            cmds.undoInfo(stateWithoutFlush=undo_state)
+
+        self._saved = {}
+
+
+_switch = None
+
+
+def get_switch():
+    global _switch
+
+    if _switch is None:
+        _switch = TextureResolutionSwitch()
+        _switch.install_callbacks()
+
+    return _switch
+
+
+def set_scene_level(level=None):
+    return get_switch().set_scene_level(level)
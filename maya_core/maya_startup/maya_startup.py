@@ -4,6 +4,8 @@ import maya.cmds as cmds
 import maya.mel as mel
 import pymel.core as pm
 
+from maya_core.maya_asset import texture_resolution
+
 logger = logging.getLogger(__name__)
 
 
@@ -37,6 +39,17 @@ def startup_maya():
     cmds.commandPort(name=":20220", sourceType="mel")
     cmds.commandPort(name=":20221", sourceType="python")
 
+    # The port is taken when another Maya session already serves it, startup carries on without the server.
+    # Imported here, the browser commands it serves load nothing until the server starts
+    try:
+        from maya_core.asset_library.asset_browser import command_server
+
+        command_server.start_server()
+    except (OSError, ImportError) as e:
+        logger.error("Could not start the command server: %s", e)
+
+    texture_resolution.get_switch()
+
     persp = pm.PyNode("persp")
 
     persp.farClipPlane.set(1000000)
@@ -0,0 +1,325 @@
+import os
+import string
+import logging
+from contextlib import contextmanager
+
+import maya.cmds as cmds
+import maya.api.OpenMaya as om
+
+logger = logging.getLogger(__name__)
+logger.setLevel(10)
+
+TEXTURE = "texture"
+UTILITY = "utility"
+
+# What shadingNode -asTexture / -asUtility connect new nodes to, so they show up in the Hypershade
+DEFAULT_LISTS = {
+    TEXTURE: ("defaultTextureList1", "textures"),
+    UTILITY: ("defaultRenderUtilityList1", "utilities")
+}
+
+# What shadingNode -isColorManaged connects, only attributes the node has are wired
+COLOR_MANAGEMENT_NODE = "defaultColorMgtGlobals"
+COLOR_MANAGEMENT_CONNECTIONS = [
+    ("cmEnabled", "colorManagementEnabled"),
+    ("configFileEnabled", "colorManagementConfigFileEnabled"),
+    ("configFilePath", "colorManagementConfigFilePath"),
+    ("workingSpaceName", "workingSpace")
+]
+
+# Python plugin with the command that puts a modifier on the undo queue, see lookdev_om_plugin
+UNDO_PLUGIN = os.path.join(os.path.dirname(os.path.abspath(__file__)), "lookdev_om_plugin.py")
+UNDO_PLUGIN_NAME = "lookdev_om_plugin"
+
+_pending = []
+_undo_plugin_loaded = None
+
+
+def get_node(name):
+    selection = om.MSelectionList()
+    selection.add(str(name))
+    return selection.getDependNode(0)
+
+
+def get_name(node):
+    return om.MFnDependencyNode(node).name()
+
+
+def get_plug(node, attr):
+    return om.MFnDependencyNode(node).findPlug(attr, False)
+
+
+def has_attr(node, attr):
+    return om.MFnDependencyNode(node).hasAttribute(attr)
+
+
+def _load_undo_plugin():
+    global _undo_plugin_loaded
+
+    if _undo_plugin_loaded is None:
+        try:
+            if not cmds.pluginInfo(UNDO_PLUGIN_NAME, query=True, loaded=True):
+                cmds.loadPlugin(UNDO_PLUGIN, quiet=True)
+
+            _undo_plugin_loaded = True
+        except RuntimeError as e:
+            logger.warning("Could not load %s, OpenMaya node creation will not be undoable: %s", UNDO_PLUGIN, e)
+            _undo_plugin_loaded = False
+
+    return _undo_plugin_loaded
+
+
+def pop_pending():
+    return _pending.pop()
+
+
+def do_it(modifier):
+    # All or nothing, a failed doIt rolls back whatever it got through
+    try:
+        modifier.doIt()
+    except Exception:
+        modifier.undoIt()
+        raise
+
+
+def commit(modifier):
+    # True when the modifier went through lookdevCommitModifier, onto the undo queue
+    if not _load_undo_plugin():
+        do_it(modifier)
+        return False
+
+    _pending.append(modifier)
+
+    try:
+        cmds.lookdevCommitModifier()
+    finally:
+        del _pending[:]
+
+    return True
+
+
+@contextmanager
+def undo_chunk(chunk_name):
+    # The modifier and the setAttr calls that follow it undo as one step
+    cmds.undoInfo(openChunk=True, chunkName=chunk_name)
+
+    try:
+        yield
+    finally:
+        cmds.undoInfo(closeChunk=True)
+
+
+@contextmanager
+def commit_chunk(batch, chunk_name):
+    # Commits batch with the edits made in the block as one undo step. When the block raises after the commit the
+    # step is undone, the scene is left as it was for the caller to go another way
+    try:
+        with undo_chunk(chunk_name):
+            batch.commit()
+            yield
+    except Exception:
+        if batch.committed:
+            batch.undo()
+        raise
+
+
+class NodeBatch(object):
+    # Nodes, renames and connections queued on one MDGModifier and applied with a single doIt
+    def __init__(self):
+        self.modifier = om.MDGModifier()
+        self.committed = False
+        self.queued = False
+        self._list_plugs = {}
+        self._list_indices = {}
+        self._color_management = None
+
+    def _next_list_element(self, category):
+        if category not in self._list_plugs:
+            list_node, list_attr = DEFAULT_LISTS[category]
+            plug = get_plug(get_node(list_node), list_attr)
+            indices = plug.getExistingArrayAttributeIndices()
+
+            self._list_plugs[category] = plug
+            self._list_indices[category] = max(indices) + 1 if indices else 0
+
+        index = self._list_indices[category]
+        self._list_indices[category] += 1
+
+        return self._list_plugs[category].elementByLogicalIndex(index)
+
+    def create(self, node_type, category, name=None, color_managed=False):
+        node = self.modifier.createNode(node_type)
+
+        if name:
+            self.modifier.renameNode(node, name)
+
+        self.modifier.connect(get_plug(node, "message"), self._next_list_element(category))
+
+        if color_managed:
+            if self._color_management is None:
+                self._color_management = get_node(COLOR_MANAGEMENT_NODE)
+
+            for source_attr, destination_attr in COLOR_MANAGEMENT_CONNECTIONS:
+                if has_attr(node, destination_attr):
+                    self.connect(self._color_management, source_attr, node, destination_attr)
+
+        return node
+
+    def connect(self, source, source_attr, destination, destination_attr):
+        self.modifier.connect(get_plug(source, source_attr), get_plug(destination, destination_attr))
+
+    def reconnect(self, source_plug, destination_plug, old_source_plug):
+        self.modifier.disconnect(old_source_plug, destination_plug)
+        self.modifier.connect(source_plug, destination_plug)
+
+    def set_int(self, node, attr, value):
+        self.modifier.newPlugValueInt(get_plug(node, attr), value)
+
+    def commit(self):
+        self.queued = commit(self.modifier)
+        self.committed = True
+
+    def undo(self):
+        # Through the undo queue when the commit is on it, undoing the modifier directly would leave it there
+        if self.queued and cmds.undoInfo(query=True, state=True):
+            cmds.undo()
+        else:
+            self.modifier.undoIt()
+
+        self.committed = False
+
+
+def _add_cc_node(batch, name, source=None, source_is_new=False):
+    cc_node = batch.create("colorCorrect", UTILITY, name)
+
+    batch.connect(cc_node, "colGammaX", cc_node, "colGammaY")
+    batch.connect(cc_node, "colGammaX", cc_node, "colGammaZ")
+
+    if source is None:
+        return cc_node
+
+    # Outgoing outColor / outAlpha connections of an existing node move over to the cc node
+    if not source_is_new:
+        for plug in om.MFnDependencyNode(source).getConnections():
+            attr = plug.partialName(useLongNames=True)
+
+            if not plug.isSource or not (attr.startswith("outColor") or attr == "outAlpha"):
+                continue
+
+            for destination_plug in plug.destinations():
+                batch.reconnect(get_plug(cc_node, attr), destination_plug, plug)
+
+    batch.connect(source, "outColor", cc_node, "inColor")
+    batch.connect(source, "outAlpha", cc_node, "inAlpha")
+
+    return cc_node
+
+
+def create_texture(name=None, path=None, cc=True, uv=True, ptex=False):
+    # Same arguments and result keys as lookdev_utils.create_texture, node names instead of PyNodes
+    node_type, suffix, path_attr = ("VRayPtex", "_PTEX", "ptexFile") if ptex else \
+        ("file", "_TEX", "fileTextureName")
+
+    batch = NodeBatch()
+    nodes = {}
+
+    texture_node = batch.create(node_type, TEXTURE, name + suffix if name else None, color_managed=True)
+    nodes["texture_node"] = texture_node
+
+    if uv and not ptex:
+        uv_node = batch.create("place2dTexture", UTILITY, name + "_UV" if name else None)
+        batch.connect(uv_node, "outUV", texture_node, "uvCoord")
+        nodes["uv_node"] = uv_node
+
+    if cc:
+        # Unnamed, the cc node follows the name Maya gives the texture
+        nodes["cc_node"] = _add_cc_node(batch, name + "_CC" if name else None, texture_node, source_is_new=True)
+
+    with commit_chunk(batch, "create_texture"):
+        names = dict((key, get_name(node)) for key, node in nodes.items())
+
+        if cc and not name:
+            cmds.rename(names["cc_node"], names["texture_node"] + "_CC")
+            names["cc_node"] = get_name(nodes["cc_node"])
+
+        # Through setAttr, so the colour management file rules run as they do for PyMEL
+        if path:
+            cmds.setAttr(names["texture_node"] + "." + path_attr, path, type="string")
+
+    logger.info("Created %s", names["texture_node"])
+
+    return names
+
+
+def create_cc_node(name=None, source_node=None):
+    if name:
+        name = (name + "_CC") if not name.endswith("_CC") else name
+    elif source_node:
+        name = str(source_node) + "_CC"
+
+    batch = NodeBatch()
+    cc_node = _add_cc_node(batch, name, get_node(source_node) if source_node else None)
+    batch.commit()
+
+    cc_name = get_name(cc_node)
+    logger.info("Created %s", cc_name)
+
+    return cc_name
+
+
+def create_color_composite_node(name=None, source_a=None, source_b=None):
+    if name:
+        name = (name + "_CComp") if not name.endswith("_CComp") else name
+    elif source_a:
+        name = str(source_a) + "_CComp"
+
+    batch = NodeBatch()
+    composite_node = batch.create("colorComposite", UTILITY, name)
+
+    for i, source in enumerate([source_a, source_b]):
+        if not source:
+            continue
+
+        source = get_node(source)
+        letter = string.ascii_uppercase[i]
+
+        if has_attr(source, "outColor"):
+            batch.connect(source, "outColor", composite_node, "color" + letter)
+
+        if has_attr(source, "outAlpha"):
+            batch.connect(source, "outAlpha", composite_node, "alpha" + letter)
+
+    batch.commit()
+
+    composite_name = get_name(composite_node)
+    logger.info("Created %s", composite_name)
+
+    return composite_name
+
+
+def create_noise(name=None, cc=False, uv=True):
+    batch = NodeBatch()
+    nodes = {}
+
+    noise_node = batch.create("noise", TEXTURE, name + "_Noise" if name else None, color_managed=True)
+    batch.set_int(noise_node, "noiseType", 0)
+    nodes["texture_node"] = noise_node
+
+    if uv:
+        uv_node = batch.create("place2dTexture", UTILITY, name + "_Noise_UV" if name else None)
+        batch.connect(uv_node, "outUV", noise_node, "uvCoord")
+        nodes["uv_node"] = uv_node
+
+    if cc:
+        nodes["cc_node"] = _add_cc_node(batch, name + "_Noise_CC" if name else None, noise_node, source_is_new=True)
+
+    with commit_chunk(batch, "create_noise"):
+        names = dict((key, get_name(node)) for key, node in nodes.items())
+
+        if cc and not name:
+            cmds.rename(names["cc_node"], names["texture_node"] + "_CC")
+            names["cc_node"] = get_name(nodes["cc_node"])
+
+    logger.info("Created %s", names["texture_node"])
+
+    return names
@@ -0,0 +1,41 @@
+import maya.api.OpenMaya as om
+
+from maya_core.pipeline.lookdev import lookdev_om
+
+
+def maya_useNewAPI():
+    pass
+
+
+class CommitModifierCommand(om.MPxCommand):
+    # Puts an MDGModifier built by lookdev_om on the undo queue, the modifier is handed over through lookdev_om
+    name = "lookdevCommitModifier"
+
+    def __init__(self):
+        super(CommitModifierCommand, self).__init__()
+        self.modifier = None
+
+    @staticmethod
+    def creator():
+        return CommitModifierCommand()
+
+    def doIt(self, args):
+        self.modifier = lookdev_om.pop_pending()
+        lookdev_om.do_it(self.modifier)
+
+    def redoIt(self):
+        self.modifier.doIt()
+
+    def undoIt(self):
+        self.modifier.undoIt()
+
+    def isUndoable(self):
+        return True
+
+
+def initializePlugin(plugin):
+    om.MFnPlugin(plugin).registerCommand(CommitModifierCommand.name, CommitModifierCommand.creator)
+
+
+def uninitializePlugin(plugin):
+    om.MFnPlugin(plugin).deregisterCommand(CommitModifierCommand.name)
@@ -1,10 +1,15 @@
 import os
+import time
 import string
 import logging
 
 import pymel.core as pm
 import maya.cmds as cmds
 
+from maya_core.common_utils import profiling
+from maya_core.pipeline.lookdev import texture_metadata
+from maya_core.pipeline.lookdev import lookdev_om
+
 logging.basicConfig()
 
 logger = logging.getLogger(__name__)
@@ -13,8 +18,40 @@ MATERIAL_TYPES = [
     "VRayMtl"
 ]
 
+# "om" batches node creation through lookdev_om, "pymel" creates and connects node by node
+BACKEND = os.environ.get("MAYA_CORE_LOOKDEV_BACKEND", "om")
+
+# Raised by lookdev_om when a node type is unknown (plugin not loaded) or a connection is refused
+OM_ERRORS = (RuntimeError, TypeError, ValueError)
+
+
+def _as_pynodes(nodes):
+    return dict((key, pm.PyNode(node)) for key, node in nodes.items())
+
+
+def _run_om(func, *args):
+    # None when the OpenMaya path is off or failed, the caller then goes through PyMEL. lookdev_om undoes a commit
+    # whose follow-up edits failed before raising, the fallback never runs on top of half-created nodes
+    if BACKEND != "om":
+        return None
+
+    try:
+        return func(*args)
+    except OM_ERRORS as e:
+        logger.warning("%s failed through OpenMaya, falling back to PyMEL: %s", func.__name__, e)
+        return None
+
 
 def create_texture(name=None, path=None, cc=True, uv=True, ptex=False):
+    nodes = _run_om(lookdev_om.create_texture, name, path, cc, uv, ptex)
+
+    if nodes is not None:
+        return _as_pynodes(nodes)
+
+    return _create_texture_pymel(name, path, cc, uv, ptex)
+
+
+def _create_texture_pymel(name=None, path=None, cc=True, uv=True, ptex=False):
     nodes = {}
 
     if ptex:
@@ -37,7 +74,7 @@ def create_texture(name=None, path=None, cc=True, uv=True, ptex=False):
         pm.connectAttr(uv_node.outUV, texture_node.uvCoord)
 
     if cc:
-        cc_node = create_cc_node(source_node=texture_node)
+        cc_node = _create_cc_node_pymel(source_node=texture_node)
         nodes['cc_node'] = cc_node
 
     if name:
@@ -57,7 +94,17 @@ def create_texture(name=None, path=None, cc=True, uv=True, ptex=False):
     return nodes
 
 
+@profiling.profiled()
 def create_cc_node(name=None, source_node=None):
+    cc_node = _run_om(lookdev_om.create_cc_node, name, source_node)
+
+    if cc_node is not None:
+        return pm.PyNode(cc_node)
+
+    return _create_cc_node_pymel(name, source_node)
+
+
+def _create_cc_node_pymel(name=None, source_node=None):
     # Create CC Node
     cc_node = pm.shadingNode('colorCorrect', asUtility=True)
 
@@ -96,6 +143,15 @@ def create_cc_node(name=None, source_node=None):
 
 
 def create_color_composite_node(name=None, source_a=None, source_b=None):
+    cc_node = _run_om(lookdev_om.create_color_composite_node, name, source_a, source_b)
+
+    if cc_node is not None:
+        return pm.PyNode(cc_node)
+
+    return _create_color_composite_node_pymel(name, source_a, source_b)
+
+
+def _create_color_composite_node_pymel(name=None, source_a=None, source_b=None):
     # Create CC Node
     cc_node = pm.shadingNode('colorComposite', asUtility=True)
 
@@ -207,7 +263,26 @@ def assign_material(mtl, nodes):
         cmds.sets(str(node), edit=True, forceElement=str(mtl))
 
 
+def get_file_texture_metadata(nodes=None):
+    # file node -> header metadata of its texture, all nodes in the scene by default. UDIM paths use the <UDIM> token
+    nodes = cmds.ls(nodes, type="file") if nodes else cmds.ls(type="file")
+    paths = dict((node, cmds.getAttr(node + ".computedFileTextureNamePattern")) for node in nodes)
+
+    metadata = texture_metadata.get_metadata_list([p for p in paths.values() if p])
+
+    return dict((node, metadata.get(os.path.normpath(path)) if path else None) for node, path in paths.items())
+
+
 def create_noise(name=None, cc=False, uv=True):
+    nodes = _run_om(lookdev_om.create_noise, name, cc, uv)
+
+    if nodes is not None:
+        return _as_pynodes(nodes)
+
+    return _create_noise_pymel(name, cc, uv)
+
+
+def _create_noise_pymel(name=None, cc=False, uv=True):
     nodes = {}
 
     noise_node = pm.shadingNode('noise', asTexture=True, isColorManaged=True)
@@ -223,7 +298,7 @@ def create_noise(name=None, cc=False, uv=True):
         pm.connectAttr(uv_node.outUV, noise_node.uvCoord)
 
     if cc:
-        cc_node = create_cc_node(source_node=noise_node)
+        cc_node = _create_cc_node_pymel(source_node=noise_node)
         nodes['cc_node'] = cc_node
 
     if name:
@@ -239,3 +314,29 @@ def create_noise(name=None, cc=False, uv=True):
 
 
     return nodes
+
+
+def benchmark(count=200):
+    # Run in mayapy, each backend builds count named textures with uv and cc nodes into a fresh scene
+    backends = [
+        ("pymel", _create_texture_pymel),
+        ("om", lookdev_om.create_texture),
+        ("om_pynodes", lambda *args: _as_pynodes(lookdev_om.create_texture(*args)))
+    ]
+
+    results = {}
+
+    for label, build in backends:
+        cmds.file(new=True, force=True)
+
+        start = time.perf_counter()
+
+        for i in range(count):
+            build("bench_{:04d}".format(i), "/textures/bench_{:04d}_BaseColor.exr".format(i), True, True, False)
+
+        results[label] = time.perf_counter() - start
+
+    for label, seconds in results.items():
+        logger.info("%-12s %s textures in %.2fs, %.2fms each", label, count, seconds, seconds * 1000.0 / count)
+
+    return results
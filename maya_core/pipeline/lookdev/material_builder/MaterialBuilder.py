@@ -8,6 +8,7 @@ import pymel.core as pm
 
 from maya_core.pipeline.lookdev import lookdev_utils
 from maya_core.pipeline.lookdev.vray_lookdev import vray_lookdev
+from maya_core.pipeline.lookdev.material_builder.shading_graph import DEFAULT_CONNECTIONS
 
 TEX_TYPES = [
     'diffuse',
@@ -20,24 +21,6 @@ TEX_TYPES = [
     'displacement'
 ]
 
-DEFAULT_CONNECTIONS = {
-    'VRayMtl': {
-        'diffuse': 'outColor.color',
-        'specular': 'outColor.reflectionColor',
-        'gloss': 'outColorR.reflectionGlossiness',
-        'roughness': 'outColorR.reflectionGlossiness',
-        'metal': 'outColorR.metalness',
-        'opacity': 'outColor.opacityMap',
-        'si': 'outColor.illumColor',
-        'normal': 'outColor.bumpMap',
-        'displacement': 'outColor.displacementShader',
-    },
-    'VRayMtl2Sided': {},
-    "aiStandardSurface": {
-        'diffuse': 'outColor.baseColor'
-    }
-}
-
 logger = logging.getLogger(__name__)
 logger.setLevel(10)
 
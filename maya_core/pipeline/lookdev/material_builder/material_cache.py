@@ -0,0 +1,129 @@
+import json
+import hashlib
+import logging
+
+import maya.cmds as cmds
+
+from maya_core.common_utils import common_utils as cu
+from maya_core.common_utils import scene_index
+from maya_core.pipeline.lookdev.material_builder import shading_graph_executor
+
+logger = logging.getLogger(__name__)
+logger.setLevel(10)
+
+# String attribute on built shaders, lets the cache find them again after the scene is saved and reopened
+HASH_ATTR = "materialDataHash"
+
+
+def get_material_hash(material_data):
+    # Canonical form: sorted keys, fixed separators, so dict order and formatting do not matter
+    canonical = json.dumps(material_data, sort_keys=True, separators=(",", ":"), default=str)
+
+    return hashlib.sha1(canonical.encode("utf-8")).hexdigest()
+
+
+class MaterialCache(scene_index.SceneIndex):
+    def __init__(self):
+        super(MaterialCache, self).__init__()
+
+        # material hash -> build result, as returned by shading_graph_executor.build_material
+        self._materials = {}
+
+    def rebuild(self):
+        self._materials = {}
+
+        for shader in cmds.ls("*." + HASH_ATTR, objectsOnly=True, recursive=True) or []:
+            shading_groups = cmds.listConnections(shader + ".outColor", destination=True, source=False,
+                                                  type="shadingEngine") or []
+
+            if not shading_groups:
+                continue
+
+            material_hash = cmds.getAttr(shader + "." + HASH_ATTR)
+            self._materials[material_hash] = (shader, shading_groups[0])
+
+        self._dirty = False
+
+        logger.debug("Material cache rebuilt, %s materials", len(self._materials))
+
+    def get(self, material_hash):
+        if self._dirty:
+            self.rebuild()
+
+        result = self._materials.get(material_hash)
+
+        if result is None:
+            return None
+
+        if not all(cmds.objExists(node) for node in result[:2]):
+            del self._materials[material_hash]
+            return None
+
+        return result
+
+    def add(self, material_hash, result):
+        shader = str(result[0])
+
+        if not cmds.attributeQuery(HASH_ATTR, node=shader, exists=True):
+            cmds.addAttr(shader, longName=HASH_ATTR, dataType="string")
+
+        cmds.setAttr(shader + "." + HASH_ATTR, material_hash, type="string")
+
+        self._materials[material_hash] = result
+
+    def build_material(self, material_data, force_new=False, share=None):
+        material_hash = get_material_hash(material_data)
+
+        if not force_new:
+            result = self.get(material_hash)
+
+            if result is not None:
+                logger.debug("Reusing %s for %s", result[0], material_data["material_name"])
+                return result
+
+        # The hash tag undoes with the nodes it is set on
+        with cu.batch_scene_edit("build_material"):
+            result = shading_graph_executor.build_material(material_data, share=share)
+
+            # A forced build becomes the one later requests reuse
+            if result:
+                self.add(material_hash, result)
+
+        return result
+
+    def build_materials(self, material_datas, force_new=False, share=None):
+        # material name -> (shader, shading group), cache misses are built together in one bulk call
+        materials = {}
+        missing = []
+        missing_hashes = []
+
+        for material_data in material_datas:
+            material_hash = get_material_hash(material_data)
+            result = None if force_new else self.get(material_hash)
+
+            if result is not None:
+                materials[material_data["material_name"]] = result[:2]
+            elif material_hash not in missing_hashes:
+                missing.append(material_data)
+                missing_hashes.append(material_hash)
+
+        if missing:
+            with cu.batch_scene_edit("build_materials"):
+                built = shading_graph_executor.build_material_list(missing, share=share)
+
+                for material_data, material_hash, result in zip(missing, missing_hashes, built):
+                    self.add(material_hash, result)
+                    materials[material_data["material_name"]] = result
+
+        return materials
+
+
+get_cache = scene_index.singleton(MaterialCache)
+
+
+def build_material(material_data, force_new=False, share=None):
+    return get_cache().build_material(material_data, force_new=force_new, share=share)
+
+
+def build_materials(material_datas, force_new=False, share=None):
+    return get_cache().build_materials(material_datas, force_new=force_new, share=share)
@@ -0,0 +1,254 @@
+import os
+import logging
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+logger.setLevel(10)
+
+DEFAULT_CONNECTIONS = {
+    'VRayMtl': {
+        'diffuse': 'outColor.color',
+        'specular': 'outColor.reflectionColor',
+        'gloss': 'outColorR.reflectionGlossiness',
+        'roughness': 'outColorR.reflectionGlossiness',
+        'metal': 'outColorR.metalness',
+        'opacity': 'outColor.opacityMap',
+        'si': 'outColor.illumColor',
+        'normal': 'outColor.bumpMap',
+        'displacement': 'outColor.displacementShader',
+    },
+    'VRayMtl2Sided': {},
+    "aiStandardSurface": {
+        'diffuse': 'outColor.baseColor'
+    }
+}
+
+# Mirrors vray_lookdev.create_displacement_node
+DISPLACEMENT_GROUPS = ["vray_subdivision", "vray_subquality", "vray_displacement"]
+
+DISPLACEMENT_ATTRS = [
+    ("overrideGlobalDisplacement", 1),
+    ("vrayEdgeLength", 4),
+    ("vrayMaxSubdivs", 128),
+    ("vrayDisplacementShift", -0.5)
+]
+
+SHADER = "shader"
+TEXTURE = "texture"
+UTILITY = "utility"
+SHADING_GROUP = "shading_group"
+
+
+# Name of the single place2dTexture materials built in sharing mode hang their textures off
+SHARED_UV_NAME = "shared_UV"
+
+UDIM_TOKEN = "<UDIM>"
+
+
+class GraphNode(object):
+    def __init__(self, node_id, node_type, name, category, color_managed=False, share_key=None):
+        self.id = node_id
+        self.node_type = node_type
+        self.name = name
+        self.category = category
+        self.color_managed = color_managed
+
+        # Nodes with a share key may be reused across materials and from the scene, see shared_nodes
+        self.share_key = share_key
+
+        # (attr, value, type) with type None for numeric values
+        self.attrs = []
+        self.vray_groups = []
+
+    def set(self, attr, value, attr_type=None):
+        self.attrs.append((attr, value, attr_type))
+        return self
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "node_type": self.node_type,
+            "name": self.name,
+            "category": self.category,
+            "color_managed": self.color_managed,
+            "share_key": self.share_key,
+            "attrs": self.attrs,
+            "vray_groups": self.vray_groups
+        }
+
+
+class ShadingGraph(object):
+    def __init__(self):
+        self.nodes = OrderedDict()
+        self.connections = []
+
+        self._shared = {}
+        self._connection_set = set()
+
+        # Per material, the node ids build_material used to return, nested the same way
+        self.outputs = []
+
+    def add_node(self, node_type, name, category, color_managed=False, share_key=None):
+        node = GraphNode(len(self.nodes), node_type, name, category, color_managed, share_key)
+        self.nodes[node.id] = node
+
+        if share_key is not None:
+            self._shared[share_key] = node
+
+        return node
+
+    def get_shared(self, share_key):
+        return self._shared.get(share_key)
+
+    def connect(self, source, source_attr, destination, destination_attr):
+        connection = (source.id, source_attr, destination.id, destination_attr)
+
+        # Shared nodes are reached from several materials, wire them once
+        if connection not in self._connection_set:
+            self._connection_set.add(connection)
+            self.connections.append(connection)
+
+    def resolve(self, names, outputs=None):
+        # Maps output node ids to the names the executor ended up with
+        outputs = self.outputs if outputs is None else outputs
+
+        if isinstance(outputs, (list, tuple)):
+            return tuple(self.resolve(names, o) for o in outputs)
+
+        return names[outputs] if outputs is not None else None
+
+    def to_dict(self):
+        return {
+            "nodes": [node.to_dict() for node in self.nodes.values()],
+            "connections": self.connections,
+            "outputs": self.outputs
+        }
+
+
+def _add_uv_node(graph, name, share):
+    if not share:
+        return graph.add_node("place2dTexture", name + "_UV", UTILITY)
+
+    share_key = ("place2dTexture",)
+
+    return graph.get_shared(share_key) or graph.add_node("place2dTexture", SHARED_UV_NAME, UTILITY,
+                                                         share_key=share_key)
+
+
+def _add_texture_node(graph, node_name, tex_path, use_ptex, share):
+    node_type, suffix, path_attr = ("VRayPtex", "_PTEX", "ptexFile") if use_ptex else \
+        ("file", "_TEX", "fileTextureName")
+
+    share_key = None
+
+    if share:
+        share_key = (node_type, os.path.normcase(os.path.normpath(tex_path)))
+
+        texture_node = graph.get_shared(share_key)
+        if texture_node is not None:
+            return texture_node
+
+        # A shared node is named after its file, not after whichever material got there first
+        node_name = os.path.splitext(os.path.basename(tex_path))[0]
+
+    texture_node = graph.add_node(node_type, node_name + suffix, TEXTURE, color_managed=True, share_key=share_key)
+    texture_node.set(path_attr, tex_path, "string")
+
+    # Scanned texture sets point at every tile of a UDIM sequence through the token
+    if not use_ptex and UDIM_TOKEN in tex_path:
+        texture_node.set("uvTilingMode", 3)
+
+    return texture_node
+
+
+def _compile_VRayMtl(graph, material_data, name, share=False):
+    shader = graph.add_node("VRayMtl", name + "_mtl", SHADER)
+    shading_group = graph.add_node("shadingEngine", name + "_sg", SHADING_GROUP)
+
+    graph.connect(shader, "outColor", shading_group, "surfaceShader")
+
+    textures = material_data.get("textures")
+
+    if not textures:
+        return [shader.id, shading_group.id]
+
+    uv_node = _add_uv_node(graph, name, share)
+
+    displacement = None
+
+    for tex_type, tex_path in textures.items():
+        if tex_type == "unknown":
+            continue
+
+        use_ptex = tex_path.endswith(".tex")
+        connection = DEFAULT_CONNECTIONS['VRayMtl'][tex_type].split(".")
+        node_name = name + "_" + tex_type
+
+        texture_node = _add_texture_node(graph, node_name, tex_path, use_ptex, share)
+
+        if tex_type != "displacement":
+            cc_node = graph.add_node("colorCorrect", node_name + "_CC", UTILITY)
+
+            graph.connect(cc_node, "colGammaX", cc_node, "colGammaY")
+            graph.connect(cc_node, "colGammaX", cc_node, "colGammaZ")
+            graph.connect(texture_node, "outColor", cc_node, "inColor")
+            graph.connect(texture_node, "outAlpha", cc_node, "inAlpha")
+
+            graph.connect(cc_node, connection[0], shader, connection[1])
+        else:
+            displacement = graph.add_node("VRayDisplacement", name + "_vrdisp", UTILITY)
+            displacement.vray_groups.extend(DISPLACEMENT_GROUPS)
+
+            for attr, value in DISPLACEMENT_ATTRS:
+                displacement.set(attr, value)
+
+            graph.connect(texture_node, "outColor", displacement, "displacement")
+            graph.connect(texture_node, connection[0], shading_group, connection[1])
+
+        if not use_ptex:
+            graph.connect(uv_node, "outUV", texture_node, "uvCoord")
+
+        # Set default values
+        if tex_type == "roughness":
+            shader.set("useRoughness", 1)
+
+        if tex_type == "normal":
+            shader.set("bumpMapType", 2)
+
+    return [shader.id, shading_group.id, displacement.id if displacement else None]
+
+
+def _compile_VRayMtl2Sided(graph, material_data, name, share=False):
+    shader = graph.add_node("VRayMtl2Sided", name + "_2sided_mat", SHADER)
+    shading_group = graph.add_node("shadingEngine", name + "_2sided_sg", SHADING_GROUP)
+
+    graph.connect(shader, "outColor", shading_group, "surfaceShader")
+
+    vray_mtl = _compile_VRayMtl(graph, material_data, name, share)
+    front = graph.nodes[vray_mtl[0]]
+
+    graph.connect(front, "outColor", shader, "frontMaterial")
+    graph.connect(front, "outColor", shader, "backMaterial")
+
+    return [shader.id, shading_group.id, vray_mtl]
+
+
+COMPILERS = {
+    "VRayMtl": _compile_VRayMtl,
+    "VRayMtl2Sided": _compile_VRayMtl2Sided
+}
+
+
+def compile_material(material_data, graph=None, share=False):
+    # Several materials can be compiled into one graph, each appends its outputs. With share, texture and UV nodes
+    # are keyed by file path and reused within the graph, and from the scene by the executor
+    graph = graph or ShadingGraph()
+
+    compiler = COMPILERS.get(material_data['material_shader'])
+
+    if compiler is None:
+        raise ValueError("No shading graph compiler for {}".format(material_data['material_shader']))
+
+    graph.outputs.append(compiler(graph, material_data, material_data['material_name'], share))
+
+    return graph
@@ -0,0 +1,164 @@
+import time
+import logging
+from collections import OrderedDict
+
+import maya.cmds as cmds
+
+from maya_core.common_utils import profiling
+from maya_core.common_utils import common_utils as cu
+from maya_core.pipeline.lookdev.material_builder import shading_graph
+from maya_core.pipeline.lookdev.material_builder import MaterialBuilder
+from maya_core.pipeline.lookdev.material_builder import shared_nodes
+
+logger = logging.getLogger(__name__)
+logger.setLevel(10)
+
+CATEGORY_FLAGS = {
+    shading_graph.SHADER: "asShader",
+    shading_graph.TEXTURE: "asTexture",
+    shading_graph.UTILITY: "asUtility"
+}
+
+
+def _create_node(node):
+    if node.category == shading_graph.SHADING_GROUP:
+        return cmds.sets(name=node.name, empty=True, renderable=True, noSurfaceShader=True)
+
+    flags = {CATEGORY_FLAGS[node.category]: True}
+
+    if node.color_managed:
+        flags["isColorManaged"] = True
+
+    return cmds.shadingNode(node.node_type, name=node.name, **flags)
+
+
+@profiling.profiled()
+def execute_graph(graph, shared_index=None):
+    # One cmds call per node, attribute and connection, node names are plain strings throughout
+    names = {}
+    reused = set()
+
+    for node in graph.nodes.values():
+        scene_key = None
+
+        if node.share_key is not None and shared_index is not None:
+            scene_key = shared_nodes.get_scene_key(node)
+            existing = shared_index.get(scene_key)
+
+            # Already built and wired by an earlier material
+            if existing:
+                names[node.id] = existing
+                reused.add(node.id)
+                continue
+
+        name = names[node.id] = _create_node(node)
+
+        if scene_key is not None:
+            shared_index.add(scene_key, name)
+
+        for group in node.vray_groups:
+            cmds.vray("addAttributesFromGroup", name, group, 1)
+
+        for attr, value, attr_type in node.attrs:
+            if attr_type:
+                cmds.setAttr(name + "." + attr, value, type=attr_type)
+            else:
+                cmds.setAttr(name + "." + attr, value)
+
+    for source, source_attr, destination, destination_attr in graph.connections:
+        if destination in reused:
+            continue
+
+        cmds.connectAttr(names[source] + "." + source_attr, names[destination] + "." + destination_attr)
+
+    return names
+
+
+def build_material(material_data, share=None):
+    # Same result shape as MaterialBuilder.build_material, with node names instead of PyNodes
+    share = shared_nodes.SHARE_NODES if share is None else share
+
+    graph = shading_graph.compile_material(material_data, share=share)
+
+    with cu.batch_scene_edit("build_material"):
+        names = execute_graph(graph, shared_nodes.get_index() if share else None)
+
+    logger.info("Created %s", material_data['material_name'])
+
+    return graph.resolve(names, graph.outputs[0])
+
+
+@profiling.profiled()
+def build_material_list(material_datas, share=None):
+    # Everything goes into one graph, nodes get their final names at creation and are applied in one undo chunk.
+    # Returns (shader, shading group) per material_data, in order
+    share = shared_nodes.SHARE_NODES if share is None else share
+
+    graph = shading_graph.ShadingGraph()
+
+    for material_data in material_datas:
+        shading_graph.compile_material(material_data, graph=graph, share=share)
+
+    with cu.batch_scene_edit("build_materials"):
+        names = execute_graph(graph, shared_nodes.get_index() if share else None)
+
+    logger.info("Created %s materials, %s nodes", len(material_datas), len(graph.nodes))
+
+    return [graph.resolve(names, outputs)[:2] for outputs in graph.outputs]
+
+
+def build_materials(material_datas, share=None):
+    # material name -> (shader, shading group)
+    results = build_material_list(material_datas, share=share)
+
+    return OrderedDict((material_data['material_name'], result)
+                       for material_data, result in zip(material_datas, results))
+
+
+def benchmark(count=1000):
+    # Run in mayapy, each path builds into a fresh scene
+    material_datas = []
+
+    for i in range(count):
+        material_datas.append({
+            "material_name": "bench_{:04d}".format(i),
+            "material_shader": "VRayMtl",
+            "textures": {
+                "diffuse": "/textures/bench_{:04d}_BaseColor.exr".format(i),
+                "roughness": "/textures/bench_{:04d}_Roughness.exr".format(i),
+                "normal": "/textures/bench_{:04d}_Normal.exr".format(i),
+                "displacement": "/textures/bench_{:04d}_Displacement.exr".format(i)
+            }
+        })
+
+    results = {}
+
+    for label, build in (("pymel", MaterialBuilder.build_material), ("compiled", build_material)):
+        cmds.file(new=True, force=True)
+
+        start = time.perf_counter()
+
+        for material_data in material_datas:
+            build(material_data)
+
+        results[label] = time.perf_counter() - start
+
+    # Bulk builds at two sizes, per-material time should stay flat
+    for size in (count // 10, count):
+        cmds.file(new=True, force=True)
+
+        start = time.perf_counter()
+        build_materials(material_datas[:size])
+        results["bulk_{}".format(size)] = time.perf_counter() - start
+
+    start = time.perf_counter()
+
+    for material_data in material_datas:
+        shading_graph.compile_material(material_data)
+
+    results["compile_only"] = time.perf_counter() - start
+
+    for label, seconds in results.items():
+        logger.info("%-12s %s materials in %.2fs", label, count, seconds)
+
+    return results
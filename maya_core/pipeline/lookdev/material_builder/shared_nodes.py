@@ -0,0 +1,68 @@
+import os
+import logging
+
+import maya.cmds as cmds
+
+from maya_core.common_utils import scene_index
+
+logger = logging.getLogger(__name__)
+logger.setLevel(10)
+
+# Sharing is opt-in, per call or for the whole session through the environment
+SHARE_NODES = bool(os.environ.get("MAYA_CORE_SHARE_TEXTURE_NODES"))
+
+# String attribute on nodes created in sharing mode, only tagged nodes are ever reused
+KEY_ATTR = "sharedNodeKey"
+
+
+def get_scene_key(graph_node):
+    # File nodes are keyed by path and the colour space the file rules give it, a changed rule means a new node
+    node_type = graph_node.share_key[0]
+
+    if node_type == "file":
+        path = graph_node.share_key[1]
+        color_space = cmds.colorManagementFileRules(evaluate=path) or ""
+        return "|".join([node_type, path, color_space])
+
+    return "|".join(graph_node.share_key)
+
+
+class SharedNodeIndex(scene_index.SceneIndex):
+    def __init__(self):
+        super(SharedNodeIndex, self).__init__()
+
+        # scene key -> node name
+        self._nodes = {}
+
+    def rebuild(self):
+        self._nodes = {}
+
+        for node in cmds.ls("*." + KEY_ATTR, objectsOnly=True, recursive=True) or []:
+            self._nodes.setdefault(cmds.getAttr(node + "." + KEY_ATTR), node)
+
+        self._dirty = False
+
+        logger.debug("Shared node index rebuilt, %s nodes", len(self._nodes))
+
+    def get(self, key):
+        if self._dirty:
+            self.rebuild()
+
+        node = self._nodes.get(key)
+
+        if node is not None and not cmds.objExists(node):
+            del self._nodes[key]
+            return None
+
+        return node
+
+    def add(self, key, node):
+        if not cmds.attributeQuery(KEY_ATTR, node=node, exists=True):
+            cmds.addAttr(node, longName=KEY_ATTR, dataType="string")
+
+        cmds.setAttr(node + "." + KEY_ATTR, key, type="string")
+
+        self._nodes[key] = node
+
+
+get_index = scene_index.singleton(SharedNodeIndex)
@@ -0,0 +1,165 @@
+import re
+import time
+import logging
+from functools import lru_cache
+
+logger = logging.getLogger(__name__)
+
+# Ordered by priority, the first role in this list wins when a path matches several roles.
+# Studios can swap the table with set_role_patterns().
+DEFAULT_ROLE_PATTERNS = [
+    ("diffuse", "diffuse|basecolor|albedo"),
+    ("specular", "specular"),
+    ("gloss", "gloss"),
+    ("roughness", "roughness"),
+    ("normal", "normal"),
+    ("metal", "metal"),
+]
+
+# Every role MaterialBuilder can connect, for scanners that build materials from texture sets
+EXTENDED_ROLE_PATTERNS = DEFAULT_ROLE_PATTERNS + [
+    ("opacity", "opacity|transparency|alpha"),
+    ("displacement", "displacement|height|disp"),
+    ("si", "emissive|emission|selfillum"),
+]
+
+UNKNOWN_ROLE = "unknown"
+
+CACHE_SIZE = 65536
+
+
+class TextureRoleClassifier(object):
+    def __init__(self, role_patterns=None, cache_size=CACHE_SIZE):
+        self.role_patterns = list(role_patterns or DEFAULT_ROLE_PATTERNS)
+        self.roles = [role for role, _ in self.role_patterns]
+
+        # Bound search methods of the precompiled table, the path is lowered once per lookup
+        self._patterns = [(role, re.compile(pattern)) for role, pattern in self.role_patterns]
+        self._searches = [(role, pattern.search) for role, pattern in self._patterns]
+
+        self.classify_texture = lru_cache(maxsize=cache_size)(self._classify_texture)
+
+    def _classify_texture(self, tex_path):
+        tex_path = tex_path.lower()
+
+        for role, search in self._searches:
+            if search(tex_path):
+                return role
+
+        return UNKNOWN_ROLE
+
+    def find_role(self, text):
+        # Uncached, returns the match too so callers can cut the role token out of a file name
+        lowered = text.lower()
+
+        for role, pattern in self._patterns:
+            match = pattern.search(lowered)
+
+            if match:
+                return role, match
+
+        return UNKNOWN_ROLE, None
+
+    def classify_textures(self, tex_paths, keep_unknown=True):
+        textures = {}
+
+        if keep_unknown:
+            textures[UNKNOWN_ROLE] = []
+
+        for tex_path in tex_paths:
+            role = self.classify_texture(tex_path)
+
+            if role == UNKNOWN_ROLE:
+                if keep_unknown:
+                    textures[UNKNOWN_ROLE].append(tex_path)
+                continue
+
+            textures[role] = tex_path
+
+        return textures
+
+    def clear_cache(self):
+        self.classify_texture.cache_clear()
+
+
+_classifier = TextureRoleClassifier()
+
+
+def get_classifier():
+    return _classifier
+
+
+def set_role_patterns(role_patterns):
+    global _classifier
+
+    _classifier = TextureRoleClassifier(role_patterns)
+
+    logger.info("Texture role patterns set to %s", [role for role, _ in role_patterns])
+
+    return _classifier
+
+
+def classify_texture(tex_path):
+    return _classifier.classify_texture(tex_path)
+
+
+def classify_textures(tex_paths, keep_unknown=True):
+    return _classifier.classify_textures(tex_paths, keep_unknown=keep_unknown)
+
+
+def _classify_texture_chain(tex_path):
+    # Reference implementation, the per-role re.search chain the publishers used to run
+    if re.search("(diffuse|basecolor|albedo)", tex_path.lower()):
+        return "diffuse"
+    elif re.search("(specular)", tex_path.lower()):
+        return "specular"
+    elif re.search("(gloss)", tex_path.lower()):
+        return "gloss"
+    elif re.search("(roughness)", tex_path.lower()):
+        return "roughness"
+    elif re.search("(normal)", tex_path.lower()):
+        return "normal"
+    elif re.search("(metal)", tex_path.lower()):
+        return "metal"
+
+    return UNKNOWN_ROLE
+
+
+def benchmark(tex_paths=None, repeat=20):
+    if tex_paths is None:
+        suffixes = ["BaseColor", "Albedo", "Specular", "Glossiness", "Roughness", "Normal", "Metalness", "AO",
+                    "Height", "Opacity"]
+        tex_paths = [r"F:\share\assets\Kitbash\materials\KB_Part_{:04d}\KB_Part_{:04d}_{}.png".format(i, i, s)
+                     for i in range(500) for s in suffixes]
+
+    results = {"paths": len(tex_paths) * repeat}
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        chain = [_classify_texture_chain(p) for p in tex_paths]
+    results["chain"] = time.perf_counter() - start
+
+    classifier = TextureRoleClassifier(_classifier.role_patterns)
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        compiled = [classifier._classify_texture(p) for p in tex_paths]
+    results["compiled"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        cached = [classifier.classify_texture(p) for p in tex_paths]
+    results["compiled_cached"] = time.perf_counter() - start
+
+    if classifier.role_patterns == DEFAULT_ROLE_PATTERNS and (chain != compiled or chain != cached):
+        logger.warning("Compiled classifier disagrees with the reference chain")
+
+    for key in ("chain", "compiled", "compiled_cached"):
+        logger.info("%-16s %8.1f paths/ms", key, results["paths"] / (results[key] * 1000.0))
+
+    return results
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    benchmark()
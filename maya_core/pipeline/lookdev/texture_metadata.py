@@ -0,0 +1,518 @@
+import os
+import re
+import json
+import mmap
+import time
+import struct
+import sqlite3
+import logging
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+logger.setLevel(10)
+
+CACHE_PATH = os.environ.get("MAYA_CORE_TEXTURE_METADATA_CACHE") or \
+    os.path.join(tempfile.gettempdir(), "maya_core_texture_metadata.db")
+
+# Bump when readers change what they return, older rows are ignored and read again
+CACHE_VERSION = 1
+
+MAX_WORKERS = 8
+
+UDIM_TOKEN = "<UDIM>"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS metadata (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime REAL NOT NULL,
+    version INTEGER NOT NULL,
+    data TEXT
+);
+"""
+
+# SQLite caps host parameters per statement
+QUERY_CHUNK = 500
+
+
+def _metadata(file_format, width, height, channels, bit_depth, **kwargs):
+    metadata = {
+        "format": file_format,
+        "width": width,
+        "height": height,
+        "channels": channels,
+        "bit_depth": bit_depth
+    }
+    metadata.update(kwargs)
+
+    return metadata
+
+
+def read_png(data):
+    if data[:8] != b"\x89PNG\r\n\x1a\n" or data[12:16] != b"IHDR":
+        raise ValueError("Not a PNG file")
+
+    width, height, bit_depth, color_type = struct.unpack_from(">IIBB", data, 16)
+
+    # Palette images decode to RGB
+    channels = {0: 1, 2: 3, 3: 3, 4: 2, 6: 4}.get(color_type)
+
+    if channels is None:
+        raise ValueError("Invalid PNG color type {}".format(color_type))
+
+    return _metadata("png", width, height, channels, 8 if color_type == 3 else bit_depth,
+                     interlaced=bool(data[28]))
+
+
+# Start of frame markers, everything from C0 to CF except DHT, JPG and DAC
+_JPEG_SOF = set(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+
+
+def read_jpeg(data):
+    if data[:2] != b"\xff\xd8":
+        raise ValueError("Not a JPEG file")
+
+    offset = 2
+    size = len(data)
+
+    while offset + 4 <= size:
+        if data[offset] != 0xFF:
+            raise ValueError("Invalid JPEG marker at {}".format(offset))
+
+        marker = data[offset + 1]
+
+        # Fill bytes and markers without a payload
+        if marker == 0xFF:
+            offset += 1
+            continue
+
+        if marker == 0x01 or 0xD0 <= marker <= 0xD9:
+            offset += 2
+            continue
+
+        length = struct.unpack_from(">H", data, offset + 2)[0]
+
+        if marker in _JPEG_SOF:
+            precision, height, width, components = struct.unpack_from(">BHHB", data, offset + 4)
+            return _metadata("jpeg", width, height, components, precision, progressive=marker in (0xC2, 0xC6))
+
+        offset += 2 + length
+
+    raise ValueError("No JPEG frame header found")
+
+
+def read_tga(data):
+    if len(data) < 18:
+        raise ValueError("Not a TGA file")
+
+    (id_length, color_map_type, image_type, _, _, color_map_depth, _, _, width, height, pixel_depth,
+     descriptor) = struct.unpack_from("<BBBHHBHHHHBB", data, 0)
+
+    alpha_bits = descriptor & 0x0F
+
+    if image_type in (1, 9):
+        depth = color_map_depth
+    elif image_type in (2, 10, 3, 11):
+        depth = pixel_depth
+    else:
+        raise ValueError("Unsupported TGA image type {}".format(image_type))
+
+    if image_type in (3, 11):
+        channels = 2 if alpha_bits else 1
+    else:
+        channels = 4 if alpha_bits or depth == 32 else 3
+
+    return _metadata("tga", width, height, channels, 5 if depth in (15, 16) else 8,
+                     compressed=image_type in (9, 10, 11))
+
+
+# Tag ids read from the first IFD
+_TIFF_TAGS = {
+    256: "width",
+    257: "height",
+    258: "bits_per_sample",
+    259: "compression",
+    277: "channels",
+    322: "tile_width",
+    339: "sample_format"
+}
+
+# field type -> (struct code, size)
+_TIFF_TYPES = {1: ("B", 1), 3: ("H", 2), 4: ("I", 4), 16: ("Q", 8)}
+
+_TIFF_SAMPLE_FORMATS = {1: "uint", 2: "int", 3: "float"}
+
+
+def read_tiff(data):
+    byte_order = {b"II": "<", b"MM": ">"}.get(bytes(data[:2]))
+
+    if byte_order is None:
+        raise ValueError("Not a TIFF file")
+
+    magic = struct.unpack_from(byte_order + "H", data, 2)[0]
+
+    # Classic and BigTIFF differ in offset, count and entry sizes only
+    if magic == 42:
+        ifd_offset = struct.unpack_from(byte_order + "I", data, 4)[0]
+        count_code, offset_code, entry_size = "H", "I", 12
+    elif magic == 43:
+        ifd_offset = struct.unpack_from(byte_order + "Q", data, 8)[0]
+        count_code, offset_code, entry_size = "Q", "Q", 20
+    else:
+        raise ValueError("Not a TIFF file")
+
+    count_size = struct.calcsize(count_code)
+    offset_size = struct.calcsize(offset_code)
+
+    tags = {}
+    levels = 0
+    visited = set()
+
+    # Mipmapped .tx files store one IFD per level, only the first is parsed beyond counting. A corrupt file can
+    # point back at an earlier IFD, each one is read once
+    while ifd_offset and ifd_offset + count_size <= len(data) and ifd_offset not in visited:
+        visited.add(ifd_offset)
+        entry_count = struct.unpack_from(byte_order + count_code, data, ifd_offset)[0]
+
+        if not levels:
+            for i in range(entry_count):
+                entry = ifd_offset + count_size + i * entry_size
+                tag, field_type = struct.unpack_from(byte_order + "HH", data, entry)
+
+                if tag not in _TIFF_TAGS or field_type not in _TIFF_TYPES:
+                    continue
+
+                code, size = _TIFF_TYPES[field_type]
+                value_count = struct.unpack_from(byte_order + offset_code, data, entry + 4)[0]
+                value_offset = entry + 4 + offset_size
+
+                # Values that don't fit in the entry live elsewhere, the entry holds their offset
+                if value_count * size > offset_size:
+                    value_offset = struct.unpack_from(byte_order + offset_code, data, value_offset)[0]
+
+                tags[_TIFF_TAGS[tag]] = struct.unpack_from(byte_order + code * value_count, data, value_offset)
+
+        levels += 1
+        ifd_offset = struct.unpack_from(byte_order + offset_code, data,
+                                        ifd_offset + count_size + entry_count * entry_size)[0]
+
+    if "width" not in tags or "height" not in tags:
+        raise ValueError("TIFF file without image dimensions")
+
+    channels = tags.get("channels", (1,))[0]
+
+    return _metadata("tiff", tags["width"][0], tags["height"][0], channels,
+                     max(tags.get("bits_per_sample", (1,))),
+                     sample_format=_TIFF_SAMPLE_FORMATS.get(tags.get("sample_format", (1,))[0], "uint"),
+                     compression=tags.get("compression", (1,))[0],
+                     tiled="tile_width" in tags, levels=levels)
+
+
+_EXR_PIXEL_TYPES = {0: ("uint", 32), 1: ("half", 16), 2: ("float", 32)}
+
+_EXR_COMPRESSIONS = ["none", "rle", "zips", "zip", "piz", "pxr24", "b44", "b44a", "dwaa", "dwab"]
+
+_EXR_LEVEL_MODES = ["one_level", "mipmap", "ripmap"]
+
+
+def _read_cstring(data, offset):
+    end = data.find(b"\x00", offset)
+
+    if end < 0:
+        raise ValueError("Unterminated EXR header string")
+
+    return bytes(data[offset:end]).decode("latin-1"), end + 1
+
+
+def _read_exr_channels(data, offset, end):
+    channels = []
+
+    while offset < end and data[offset] != 0:
+        name, offset = _read_cstring(data, offset)
+        pixel_type = struct.unpack_from("<i", data, offset)[0]
+        channels.append((name, _EXR_PIXEL_TYPES.get(pixel_type, ("uint", 32))))
+        offset += 16
+
+    return channels
+
+
+def read_exr(data):
+    if data[:4] != b"\x76\x2f\x31\x01":
+        raise ValueError("Not an EXR file")
+
+    flags = struct.unpack_from("<I", data, 4)[0]
+
+    offset = 8
+    attributes = {}
+
+    # Attribute list ends with an empty name, for multipart files this is the first part's header
+    while True:
+        name, offset = _read_cstring(data, offset)
+
+        if not name:
+            break
+
+        attr_type, offset = _read_cstring(data, offset)
+        size = struct.unpack_from("<i", data, offset)[0]
+        offset += 4
+
+        if name == "channels":
+            attributes[name] = _read_exr_channels(data, offset, offset + size)
+        elif name == "dataWindow":
+            attributes[name] = struct.unpack_from("<iiii", data, offset)
+        elif name == "compression":
+            attributes[name] = data[offset]
+        elif name == "tiles":
+            attributes[name] = struct.unpack_from("<IIB", data, offset)
+
+        offset += size
+
+    if "channels" not in attributes or "dataWindow" not in attributes:
+        raise ValueError("EXR header without channels or data window")
+
+    x_min, y_min, x_max, y_max = attributes["dataWindow"]
+    channels = attributes["channels"]
+    compression = attributes.get("compression", 0)
+    tiles = attributes.get("tiles")
+
+    return _metadata("exr", x_max - x_min + 1, y_max - y_min + 1, len(channels),
+                     max(bits for _, (_, bits) in channels) if channels else 0,
+                     channel_names=[name for name, _ in channels],
+                     sample_format=channels[0][1][0] if channels else None,
+                     compression=_EXR_COMPRESSIONS[compression] if compression < len(_EXR_COMPRESSIONS) else None,
+                     tiled=tiles is not None or bool(flags & 0x200),
+                     level_mode=_EXR_LEVEL_MODES[tiles[2] & 0x0F] if tiles and tiles[2] & 0x0F < 3 else None,
+                     multipart=bool(flags & 0x1000))
+
+
+READERS = {
+    ".png": read_png,
+    ".jpg": read_jpeg,
+    ".jpeg": read_jpeg,
+    ".tga": read_tga,
+    ".tif": read_tiff,
+    ".tiff": read_tiff,
+    ".tx": read_tiff,
+    ".exr": read_exr
+}
+
+
+def read_header(path):
+    # The file is mapped, not read, only the pages the header parser touches are loaded
+    reader = READERS.get(os.path.splitext(path)[-1].lower())
+
+    if reader is None:
+        raise ValueError("No header reader for {}".format(path))
+
+    with open(path, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            try:
+                return reader(data)
+            except (struct.error, IndexError) as e:
+                raise ValueError("Truncated header in {}: {}".format(path, e))
+
+
+def get_udim_tiles(path, listings=None):
+    # "/tex/rock_BaseColor.<UDIM>.exr" -> {1001: "/tex/rock_BaseColor.1001.exr", ...}. listings caches directory
+    # contents across calls, sequences sharing a folder list it once
+    directory, file_name = os.path.split(path)
+    prefix, suffix = file_name.split(UDIM_TOKEN, 1)
+    tile_re = re.compile(re.escape(prefix) + r"(1\d{3})" + re.escape(suffix) + "$")
+    listings = {} if listings is None else listings
+
+    if directory not in listings:
+        try:
+            # Relative paths list the working directory, tiles keep the form of the path they came from
+            listings[directory] = os.listdir(directory or ".")
+        except OSError:
+            listings[directory] = []
+
+    tiles = {}
+
+    for name in listings[directory]:
+        match = tile_re.match(name)
+
+        if match:
+            tiles[int(match.group(1))] = os.path.join(directory, name)
+
+    return tiles
+
+
+class TextureMetadataCache(object):
+    def __init__(self, cache_path=CACHE_PATH, max_workers=MAX_WORKERS):
+        self.cache_path = cache_path
+        self.max_workers = max_workers
+
+        # path -> (size, mtime, metadata), in front of the database
+        self._entries = {}
+        self._lock = threading.RLock()
+
+        self.connection = sqlite3.connect(cache_path, check_same_thread=False, isolation_level=None, timeout=60)
+        self.connection.executescript(SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    def _load(self, paths):
+        # One query per chunk for everything not already in memory
+        paths = [p for p in paths if p not in self._entries]
+
+        for i in range(0, len(paths), QUERY_CHUNK):
+            chunk = paths[i:i + QUERY_CHUNK]
+
+            with self._lock:
+                rows = self.connection.execute(
+                    "SELECT path, size, mtime, data FROM metadata WHERE version = ? AND path IN ({})".format(
+                        ",".join("?" * len(chunk))), [CACHE_VERSION] + chunk).fetchall()
+
+            for path, size, mtime, data in rows:
+                self._entries[path] = (size, mtime, json.loads(data) if data else None)
+
+    def _read(self, path):
+        # Stat, then the header only when size or mtime moved since it was cached
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return path, None, None
+
+        entry = self._entries.get(path)
+
+        if entry is not None and entry[0] == stat.st_size and entry[1] == stat.st_mtime:
+            return path, entry, False
+
+        try:
+            metadata = read_header(path)
+        except (OSError, ValueError) as e:
+            logger.debug("Could not read header of %s: %s", path, e)
+            metadata = None
+
+        return path, (stat.st_size, stat.st_mtime, metadata), True
+
+    def get_metadata_list(self, paths):
+        # path -> metadata dict, None for missing or unreadable files
+        paths = [os.path.normpath(p) for p in paths]
+        file_paths = []
+
+        # UDIM path -> tile map, expanded once and reused for the result
+        udim_tiles = {}
+        listings = {}
+
+        for path in paths:
+            if UDIM_TOKEN in path:
+                if path not in udim_tiles:
+                    udim_tiles[path] = get_udim_tiles(path, listings)
+
+                file_paths.extend(udim_tiles[path].values())
+            else:
+                file_paths.append(path)
+
+        file_paths = list(dict.fromkeys(file_paths))
+        self._load(file_paths)
+
+        if len(file_paths) > 1 and self.max_workers > 1:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                results = list(executor.map(self._read, file_paths))
+        else:
+            results = [self._read(p) for p in file_paths]
+
+        updated = []
+
+        for path, entry, changed in results:
+            if entry is None:
+                self._entries.pop(path, None)
+                continue
+
+            self._entries[path] = entry
+
+            if changed:
+                updated.append((path, entry[0], entry[1], CACHE_VERSION,
+                                json.dumps(entry[2]) if entry[2] is not None else None))
+
+        if updated:
+            with self._lock:
+                self.connection.execute("BEGIN")
+                self.connection.executemany("INSERT OR REPLACE INTO metadata (path, size, mtime, version, data) "
+                                            "VALUES (?, ?, ?, ?, ?)", updated)
+                self.connection.execute("COMMIT")
+
+        return dict((path, self._get_entry_metadata(path, udim_tiles.get(path))) for path in paths)
+
+    def _get_entry_metadata(self, path, udim_tiles=None):
+        if udim_tiles is None:
+            entry = self._entries.get(path)
+            return entry[2] if entry is not None else None
+
+        # A UDIM sequence reports its first tile, plus every tile and its resolution
+        tiles = dict((tile, self._entries.get(tile_path)) for tile, tile_path in udim_tiles.items())
+        tiles = dict((tile, entry[2]) for tile, entry in tiles.items() if entry is not None and entry[2] is not None)
+
+        if not tiles:
+            return None
+
+        metadata = dict(tiles[min(tiles)])
+        metadata["udim_tiles"] = sorted(tiles)
+        metadata["tile_resolutions"] = dict((str(tile), [m["width"], m["height"]]) for tile, m in tiles.items())
+
+        return metadata
+
+    def get_metadata(self, path):
+        return self.get_metadata_list([path])[os.path.normpath(path)]
+
+    def clear(self):
+        with self._lock:
+            self.connection.execute("DELETE FROM metadata")
+
+        self._entries = {}
+
+
+_cache = None
+
+
+def get_cache():
+    global _cache
+
+    if _cache is None:
+        _cache = TextureMetadataCache()
+
+    return _cache
+
+
+def get_metadata(path):
+    return get_cache().get_metadata(path)
+
+
+def get_metadata_list(paths):
+    return get_cache().get_metadata_list(paths)
+
+
+def benchmark(tex_paths, repeat=3):
+    # Cold is a fresh database, warm a fresh process reusing it, hot the in-memory entries
+    cache_path = os.path.join(tempfile.mkdtemp(prefix="texture_metadata_"), "metadata.db")
+    results = {"paths": len(tex_paths)}
+
+    cache = TextureMetadataCache(cache_path)
+
+    start = time.perf_counter()
+    cache.get_metadata_list(tex_paths)
+    results["cold"] = time.perf_counter() - start
+
+    cache.close()
+    cache = TextureMetadataCache(cache_path)
+
+    start = time.perf_counter()
+    cache.get_metadata_list(tex_paths)
+    results["warm"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        cache.get_metadata_list(tex_paths)
+    results["hot"] = (time.perf_counter() - start) / repeat
+
+    cache.close()
+
+    for key in ("cold", "warm", "hot"):
+        logger.info("%-6s %s textures in %.3fs", key, len(tex_paths), results[key])
+
+    return results
@@ -0,0 +1,315 @@
+import os
+import re
+import json
+import time
+import shutil
+import logging
+import tempfile
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from maya_core.pipeline.lookdev import texture_classifier
+
+logger = logging.getLogger(__name__)
+logger.setLevel(10)
+
+# Ordered by preference, when a set has the same map in several formats the first one wins
+TEXTURE_EXTENSIONS = [".exr", ".tx", ".tif", ".tiff", ".png", ".tga", ".jpg", ".jpeg", ".tex"]
+
+UDIM_TOKEN = "<UDIM>"
+
+MAX_WORKERS = 16
+
+# Bump when grouping rules change so cached directory results are rebuilt
+CACHE_VERSION = 1
+
+_UDIM_RE = re.compile(r"^(.*?[._])(1\d{3})$")
+_SEPARATORS = "_.- "
+_NAME_RE = re.compile(r"[^0-9A-Za-z_]+")
+_TRAILING_TOKEN_RE = re.compile(r"[_.\- ]*[^_.\- ]*$")
+
+_classifier = texture_classifier.TextureRoleClassifier(texture_classifier.EXTENDED_ROLE_PATTERNS)
+
+
+def parse_texture_name(file_name):
+    # "rock_01_BaseColor.1001.exr" -> ("rock_01", "diffuse", 1001)
+    stem, ext = os.path.splitext(file_name)
+
+    tile = None
+    udim_match = _UDIM_RE.match(stem)
+
+    if udim_match:
+        stem, tile = udim_match.group(1).rstrip(_SEPARATORS), int(udim_match.group(2))
+
+    role, match = _classifier.find_role(stem)
+
+    if match is None:
+        return stem, role, tile
+
+    # Swallow the rest of the word, "Metalness" and "Roughness" leave nothing behind
+    end = match.end()
+    while end < len(stem) and stem[end].isalpha():
+        end += 1
+
+    set_name = (stem[:match.start()].rstrip(_SEPARATORS) + stem[end:]).strip(_SEPARATORS)
+
+    return set_name, role, tile
+
+
+def get_material_name(set_name):
+    name = _NAME_RE.sub("_", set_name).strip("_") or "texture_set"
+
+    return name if not name[0].isdigit() else "mtl_" + name
+
+
+def group_texture_sets(directory, file_names, shader="VRayMtl"):
+    sets = {}
+    unknown = []
+
+    for file_name in file_names:
+        ext = os.path.splitext(file_name)[1].lower()
+
+        if ext not in TEXTURE_EXTENSIONS:
+            continue
+
+        set_name, role, tile = parse_texture_name(file_name)
+
+        if role == texture_classifier.UNKNOWN_ROLE:
+            unknown.append((set_name, file_name))
+            continue
+
+        candidates = sets.setdefault(set_name, {}).setdefault(role, {})
+
+        # Per extension, the file name with the tile number swapped for the UDIM token, and its tiles
+        if tile is not None:
+            udim_name = file_name[:file_name.rindex(str(tile))] + UDIM_TOKEN + ext
+            entry = candidates.setdefault(ext, [udim_name, []])
+            entry[1].append(tile)
+        else:
+            candidates.setdefault(ext, [file_name, []])
+
+    # Unclassified maps (AO, cavity...) go to the set their name starts with, trailing tokens are dropped until
+    # what is left names a set
+    unknown_maps = {}
+
+    for stem, file_name in unknown:
+        while stem and stem not in sets:
+            stem = _TRAILING_TOKEN_RE.sub("", stem)
+
+        if stem:
+            unknown_maps.setdefault(stem, []).append(os.path.join(directory, file_name))
+
+    materials = []
+
+    for set_name, roles in sorted(sets.items()):
+        textures = {texture_classifier.UNKNOWN_ROLE: unknown_maps.get(set_name, [])}
+        udim_tiles = {}
+
+        for role, candidates in roles.items():
+            ext = min(candidates, key=TEXTURE_EXTENSIONS.index)
+            file_name, tiles = candidates[ext]
+
+            textures[role] = os.path.join(directory, file_name)
+
+            if tiles:
+                udim_tiles[role] = sorted(tiles)
+
+        # Both drive reflectionGlossiness, roughness wins and the builder switches useRoughness on
+        if "roughness" in textures and "gloss" in textures:
+            textures[texture_classifier.UNKNOWN_ROLE].append(textures.pop("gloss"))
+
+        material_data = {
+            "material_name": get_material_name(set_name),
+            "material_shader": shader,
+            "textures": textures,
+            "texture_dir": directory
+        }
+
+        if udim_tiles:
+            material_data["udim_tiles"] = udim_tiles
+
+        materials.append(material_data)
+
+    return materials
+
+
+def _scan_directory(directory):
+    files = []
+    dirs = []
+
+    try:
+        mtime = os.stat(directory).st_mtime
+
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    dirs.append(entry.path)
+                elif entry.is_file():
+                    files.append(entry.name)
+    except OSError as e:
+        logger.warning("Could not scan %s: %s", directory, e)
+        return None
+
+    return {"mtime": mtime, "files": files, "dirs": dirs}
+
+
+class TextureSetScanner(object):
+    def __init__(self, cache_path=None, max_workers=MAX_WORKERS, shader="VRayMtl"):
+        self.cache_path = cache_path
+        self.max_workers = max_workers
+        self.shader = shader
+
+        # directory -> {mtime, files, dirs, materials}
+        self.cache = {}
+
+        if cache_path:
+            self.load_cache()
+
+    def load_cache(self):
+        if not os.path.isfile(self.cache_path):
+            return
+
+        try:
+            with open(self.cache_path, "r") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+
+        if data.get("version") == CACHE_VERSION and data.get("shader") == self.shader:
+            self.cache = data["directories"]
+
+    def save_cache(self):
+        tmp_path = self.cache_path + ".tmp"
+
+        with open(tmp_path, "w") as f:
+            json.dump({"version": CACHE_VERSION, "shader": self.shader, "directories": self.cache}, f)
+
+        os.replace(tmp_path, self.cache_path)
+
+    def _visit(self, directory):
+        # An unchanged directory mtime means no entries were added or removed, one stat instead of a scandir
+        cached = self.cache.get(directory)
+
+        if cached is not None:
+            try:
+                if os.stat(directory).st_mtime == cached["mtime"]:
+                    return directory, cached, False
+            except OSError:
+                return directory, None, False
+
+        result = _scan_directory(directory)
+
+        if result is not None:
+            result["materials"] = group_texture_sets(directory, result["files"], self.shader)
+
+        return directory, result, True
+
+    def scan(self, root):
+        start = time.time()
+        visited = {}
+        scanned = 0
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            pending = {executor.submit(self._visit, os.path.normpath(root))}
+
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+
+                for future in done:
+                    directory, result, rescanned = future.result()
+
+                    if result is None:
+                        continue
+
+                    visited[directory] = result
+                    scanned += rescanned
+
+                    for sub_directory in result["dirs"]:
+                        pending.add(executor.submit(self._visit, sub_directory))
+
+        # Drop directories under root that are gone, keep the rest of the cache
+        root_prefix = os.path.join(os.path.normpath(root), "")
+        for directory in [d for d in self.cache if d == os.path.normpath(root) or d.startswith(root_prefix)]:
+            if directory not in visited:
+                del self.cache[directory]
+
+        self.cache.update(visited)
+
+        if self.cache_path and scanned:
+            self.save_cache()
+
+        materials = self.get_materials(sorted(visited))
+
+        logger.info("Scanned %s directories (%s changed), %s files, %s texture sets in %.2fs", len(visited), scanned,
+                    sum(len(r["files"]) for r in visited.values()), len(materials), time.time() - start)
+
+        return materials
+
+    def get_materials(self, directories):
+        # Same set name in different folders gets a numbered material name
+        materials = []
+        names = {}
+
+        for directory in directories:
+            for material_data in self.cache[directory]["materials"]:
+                material_data = dict(material_data)
+                name = material_data["material_name"]
+
+                names[name] = names.get(name, 0) + 1
+
+                if names[name] > 1:
+                    material_data["material_name"] = "{}_{}".format(name, names[name])
+
+                materials.append(material_data)
+
+        return materials
+
+
+def scan_texture_sets(root, cache_path=None, max_workers=MAX_WORKERS, shader="VRayMtl"):
+    return TextureSetScanner(cache_path, max_workers, shader).scan(root)
+
+
+def benchmark(root=None, sets=5000, cache=True):
+    # Synthetic tree: 100 folders, each set with 10 maps, half of them as 4 UDIM tiles
+    suffixes = ["BaseColor", "Roughness", "Glossiness", "Normal", "Metalness", "Height", "Opacity", "AO", "Cavity",
+                "Emissive"]
+
+    tmp_root = root is None
+    root = root or tempfile.mkdtemp(prefix="texture_set_scan_")
+
+    try:
+        for i in range(sets):
+            directory = os.path.join(root, "folder_{:03d}".format(i % 100))
+
+            if not os.path.isdir(directory):
+                os.makedirs(directory)
+
+            for suffix in suffixes:
+                if i % 2:
+                    names = ["Set_{:05d}_{}.{}.exr".format(i, suffix, 1001 + t) for t in range(4)]
+                else:
+                    names = ["Set_{:05d}_{}.png".format(i, suffix)]
+
+                for name in names:
+                    open(os.path.join(directory, name), "w").close()
+
+        cache_path = os.path.join(root, "scan_cache.json") if cache else None
+        results = {}
+
+        for label in ("cold", "warm"):
+            start = time.perf_counter()
+            materials = TextureSetScanner(cache_path).scan(root)
+            results[label] = time.perf_counter() - start
+
+        results["materials"] = len(materials)
+
+        logger.info("%s texture sets, cold %.2fs, warm %.2fs", len(materials), results["cold"], results["warm"])
+
+        return results
+    finally:
+        if tmp_root:
+            shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    benchmark()
@@ -0,0 +1,32 @@
+import sys
+import types
+
+import pytest
+
+
+@pytest.fixture
+def library_manager(monkeypatch):
+    # Stands in for tools_core's library manager, two libraries and "Empty" loads no data. maya_core modules
+    # imported against it are dropped again afterwards
+    lm = types.ModuleType("tools_core.asset_library.library_manager")
+    lm.LIBRARIES = {"Props": "props", "Empty": "empty"}
+    lm.get_library_data = lambda library: {
+        "Props": {"assets": {"crate": {"maya_file": "crate.ma"}, "barrel": {"maya_file": "barrel.ma"}}}
+    }.get(library)
+
+    tools_core = types.ModuleType("tools_core")
+    asset_library = types.ModuleType("tools_core.asset_library")
+    tools_core.asset_library = asset_library
+    asset_library.library_manager = lm
+
+    monkeypatch.setitem(sys.modules, "tools_core", tools_core)
+    monkeypatch.setitem(sys.modules, "tools_core.asset_library", asset_library)
+    monkeypatch.setitem(sys.modules, "tools_core.asset_library.library_manager", lm)
+
+    loaded = set(sys.modules)
+
+    yield lm
+
+    for name in set(sys.modules) - loaded:
+        if name.startswith("maya_core."):
+            del sys.modules[name]
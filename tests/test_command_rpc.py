@@ -0,0 +1,200 @@
+import json
+import socket
+
+import pytest
+
+from maya_core.asset_library.asset_browser import command_rpc
+
+
+class Recorder(object):
+    def __init__(self):
+        self.calls = []
+
+    def add(self, a, b):
+        self.calls.append(("add", a, b))
+        return a + b
+
+    def fail(self, message="broken"):
+        self.calls.append(("fail", message))
+        raise RuntimeError(message)
+
+    def note(self, value):
+        self.calls.append(("note", value))
+
+
+@pytest.fixture
+def recorder():
+    return Recorder()
+
+
+@pytest.fixture
+def server(recorder):
+    commands = {"add": recorder.add, "fail": recorder.fail, "note": recorder.note}
+    server = command_rpc.CommandServer(commands, executor=command_rpc.DirectExecutor(), port=0).start()
+
+    yield server
+
+    server.stop()
+
+
+@pytest.fixture
+def client(server):
+    host, port = server.address
+
+    with command_rpc.CommandClient(host, port, timeout=10) as client:
+        yield client
+
+
+def _send_raw(server, *messages):
+    # Lines go out as they are, one response line is read per expected response
+    with socket.create_connection(server.address, timeout=10) as connection:
+        connection.sendall(b"".join((json.dumps(m) + "\n").encode("utf-8") for m in messages))
+        connection.shutdown(socket.SHUT_WR)
+
+        with connection.makefile("rb") as f:
+            return [json.loads(line.decode("utf-8")) for line in f]
+
+
+def test_call(client):
+    assert client.call("add", 2, 3) == 5
+    assert client.call("add", a="x", b="y") == "xy"
+
+
+def test_list_methods(client):
+    assert client.list_methods() == ["add", "fail", "note"]
+
+
+def test_method_not_found(client):
+    with pytest.raises(command_rpc.CommandError) as error:
+        client.call("missing")
+
+    assert error.value.code == command_rpc.METHOD_NOT_FOUND
+
+
+def test_params_error(client, recorder):
+    with pytest.raises(command_rpc.CommandError) as error:
+        client.call("add", 1)
+
+    assert error.value.code == command_rpc.INVALID_PARAMS
+
+    with pytest.raises(command_rpc.CommandError) as error:
+        client._unwrap(client._send({"jsonrpc": "2.0", "id": 1, "method": "add", "params": 3}))
+
+    assert error.value.code == command_rpc.INVALID_PARAMS
+    assert recorder.calls == []
+
+
+def test_type_error_inside_command(client, recorder):
+    # The arguments bind, the TypeError comes from the command itself
+    with pytest.raises(command_rpc.CommandError) as error:
+        client.call("add", "x", 1)
+
+    assert error.value.code == command_rpc.COMMAND_ERROR
+    assert error.value.data == "TypeError"
+    assert recorder.calls == [("add", "x", 1)]
+
+
+def test_command_error(client):
+    with pytest.raises(command_rpc.CommandError) as error:
+        client.call("fail", "nope")
+
+    assert error.value.code == command_rpc.COMMAND_ERROR
+    assert error.value.message == "nope"
+    assert error.value.data == "RuntimeError"
+
+
+def test_batch_array(client, recorder):
+    with client.batch() as batch:
+        batch.add("add", 1, 2).add("add", a=3, b=4).add("list_methods")
+
+    assert batch.results == [3, 7, ["add", "fail", "note"]]
+    assert recorder.calls == [("add", 1, 2), ("add", 3, 4)]
+
+
+def test_batch_array_failures(client, recorder):
+    results = client.batch().add("add", 1, 2).add("fail").add("missing").add("add", 1).add("add", 5, 5).send(
+        raise_errors=False)
+
+    assert results[0] == 3
+    assert [r.code for r in results[1:4]] == [command_rpc.COMMAND_ERROR, command_rpc.METHOD_NOT_FOUND,
+                                              command_rpc.INVALID_PARAMS]
+    assert results[4] == 10
+
+    # Calls after a failed one still run
+    assert recorder.calls == [("add", 1, 2), ("fail", "broken"), ("add", 5, 5)]
+
+    with pytest.raises(command_rpc.CommandError):
+        client.batch().add("add", 1, 2).add("fail").send()
+
+
+def test_batch_method(client, recorder):
+    responses = client.call("batch", commands=[
+        {"method": "add", "params": [1, 2]},
+        {"method": "fail", "params": {"message": "bad"}},
+        {"method": "missing"},
+        {"method": "add", "params": [1]},
+        {"method": "add", "params": [2, 2]}
+    ])
+
+    assert [r.get("id") for r in responses] == [0, 1, 2, 3, 4]
+    assert responses[0]["result"] == 3
+    assert responses[1]["error"]["code"] == command_rpc.COMMAND_ERROR
+    assert responses[1]["error"]["message"] == "bad"
+    assert responses[2]["error"]["code"] == command_rpc.METHOD_NOT_FOUND
+    assert responses[3]["error"]["code"] == command_rpc.INVALID_PARAMS
+    assert responses[4]["result"] == 4
+    assert recorder.calls == [("add", 1, 2), ("fail", "bad"), ("add", 2, 2)]
+
+    with pytest.raises(command_rpc.CommandError) as error:
+        client.call("batch", commands="add")
+
+    assert error.value.code == command_rpc.INVALID_PARAMS
+
+
+def test_notifications(server, recorder):
+    responses = _send_raw(
+        server,
+        {"jsonrpc": "2.0", "method": "note", "params": ["single"]},
+        [{"jsonrpc": "2.0", "method": "note", "params": ["batched"]},
+         {"jsonrpc": "2.0", "method": "fail"}],
+        [{"jsonrpc": "2.0", "method": "note", "params": ["mixed"]},
+         {"jsonrpc": "2.0", "id": 7, "method": "add", "params": [1, 1]}],
+        {"jsonrpc": "2.0", "id": 8, "method": "add", "params": [2, 2]}
+    )
+
+    # Only requests with an id are answered, notifications still run
+    assert responses == [[{"jsonrpc": "2.0", "id": 7, "result": 2}], {"jsonrpc": "2.0", "id": 8, "result": 4}]
+    assert [c for c in recorder.calls if c[0] == "note"] == [("note", "single"), ("note", "batched"),
+                                                              ("note", "mixed")]
+
+
+def test_invalid_messages(server):
+    responses = _send_raw(server, [])
+
+    assert responses[0]["error"]["code"] == command_rpc.INVALID_REQUEST
+
+    with socket.create_connection(server.address, timeout=10) as connection:
+        connection.sendall(b"{not json\n")
+        connection.shutdown(socket.SHUT_WR)
+
+        with connection.makefile("rb") as f:
+            assert json.loads(f.readline())["error"]["code"] == command_rpc.PARSE_ERROR
+
+    responses = _send_raw(server, {"id": 1, "method": "add"})
+
+    assert responses[0]["error"]["code"] == command_rpc.INVALID_REQUEST
+
+
+def test_undecodable_line(server):
+    # The connection stays usable after a line that is not UTF-8
+    request = json.dumps({"jsonrpc": "2.0", "id": 1, "method": "add", "params": [1, 2]}).encode("utf-8")
+
+    with socket.create_connection(server.address, timeout=10) as connection:
+        connection.sendall(b"\xff\xfe\n" + request + b"\n")
+        connection.shutdown(socket.SHUT_WR)
+
+        with connection.makefile("rb") as f:
+            responses = [json.loads(line.decode("utf-8")) for line in f]
+
+    assert responses[0]["error"]["code"] == command_rpc.PARSE_ERROR
+    assert responses[1]["result"] == 3
@@ -0,0 +1,46 @@
+import importlib
+
+import pytest
+
+
+@pytest.fixture
+def library_summary(library_manager):
+    return importlib.import_module("maya_core.asset_library.asset_browser.library_summary")
+
+
+def test_unvisited_libraries_are_kept(library_summary, tmp_path):
+    summary = library_summary.load_summary(str(tmp_path))
+
+    assert sorted(library_summary.get_startup_libraries(summary)) == ["Empty", "Props"]
+
+
+def test_visited_empty_library_comes_back_as_empty(library_summary, library_manager, tmp_path):
+    loaded = {}
+    library_summary.add_load_callback(loaded.__setitem__)
+
+    try:
+        library_manager.get_library_data("Props")
+        library_manager.get_library_data("Empty")
+    finally:
+        library_summary.remove_load_callback(loaded.__setitem__)
+
+    library_summary.update_summary(str(tmp_path), dict((library, library_summary.get_asset_count(library_data))
+                                                       for library, library_data in loaded.items()))
+    summary = library_summary.load_summary(str(tmp_path))
+
+    assert summary["Empty"]["non_empty"] is False
+    assert summary["Empty"]["asset_count"] == 0
+    assert summary["Props"]["asset_count"] == 2
+    assert library_summary.get_startup_libraries(summary) == ["Props"]
+
+
+def test_summary_is_written_only_when_changed(library_summary, tmp_path):
+    library_summary.update_summary(str(tmp_path), {"Props": 2})
+    summary_path = library_summary.get_summary_path(str(tmp_path))
+    updated = library_summary.load_summary(str(tmp_path))["Props"]["updated"]
+
+    library_summary.update_summary(str(tmp_path), {"Props": 2})
+
+    assert library_summary.load_summary(str(tmp_path))["Props"]["updated"] == updated
+    assert library_summary.update_summary(str(tmp_path), {"Props": 0})["Props"]["non_empty"] is False
+    assert summary_path.endswith(library_summary.SUMMARY_NAME)
@@ -0,0 +1,160 @@
+import importlib
+
+import pytest
+
+ASSET_ROOT = "/library/props/rock"
+MAYA_FILE = ASSET_ROOT + "/rock.ma"
+TEXTURE = "/sources/rock_BaseColor.png"
+TEXTURE_STAT = {"size": 1024, "mtime": 1700000000.0}
+
+
+@pytest.fixture
+def publish_plan(library_manager):
+    return importlib.import_module("maya_core.asset_library.asset_publish.publish_plan")
+
+
+def published_scene(publish_plan):
+    # The scene as a republish finds it, the part already sits under the asset's GEO group
+    scene = publish_plan.new_scene_description("rock")
+    scene["world_node_exists"] = True
+    scene["parts"].append({
+        "node": "rock_geo",
+        "parent": "|rock|Geometry|Constrain|HiRes|GEO",
+        "mesh_hash": "mesh",
+        "proxy_exists": True
+    })
+    scene["materials"].append({
+        "name": "rock_mtl",
+        "shader": "VRayMtl",
+        "graph_hash": "graph",
+        "file_nodes": [{"node": "rock_file", "path": TEXTURE, "has_cc": True, "stat": TEXTURE_STAT}]
+    })
+
+    return scene
+
+
+def previous_manifest():
+    return {
+        "version": 2,
+        "meshes": {"rock_geo": "mesh"},
+        "materials": {"rock_mtl": {"graph": "graph", "textures": {TEXTURE: TEXTURE_STAT}}}
+    }
+
+
+def plan(publish_plan, scene, previous=None, **kwargs):
+    asset_data = publish_plan.new_asset_data("rock", "Props")
+
+    return publish_plan.plan_publish(scene, asset_data, "Props", ASSET_ROOT, MAYA_FILE, previous=previous,
+                                     file_exists=lambda path: True, **kwargs)
+
+
+def new_scene(publish_plan):
+    # A first publish, the part still sits where the artist modelled it
+    scene = published_scene(publish_plan)
+    scene["world_node_exists"] = False
+    scene["parts"][0].update({"parent": None, "mesh_hash": None, "proxy_exists": False})
+    scene["materials"][0].update({"graph_hash": None})
+    scene["materials"][0]["file_nodes"][0].update({"has_cc": False, "stat": None})
+
+    return scene
+
+
+def action_names(result):
+    return [a["action"] for a in result.actions]
+
+
+def test_full_publish_plans_every_stage(publish_plan):
+    result = plan(publish_plan, new_scene(publish_plan), convert_textures=False, proxies=False)
+
+    assert action_names(result) == ["create_asset", "import_world_node", "create_proxy", "parent",
+                                    "collect_textures", "set_reflection", "repath", "create_cc_node", "export",
+                                    "write_asset_data"]
+    assert set(result.report["stages"].values()) == {publish_plan.RUN}
+    assert result.get_actions("collect_textures")[0]["release"] is True
+    assert result.get_actions("create_proxy")[0]["replace"] is False
+    assert result.get_actions("repath")[0]["destination"] == "/library/props/rock/03_lookdev/publish/materials/" \
+                                                             "rock_mtl/rock_BaseColor.png"
+
+
+def test_incremental_publish_runs_changed_materials_only(publish_plan):
+    scene = published_scene(publish_plan)
+    scene["materials"].append({
+        "name": "moss_mtl",
+        "shader": "VRayMtl",
+        "graph_hash": "new",
+        "file_nodes": [{"node": "moss_file", "path": "/sources/moss_BaseColor.png", "has_cc": False, "stat": None}]
+    })
+
+    result = plan(publish_plan, scene, previous=previous_manifest(), convert_textures=False, proxies=False)
+
+    assert result.report["materials"] == {"rock_mtl": publish_plan.SKIPPED, "moss_mtl": publish_plan.RUN}
+    assert [a["file_node"] for a in result.get_actions("repath")] == ["moss_file"]
+    assert result.get_actions("collect_textures")[0]["release"] is False
+    assert result.report["stages"]["proxy"] == publish_plan.SKIPPED
+    assert result.report["stages"]["export"] == publish_plan.RUN
+
+
+@pytest.mark.parametrize("convert_textures, proxies", [(False, False), (True, False), (False, True), (True, True)])
+def test_texture_stages_follow_their_switches(publish_plan, convert_textures, proxies):
+    result = plan(publish_plan, new_scene(publish_plan), convert_textures=convert_textures, proxies=proxies)
+    names = action_names(result)
+
+    assert ("convert_textures" in names) == convert_textures
+    assert ("generate_texture_proxies" in names) == proxies
+
+    # Both run on what was collected and before the file nodes are repathed
+    for name in ("convert_textures", "generate_texture_proxies"):
+        if name in names:
+            assert names.index("collect_textures") < names.index(name) < names.index("repath")
+
+
+def test_texture_stages_default_to_the_environment(publish_plan, monkeypatch):
+    monkeypatch.setattr(publish_plan.texture_converter, "CONVERT_TEXTURES", True)
+    monkeypatch.setattr(publish_plan.texture_proxies, "TEXTURE_PROXIES", False)
+
+    names = action_names(plan(publish_plan, new_scene(publish_plan)))
+
+    assert "convert_textures" in names
+    assert "generate_texture_proxies" not in names
+
+
+def test_unchanged_republish_plans_no_proxy_or_export(publish_plan):
+    result = plan(publish_plan, published_scene(publish_plan), previous=previous_manifest())
+
+    assert not result.get_actions("create_proxy")
+    assert not result.get_actions("parent")
+    assert not result.get_actions("export")
+    assert not result.get_actions("collect_textures")
+    assert result.report["stages"] == {
+        "world_node": publish_plan.SKIPPED,
+        "proxy": publish_plan.SKIPPED,
+        "textures": publish_plan.SKIPPED,
+        "lookdev": publish_plan.SKIPPED,
+        "export": publish_plan.SKIPPED
+    }
+
+
+def test_changed_mesh_replans_proxy_and_export(publish_plan):
+    scene = published_scene(publish_plan)
+    scene["parts"][0]["mesh_hash"] = "edited"
+
+    result = plan(publish_plan, scene, previous=previous_manifest())
+
+    assert [a["node"] for a in result.get_actions("create_proxy")] == ["rock_geo"]
+    assert result.get_actions("create_proxy")[0]["replace"] is True
+    assert len(result.get_actions("export")) == 1
+    assert result.report["materials"] == {"rock_mtl": publish_plan.SKIPPED}
+
+
+def test_textures_sharing_a_name_are_repathed_apart(publish_plan):
+    scene = published_scene(publish_plan)
+    scene["materials"][0]["file_nodes"].append({"node": "moss_file", "path": "/sources/moss/rock_BaseColor.png",
+                                                "has_cc": True, "stat": TEXTURE_STAT})
+
+    result = plan(publish_plan, scene)
+
+    jobs = result.get_actions("collect_textures")[0]["jobs"]
+    repaths = dict((a["file_node"], a["destination"]) for a in result.get_actions("repath"))
+
+    assert len(set(repaths.values())) == 2
+    assert sorted(dst for _, dst in jobs) == sorted(repaths.values())
@@ -0,0 +1,51 @@
+import os
+import json
+
+from maya_core.asset_library.asset_publish import texture_collector
+
+
+def write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    with open(path, "wb") as f:
+        f.write(data)
+
+    return path
+
+
+def test_sources_sharing_a_name_are_both_collected(tmp_path):
+    rock = write(str(tmp_path / "rock" / "albedo.png"), b"rock")
+    moss = write(str(tmp_path / "moss" / "albedo.png"), b"moss")
+    dst = str(tmp_path / "materials" / "rock_mtl" / "albedo.png")
+
+    manifest = texture_collector.collect_textures([(rock, dst), (moss, dst), (rock, dst)])
+    destinations = dict((f["source"], f["destination"]) for f in manifest["files"])
+
+    # moss sorts first and keeps the name
+    assert manifest["copied"] == 2
+    assert destinations[moss] == os.path.normpath(dst)
+    assert destinations[rock] != destinations[moss]
+
+    for src, destination in destinations.items():
+        with open(destination, "rb") as f, open(src, "rb") as s:
+            assert f.read() == s.read()
+
+    # Same names on the next publish, whichever order the file nodes come in
+    assert texture_collector.get_unique_destinations([(moss, dst), (rock, dst)]) == [
+        (moss, destinations[moss]), (rock, destinations[rock])]
+
+
+def test_hash_index_is_replaced_whole(tmp_path):
+    src = write(str(tmp_path / "src" / "rough.png"), b"rough")
+    dst = str(tmp_path / "materials" / "rough.png")
+
+    texture_collector.collect_textures([(src, dst)])
+    manifest = texture_collector.collect_textures([(src, dst)])
+
+    directory = os.path.dirname(dst)
+
+    with open(os.path.join(directory, texture_collector.HASH_INDEX_NAME)) as f:
+        assert json.load(f)["rough.png"]["hash"] == texture_collector.hash_file(src)
+
+    assert manifest["skipped"] == 1
+    assert not [name for name in os.listdir(directory) if name.endswith(".tmp")]
@@ -0,0 +1,107 @@
+import zlib
+import struct
+
+import pytest
+
+numpy = pytest.importorskip("numpy")
+Image = pytest.importorskip("PIL.Image")
+
+from maya_core.asset_library.asset_publish import texture_converter as tc
+
+
+def _write_rgb16_png(path, pixels):
+    # Pillow can't write 16 bit RGB, the PNG is put together by hand
+    height, width, _ = pixels.shape
+    raw = b"".join(b"\x00" + pixels[y].astype(">u2").tobytes() for y in range(height))
+
+    def chunk(chunk_type, data):
+        return struct.pack(">I", len(data)) + chunk_type + data + struct.pack(">I", zlib.crc32(chunk_type + data))
+
+    with open(path, "wb") as f:
+        f.write(b"\x89PNG\r\n\x1a\n")
+        f.write(chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 16, 2, 0, 0, 0)))
+        f.write(chunk(b"IDAT", zlib.compress(raw)))
+        f.write(chunk(b"IEND", b""))
+
+
+def _read_levels(path):
+    image = Image.open(path)
+    levels = []
+
+    for index in range(image.n_frames):
+        image.seek(index)
+        levels.append(numpy.asarray(image))
+
+    return levels
+
+
+@pytest.fixture
+def rgb8(tmp_path):
+    pixels = numpy.random.RandomState(0).randint(0, 256, (67, 130, 3)).astype(numpy.uint8)
+    path = str(tmp_path / "rock_BaseColor.png")
+    Image.fromarray(pixels).save(path)
+
+    return path, pixels
+
+
+@pytest.fixture(params=[".png", ".tif"])
+def gray16(request, tmp_path):
+    pixels = numpy.random.RandomState(1).randint(0, 65536, (67, 130)).astype(numpy.uint16)
+    path = str(tmp_path / ("rock_Roughness" + request.param))
+    Image.fromarray(pixels).save(path)
+
+    return path, pixels
+
+
+def test_read_pixels_8_bit(rgb8):
+    path, pixels = rgb8
+    result = tc.read_pixels(path)
+
+    assert result.dtype == numpy.uint8
+    assert numpy.array_equal(result, pixels)
+
+
+def test_read_pixels_16_bit(gray16):
+    path, pixels = gray16
+    result = tc.read_pixels(path)
+
+    assert result.dtype == numpy.uint16
+    assert result.shape == pixels.shape + (1,)
+    assert numpy.array_equal(result[..., 0], pixels)
+
+
+def test_read_pixels_rejects_16_bit_rgb(tmp_path):
+    path = str(tmp_path / "rock_Normal.png")
+    _write_rgb16_png(path, numpy.random.RandomState(2).randint(0, 65536, (8, 8, 3)))
+
+    assert not tc.can_read_pixels(path)
+    assert not tc.NumpyBackend().supports(path)
+
+    with pytest.raises(ValueError):
+        tc.read_pixels(path)
+
+
+def test_convert_round_trip_8_bit(rgb8, tmp_path):
+    path, pixels = rgb8
+    dst = str(tmp_path / "rock_BaseColor.tx")
+    tc.convert_texture(path, dst, tc.NumpyBackend())
+
+    levels = _read_levels(dst)
+    expected = tc.build_mipmaps(pixels[..., :3])
+
+    assert len(levels) == len(expected)
+    assert all(numpy.array_equal(level, mip) for level, mip in zip(levels, expected))
+
+
+def test_convert_round_trip_16_bit(gray16, tmp_path):
+    path, pixels = gray16
+    dst = str(tmp_path / "rock_Roughness.tx")
+    tc.convert_texture(path, dst, tc.NumpyBackend())
+
+    levels = _read_levels(dst)
+    expected = tc.build_mipmaps(pixels[..., None])
+
+    assert Image.open(dst).mode.startswith("I;16")
+    assert len(levels) == len(expected)
+    assert all(numpy.array_equal(level, mip[..., 0]) for level, mip in zip(levels, expected))
+
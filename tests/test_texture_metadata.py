@@ -0,0 +1,28 @@
+import os
+
+import pytest
+
+Image = pytest.importorskip("PIL.Image")
+
+from maya_core.pipeline.lookdev import texture_metadata as tm
+
+
+def test_udim_sequences_list_their_folder_once(tmp_path, monkeypatch):
+    for tile, size in ((1001, (8, 4)), (1002, (16, 8))):
+        Image.new("RGB", size).save(str(tmp_path / "rock_BaseColor.{}.png".format(tile)))
+
+    listed = []
+    listdir = os.listdir
+    monkeypatch.setattr(tm.os, "listdir", lambda path: listed.append(path) or listdir(path))
+
+    cache = tm.TextureMetadataCache(cache_path=str(tmp_path / "metadata.db"))
+    rock = str(tmp_path / "rock_BaseColor.<UDIM>.png")
+    moss = str(tmp_path / "moss_BaseColor.<UDIM>.png")
+
+    metadata = cache.get_metadata_list([rock, moss])
+    cache.close()
+
+    assert listed == [str(tmp_path)]
+    assert metadata[rock]["udim_tiles"] == [1001, 1002]
+    assert metadata[rock]["tile_resolutions"] == {"1001": [8, 4], "1002": [16, 8]}
+    assert metadata[moss] is None
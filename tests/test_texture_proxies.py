@@ -0,0 +1,50 @@
+import pytest
+
+numpy = pytest.importorskip("numpy")
+Image = pytest.importorskip("PIL.Image")
+
+from maya_core.asset_library.asset_publish import texture_converter as tc
+from maya_core.asset_library.asset_publish import texture_proxies as tp
+
+
+@pytest.mark.parametrize("name, dtype, shape", [
+    ("rock_BaseColor.png", numpy.uint8, (67, 130, 3)),
+    ("rock_BaseColor.tga", numpy.uint8, (67, 130, 4)),
+    ("rock_Roughness.png", numpy.uint16, (67, 130)),
+    ("rock_Height.tif", numpy.uint16, (67, 130))
+])
+def test_proxies_keep_bit_depth(tmp_path, name, dtype, shape):
+    pixels = numpy.random.RandomState(0).randint(0, numpy.iinfo(dtype).max + 1, shape).astype(dtype)
+    path = str(tmp_path / name)
+    Image.fromarray(pixels).save(path)
+
+    result = tp.generate_proxies(path)
+    expected = tc.build_mipmaps(pixels if pixels.ndim == 3 else pixels[..., None], max(tp.PROXY_LEVELS.values()))
+
+    assert result["generated"]
+
+    for level, proxy_path in result["proxies"].items():
+        proxy = numpy.asarray(Image.open(proxy_path))
+        mip = expected[tp.PROXY_LEVELS[level]]
+
+        assert proxy.dtype == dtype
+        assert numpy.array_equal(proxy, mip if pixels.ndim == 3 else mip[..., 0])
+
+    assert not tp.generate_proxies(path)["generated"]
+
+
+def test_proxies_follow_the_file_node_path(tmp_path):
+    # A blob in the store converted next to the material: the proxies belong with the converted texture
+    blob = tmp_path / "store" / "ab" / "ab12.png"
+    blob.parent.mkdir(parents=True)
+    Image.fromarray(numpy.zeros((64, 64, 3), numpy.uint8)).save(str(blob))
+    converted = str(tmp_path / "materials" / "rock_mtl" / "rock_BaseColor.tif")
+
+    result = tp.generate_proxies(str(blob), target=converted)
+
+    assert not (blob.parent / tp.PROXY_DIR).exists()
+    assert tp.find_proxy_path(converted, "half") == result["proxies"]["half"]
+
+    tp.remove_proxies(converted)
+
+    assert tp.find_proxy_path(converted, "half", listings={}) is None
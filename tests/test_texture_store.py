@@ -0,0 +1,69 @@
+import os
+import sqlite3
+
+from maya_core.asset_library.asset_publish import texture_store
+
+
+def write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    with open(path, "wb") as f:
+        f.write(data)
+
+    return path
+
+
+def test_one_content_under_two_extensions_is_collected(tmp_path):
+    store = texture_store.TextureStore(str(tmp_path / "store"), link_mode="direct")
+    tif = write(str(tmp_path / "src" / "height.tif"), b"height")
+    tiff = write(str(tmp_path / "src" / "height.tiff"), b"height")
+
+    tif_blob, file_hash, copied = store.add(tif, "Props/rock")
+    tiff_blob, tiff_hash, tiff_copied = store.add(tiff, "Props/moss")
+
+    assert copied and tiff_copied
+    assert file_hash == tiff_hash
+    assert store.has_blob(file_hash, ".tif") and store.has_blob(file_hash, ".tiff")
+    assert store.stats()["blobs"] == 2
+    assert not [name for name in os.listdir(store.blobs_root) if name.endswith(".tmp")]
+
+    store.release("Props/rock")
+    store.release("Props/moss")
+    removed, freed = store.collect_garbage()
+
+    assert sorted(removed) == sorted([tif_blob, tiff_blob])
+    assert not os.path.isfile(tif_blob) and not os.path.isfile(tiff_blob)
+
+    store.close()
+
+
+def test_stored_content_is_not_copied_again(tmp_path):
+    store = texture_store.TextureStore(str(tmp_path / "store"))
+    src = write(str(tmp_path / "src" / "albedo.png"), b"albedo")
+
+    blob_path, file_hash, copied = store.add(src, "Props/rock")
+    again = store.add(src, "Props/moss")
+
+    assert copied
+    assert again == (blob_path, file_hash, False)
+    assert store.ref_count(file_hash) == 2
+
+    store.close()
+
+
+def test_blobs_keyed_by_hash_are_migrated(tmp_path):
+    root = tmp_path / "store"
+    root.mkdir()
+
+    connection = sqlite3.connect(str(root / "index.db"))
+    connection.execute("CREATE TABLE blobs (hash TEXT PRIMARY KEY, ext TEXT NOT NULL, size INTEGER NOT NULL)")
+    connection.execute("INSERT INTO blobs VALUES ('ab12', '.png', 10)")
+    connection.commit()
+    connection.close()
+
+    store = texture_store.TextureStore(str(root))
+    store.connection.execute("INSERT INTO blobs VALUES ('ab12', '.tif', 10)")
+
+    assert store.stats()["blobs"] == 2
+
+    store.close()